@@ -105,6 +105,11 @@ app.kubernetes.io/component: "{{ include "name" . }}-cache-metrics-collector"
 app.kubernetes.io/component: "{{ include "name" . }}-backfill"
 {{- end -}}
 
+{{- define "labels.cleanCachedAssets" -}}
+{{ include "hf.labels.commons" . }}
+app.kubernetes.io/component: "{{ include "name" . }}-clean-cached-assets"
+{{- end -}}
+
 {{- define "labels.deleteIndexes" -}}
 {{ include "hf.labels.commons" . }}
 app.kubernetes.io/component: "{{ include "name" . }}-delete-indexes"
@@ -183,6 +188,13 @@ The cached-assets base URL
 {{- printf "%s%s/cached-assets" (include "datasetsServer.ingress.scheme" .) (include "datasetsServer.ingress.hostname" .) }}
 {{- end }}
 
+{{/*
+The URL of the route that creates the assets of /rows on the first request
+*/}}
+{{- define "rows.lazyAssetsBaseUrl" -}}
+{{- printf "%s%s/rows/asset" (include "datasetsServer.ingress.scheme" .) (include "datasetsServer.ingress.hostname" .) }}
+{{- end }}
+
 {{/*
 The cached-assets/ subpath in the NFS
 - in a subdirectory named as the chart (datasets-server/), and below it,
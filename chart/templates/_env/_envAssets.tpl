@@ -6,4 +6,6 @@
   value: "{{ include "assets.baseUrl" . }}"
 - name: ASSETS_STORAGE_DIRECTORY
   value: {{ .Values.assets.storageDirectory | quote }}
+- name: ASSETS_MAX_WORKERS
+  value: {{ .Values.assets.maxWorkers | quote }}
 {{- end -}}
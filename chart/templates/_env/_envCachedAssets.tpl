@@ -6,12 +6,8 @@
   value: "{{ include "cachedAssets.baseUrl" . }}"
 - name: CACHED_ASSETS_STORAGE_DIRECTORY
   value: {{ .Values.cachedAssets.storageDirectory | quote }}
-- name: CACHED_ASSETS_CLEAN_CACHE_PROBA
-  value: {{ .Values.cachedAssets.cleanCacheProba | quote }}
-- name: CACHED_ASSETS_KEEP_FIRST_ROWS_NUMBER
-  value: {{ .Values.cachedAssets.keepFirstRowsNumber | quote }}
-- name: CACHED_ASSETS_KEEP_MOST_RECENT_ROWS_NUMBER
-  value: {{ .Values.cachedAssets.keepMostRecentRowsNumber | quote }}
-- name: CACHED_ASSETS_MAX_CLEANED_ROWS_NUMBER
-  value: {{ .Values.cachedAssets.maxCleanedRowsNumber | quote }}
+- name: CACHED_ASSETS_MAX_WORKERS
+  value: {{ .Values.cachedAssets.maxWorkers | quote }}
+- name: CACHED_ASSETS_ACCESS_INDEX_FLUSH_INTERVAL_SECONDS
+  value: {{ .Values.cachedAssets.accessIndexFlushIntervalSeconds | quote }}
 {{- end -}}
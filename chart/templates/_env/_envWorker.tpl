@@ -2,6 +2,10 @@
 # Copyright 2022 The HuggingFace Authors.
 
 {{- define "envWorker" -}}
+- name: WORKER_BATCH_DIFFICULTY_MAX
+  value: {{ .Values.worker.batchDifficultyMax | quote }}
+- name: WORKER_BATCH_MAX_JOBS
+  value: {{ .Values.worker.batchMaxJobs | quote }}
 - name: WORKER_CONTENT_MAX_BYTES
   value: {{ .Values.worker.contentMaxBytes | quote}}
 - name: WORKER_HEARTBEAT_INTERVAL_SECONDS
@@ -22,6 +26,8 @@
   value: {{ .Values.worker.maxMissingHeartbeats | quote }}
 - name: WORKER_SLEEP_SECONDS
   value: {{ .Values.worker.sleepSeconds | quote }}
+- name: WORKER_WATCH_NEW_JOBS
+  value: {{ .Values.worker.watchNewJobs | quote }}
 - name: TMPDIR
   value: "/tmp"
   # ^ensure the temporary files are created in /tmp, which is writable
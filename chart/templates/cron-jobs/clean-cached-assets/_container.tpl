@@ -0,0 +1,30 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+{{- define "containerCleanCachedAssets" -}}
+- name: "{{ include "name" . }}-clean-cached-assets"
+  image: {{ include "jobs.cacheMaintenance.image" . }}
+  imagePullPolicy: {{ .Values.images.pullPolicy }}
+  volumeMounts:
+  {{ include "volumeMountCachedAssetsRW" . | nindent 2 }}
+  securityContext:
+    allowPrivilegeEscalation: false
+  resources: {{ toYaml .Values.cleanCachedAssets.resources | nindent 4 }}
+  env:
+    {{ include "envCache" . | nindent 2 }}
+    {{ include "envQueue" . | nindent 2 }}
+    {{ include "envCommon" . | nindent 2 }}
+    {{ include "envCachedAssets" . | nindent 2 }}
+  - name: CACHE_MAINTENANCE_ACTION
+    value: {{ .Values.cleanCachedAssets.action | quote }}
+  - name: LOG_LEVEL
+    value: {{ .Values.cleanCachedAssets.log.level | quote }}
+  - name: CLEAN_CACHED_ASSETS_MAX_BYTES
+    value: {{ .Values.cleanCachedAssets.maxBytes | quote }}
+  - name: CLEAN_CACHED_ASSETS_MAX_MEASURED_ROWS_NUMBER
+    value: {{ .Values.cleanCachedAssets.maxMeasuredRowsNumber | quote }}
+  - name: CLEAN_CACHED_ASSETS_MAX_DELETED_ROWS_NUMBER
+    value: {{ .Values.cleanCachedAssets.maxDeletedRowsNumber | quote }}
+  - name: CLEAN_CACHED_ASSETS_SCAN_INTERVAL_SECONDS
+    value: {{ .Values.cleanCachedAssets.scanIntervalSeconds | quote }}
+{{- end -}}
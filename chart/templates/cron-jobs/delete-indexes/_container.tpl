@@ -22,4 +22,6 @@
     value: {{ .Values.duckDBIndex.cacheDirectory | quote }}
   - name: DUCKDB_INDEX_EXPIRED_TIME_INTERVAL_SECONDS
     value: {{ .Values.duckDBIndex.expiredTimeIntervalSeconds | quote }}
+  - name: DUCKDB_INDEX_MAX_BYTES
+    value: {{ .Values.duckDBIndex.maxBytes | quote }}
 {{- end -}}
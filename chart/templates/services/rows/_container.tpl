@@ -19,6 +19,28 @@
     value: {{ .Values.rows.maxAgeLong | quote }}
   - name: API_MAX_AGE_SHORT
     value: {{ .Values.rows.maxAgeShort | quote }}
+  - name: ROWS_INDEX_CACHE_MAX_BYTES
+    value: {{ .Values.rows.rowsIndexCacheMaxBytes | quote }}
+  - name: ROWS_INDEX_CACHE_MAX_COUNT
+    value: {{ .Values.rows.rowsIndexCacheMaxCount | quote }}
+  - name: ROWS_INDEX_CACHE_TTL_SECONDS
+    value: {{ .Values.rows.rowsIndexCacheTtlSeconds | quote }}
+  - name: ROWS_INDEX_ROW_GROUP_CACHE_MAX_BYTES
+    value: {{ .Values.rows.rowGroupCacheMaxBytes | quote }}
+  - name: ROWS_INDEX_SHARED_ROW_GROUP_CACHE_DIRECTORY
+    value: {{ .Values.rows.sharedRowGroupCacheDirectory | quote }}
+  - name: ROWS_INDEX_SHARED_ROW_GROUP_CACHE_MAX_BYTES
+    value: {{ .Values.rows.sharedRowGroupCacheMaxBytes | quote }}
+  - name: ROWS_LAZY_ASSETS_ENABLED
+    value: {{ .Values.rows.lazyAssetsEnabled | quote }}
+  - name: ROWS_LAZY_ASSETS_BASE_URL
+    value: "{{ include "rows.lazyAssetsBaseUrl" . }}"
+  - name: ROWS_WARM_UP_NUM_SPLITS
+    value: {{ .Values.rows.warmUpNumSplits | quote }}
+  - name: ROWS_WARM_UP_TIMEOUT_SECONDS
+    value: {{ .Values.rows.warmUpTimeoutSeconds | quote }}
+  - name: ROWS_WARM_UP_SPLIT_REQUESTS_FLUSH_INTERVAL_SECONDS
+    value: {{ .Values.rows.warmUpSplitRequestsFlushIntervalSeconds | quote }}
   # prometheus
   - name: PROMETHEUS_MULTIPROC_DIR
     value:  {{ .Values.rows.prometheusMultiprocDirectory | quote }}
@@ -32,6 +32,18 @@
     value: {{ .Values.duckDBIndex.targetRevision | quote }}
   - name: DUCKDB_INDEX_CACHE_DIRECTORY
     value: {{ .Values.duckDBIndex.cacheDirectory | quote }}
+  - name: DUCKDB_INDEX_CONNECTION_POOL_MAX_CONNECTIONS
+    value: {{ .Values.search.connectionPoolMaxConnections | quote }}
+  - name: DUCKDB_INDEX_CONNECTION_POOL_MAX_MEMORY_BYTES
+    value: {{ .Values.search.connectionPoolMaxMemoryBytes | quote }}
+  - name: DUCKDB_INDEX_MATCHING_IDS_CACHE_MAX_COUNT
+    value: {{ .Values.search.matchingIdsCacheMaxCount | quote }}
+  - name: DUCKDB_INDEX_MATCHING_IDS_CACHE_MAX_BYTES
+    value: {{ .Values.search.matchingIdsCacheMaxBytes | quote }}
+  - name: DUCKDB_INDEX_DOWNLOAD_WAIT_SECONDS
+    value: {{ .Values.search.downloadWaitSeconds | quote }}
+  - name: DUCKDB_INDEX_ACCESS_INDEX_FLUSH_INTERVAL_SECONDS
+    value: {{ .Values.search.accessIndexFlushIntervalSeconds | quote }}
   volumeMounts:
   {{ include "volumeMountCachedAssetsRW" . | nindent 2 }}
   {{ include "volumeMountDuckDBIndexRW" . | nindent 2 }}
@@ -0,0 +1,166 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import logging
+import os
+import shutil
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from libcommon.storage import StrPath
+from libcommon.viewer_utils.access_index import (
+    AssetsAccessIndex,
+    RowKey,
+    record_cleaning,
+)
+from libcommon.viewer_utils.asset import DATASET_SEPARATOR
+
+BATCH_SIZE = 1_000
+
+
+def get_row_dir_path(cached_assets_directory: StrPath, row_key: RowKey) -> Path:
+    dataset, config, split, row_idx = row_key
+    return Path(cached_assets_directory).resolve() / dataset / DATASET_SEPARATOR / config / split / str(row_idx)
+
+
+def get_directory_num_bytes(path: Path) -> int:
+    num_bytes = 0
+    for dir_path, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                num_bytes += os.path.getsize(os.path.join(dir_path, filename))
+            except FileNotFoundError:
+                # the file has just been deleted, e.g. a temporary file
+                pass
+    return num_bytes
+
+
+def scan_rows_directories(cached_assets_directory: StrPath) -> Iterator[Tuple[RowKey, float]]:
+    """Yield the rows directories of the cached assets directory, with their last modification time."""
+    root = Path(cached_assets_directory).resolve()
+    for dir_path, dir_names, _ in os.walk(root):
+        if DATASET_SEPARATOR not in dir_names:
+            continue
+        # a dataset directory. The names of the datasets can contain a slash: the other subdirectories are walked
+        dir_names.remove(DATASET_SEPARATOR)
+        dataset = str(Path(dir_path).relative_to(root))
+        for config_entry in os.scandir(Path(dir_path) / DATASET_SEPARATOR):
+            if not config_entry.is_dir():
+                continue
+            for split_entry in os.scandir(config_entry.path):
+                if not split_entry.is_dir():
+                    continue
+                for row_entry in os.scandir(split_entry.path):
+                    if row_entry.is_dir() and row_entry.name.isdigit():
+                        row_key = (dataset, config_entry.name, split_entry.name, int(row_entry.name))
+                        yield row_key, row_entry.stat().st_mtime
+
+
+def add_missing_rows(access_index: AssetsAccessIndex, cached_assets_directory: StrPath) -> int:
+    """Add the rows directories that are missing from the access index, e.g. created before the index existed, or
+    whose accesses have not been written. Their last access is the last modification time of their directory."""
+    added_rows_number = 0
+    rows = scan_rows_directories(cached_assets_directory)
+    while True:
+        batch: List[Tuple[RowKey, float]] = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        added_rows_number += access_index.add_rows(batch)
+    return added_rows_number
+
+
+def clean_cached_assets(
+    cached_assets_directory: StrPath,
+    max_bytes: int,
+    max_measured_rows_number: int,
+    max_deleted_rows_number: int,
+    scan_interval_seconds: int,
+) -> None:
+    """
+    Evict the least recently accessed rows of the cached assets directory until its size fits in `max_bytes`.
+
+    The job is incremental, so that it can be run often: it measures the size of the rows directories that have been
+    created or accessed since the last run (max `max_measured_rows_number`), then deletes the least recently accessed
+    rows (max `max_deleted_rows_number`) if the total size of the rows exceeds `max_bytes`. The rows are read from the
+    access index, into which the job first merges the access logs written by the services. Every
+    `scan_interval_seconds`, the directory is scanned to add the rows directories that are missing from the index. The
+    result is stored in the cached assets directory, so that the services can report it.
+
+    Args:
+        cached_assets_directory (`StrPath`):
+            Directory containing the cached image and audio files
+        max_bytes (`int`):
+            Maximum total size of the rows directories, in bytes.
+        max_measured_rows_number (`int`):
+            Maximum number of rows directories to measure.
+        max_deleted_rows_number (`int`):
+            Maximum number of rows directories to delete.
+        scan_interval_seconds (`int`):
+            Minimum time between two scans of the directory.
+    """
+    logging.info("clean cached assets")
+    access_index = AssetsAccessIndex(cached_assets_directory)
+    merged_rows_number = access_index.merge_access_logs()
+    logging.info(f"merged the accesses to {merged_rows_number} rows from the access logs")
+
+    scanned_at = time.time()
+    last_scan_time = access_index.get_last_scan_time()
+    if last_scan_time is None or scanned_at - last_scan_time >= scan_interval_seconds:
+        added_rows_number = add_missing_rows(access_index, cached_assets_directory)
+        access_index.record_scan(scanned_at=scanned_at)
+        logging.info(f"scanned the directory, added {added_rows_number} missing rows directories to the index")
+
+    measured_rows_number = 0
+    while measured_rows_number < max_measured_rows_number:
+        measured_at = time.time()
+        row_keys = access_index.get_rows_to_measure(
+            max_rows_number=min(BATCH_SIZE, max_measured_rows_number - measured_rows_number)
+        )
+        if not row_keys:
+            break
+        row_dir_paths = {row_key: get_row_dir_path(cached_assets_directory, row_key) for row_key in row_keys}
+        # the rows directories that don't exist anymore (e.g. deleted manually) are removed from the index
+        access_index.delete_rows(
+            row_key for row_key, row_dir_path in row_dir_paths.items() if not row_dir_path.is_dir()
+        )
+        access_index.set_num_bytes(
+            (
+                (row_key, get_directory_num_bytes(row_dir_path))
+                for row_key, row_dir_path in row_dir_paths.items()
+                if row_dir_path.is_dir()
+            ),
+            measured_at=measured_at,
+        )
+        measured_rows_number += len(row_keys)
+    logging.info(f"measured the size of {measured_rows_number} rows directories")
+
+    num_bytes = access_index.get_num_bytes()
+    reclaimed_bytes = 0
+    deleted_rows_number = 0
+    while num_bytes - reclaimed_bytes > max_bytes and deleted_rows_number < max_deleted_rows_number:
+        rows = access_index.get_least_recently_accessed_rows(
+            max_rows_number=min(BATCH_SIZE, max_deleted_rows_number - deleted_rows_number)
+        )
+        if not rows:
+            break
+        deleted_row_keys = []
+        for row_key, row_num_bytes in rows:
+            if num_bytes - reclaimed_bytes <= max_bytes:
+                break
+            shutil.rmtree(get_row_dir_path(cached_assets_directory, row_key), ignore_errors=True)
+            deleted_row_keys.append(row_key)
+            reclaimed_bytes += row_num_bytes
+        access_index.delete_rows(deleted_row_keys)
+        deleted_rows_number += len(deleted_row_keys)
+    logging.info(
+        f"deleted {deleted_rows_number} rows directories, reclaimed {reclaimed_bytes} bytes. The rows directories"
+        f" now use {num_bytes - reclaimed_bytes} bytes (max: {max_bytes})."
+    )
+    record_cleaning(
+        cached_assets_directory,
+        num_bytes=num_bytes - reclaimed_bytes,
+        reclaimed_bytes=reclaimed_bytes,
+        deleted_rows_number=deleted_rows_number,
+    )
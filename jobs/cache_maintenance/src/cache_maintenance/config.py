@@ -7,6 +7,7 @@ from typing import List, Optional
 from environs import Env
 from libcommon.config import (
     CacheConfig,
+    CachedAssetsConfig,
     CommonConfig,
     LogConfig,
     ProcessingGraphConfig,
@@ -33,6 +34,7 @@ DUCKDB_INDEX_CACHE_DIRECTORY = None
 DUCKDB_INDEX_SUBDIRECTORY = "downloads"
 DUCKDB_INDEX_EXPIRED_TIME_INTERVAL_SECONDS = 10 * 60  # 10 minutes
 DUCKDB_INDEX_FILE_EXTENSION = ".duckdb"
+DUCKDB_INDEX_MAX_BYTES = None
 
 
 @dataclass(frozen=True)
@@ -41,6 +43,7 @@ class DuckDbConfig:
     subdirectory: str = DUCKDB_INDEX_SUBDIRECTORY
     expired_time_interval_seconds: int = DUCKDB_INDEX_EXPIRED_TIME_INTERVAL_SECONDS
     file_extension: str = DUCKDB_INDEX_FILE_EXTENSION
+    max_bytes: Optional[int] = DUCKDB_INDEX_MAX_BYTES
 
     @classmethod
     def from_env(cls) -> "DuckDbConfig":
@@ -53,6 +56,38 @@ class DuckDbConfig:
                     name="EXPIRED_TIME_INTERVAL_SECONDS", default=DUCKDB_INDEX_EXPIRED_TIME_INTERVAL_SECONDS
                 ),
                 file_extension=env.str(name="FILE_EXTENSION", default=DUCKDB_INDEX_FILE_EXTENSION),
+                max_bytes=env.int(name="MAX_BYTES", default=DUCKDB_INDEX_MAX_BYTES),
+            )
+
+
+CLEAN_CACHED_ASSETS_MAX_BYTES = 100_000_000_000
+CLEAN_CACHED_ASSETS_MAX_MEASURED_ROWS_NUMBER = 100_000
+CLEAN_CACHED_ASSETS_MAX_DELETED_ROWS_NUMBER = 100_000
+CLEAN_CACHED_ASSETS_SCAN_INTERVAL_SECONDS = 86_400
+
+
+@dataclass(frozen=True)
+class CleanCachedAssetsConfig:
+    max_bytes: int = CLEAN_CACHED_ASSETS_MAX_BYTES
+    max_measured_rows_number: int = CLEAN_CACHED_ASSETS_MAX_MEASURED_ROWS_NUMBER
+    max_deleted_rows_number: int = CLEAN_CACHED_ASSETS_MAX_DELETED_ROWS_NUMBER
+    scan_interval_seconds: int = CLEAN_CACHED_ASSETS_SCAN_INTERVAL_SECONDS
+
+    @classmethod
+    def from_env(cls) -> "CleanCachedAssetsConfig":
+        env = Env(expand_vars=True)
+        with env.prefixed("CLEAN_CACHED_ASSETS_"):
+            return cls(
+                max_bytes=env.int(name="MAX_BYTES", default=CLEAN_CACHED_ASSETS_MAX_BYTES),
+                max_measured_rows_number=env.int(
+                    name="MAX_MEASURED_ROWS_NUMBER", default=CLEAN_CACHED_ASSETS_MAX_MEASURED_ROWS_NUMBER
+                ),
+                max_deleted_rows_number=env.int(
+                    name="MAX_DELETED_ROWS_NUMBER", default=CLEAN_CACHED_ASSETS_MAX_DELETED_ROWS_NUMBER
+                ),
+                scan_interval_seconds=env.int(
+                    name="SCAN_INTERVAL_SECONDS", default=CLEAN_CACHED_ASSETS_SCAN_INTERVAL_SECONDS
+                ),
             )
 
 
@@ -68,6 +103,8 @@ class JobConfig:
     graph: ProcessingGraphConfig = field(default_factory=ProcessingGraphConfig)
     backfill: BackfillConfig = field(default_factory=BackfillConfig)
     duckdb: DuckDbConfig = field(default_factory=DuckDbConfig)
+    cached_assets: CachedAssetsConfig = field(default_factory=CachedAssetsConfig)
+    clean_cached_assets: CleanCachedAssetsConfig = field(default_factory=CleanCachedAssetsConfig)
     action: Optional[str] = CACHE_MAINTENANCE_ACTION
 
     @classmethod
@@ -82,5 +119,7 @@ class JobConfig:
             graph=ProcessingGraphConfig.from_env(),
             backfill=BackfillConfig.from_env(),
             duckdb=DuckDbConfig.from_env(),
+            cached_assets=CachedAssetsConfig.from_env(),
+            clean_cached_assets=CleanCachedAssetsConfig.from_env(),
             action=env.str(name="CACHE_MAINTENANCE_ACTION", default=CACHE_MAINTENANCE_ACTION),
         )
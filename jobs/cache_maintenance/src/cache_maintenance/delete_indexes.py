@@ -4,21 +4,82 @@
 import glob
 import logging
 import os
-from datetime import datetime, timedelta
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
 
 from libcommon.storage import StrPath
+from libcommon.viewer_utils.access_index import IndexesAccessIndex
+
+
+class IndexFile(NamedTuple):
+    last_access: float
+    path: str
+    relative_path: str
+    num_bytes: int
 
 
 def delete_indexes(
-    duckdb_index_cache_directory: StrPath, subdirectory: str, file_extension: str, expired_time_interval_seconds: int
+    duckdb_index_cache_directory: StrPath,
+    subdirectory: str,
+    file_extension: str,
+    expired_time_interval_seconds: int,
+    max_bytes: Optional[int] = None,
 ) -> None:
+    """
+    Delete the index files downloaded by /search that have expired, and the least recently used ones above a budget.
+
+    The last access to the index files is read from the access index that /search updates on every request, and not
+    from the access time of the files, which is often not maintained by the filesystem. A file that is not in the
+    access index (e.g. its access has not been written yet) is considered to have been accessed when it was downloaded.
+
+    Args:
+        duckdb_index_cache_directory (`StrPath`):
+            Directory where the index files are downloaded.
+        subdirectory (`str`):
+            Subdirectory of the downloads.
+        file_extension (`str`):
+            Extension of the index files.
+        expired_time_interval_seconds (`int`):
+            Time after the last access after which an index file is deleted.
+        max_bytes (`int`, *optional*):
+            Maximum total size of the index files, in bytes. The least recently used files are deleted above it. If
+            None, the total size is not bounded.
+    """
     logging.info("delete indexes")
-    indexes_folder = f"{duckdb_index_cache_directory}/{subdirectory}/**/*{file_extension}"
+    indexes_directory = Path(duckdb_index_cache_directory) / subdirectory
+    access_index = IndexesAccessIndex(indexes_directory, flush_interval_seconds=0)
+    last_accesses = access_index.get_last_accesses()
+    indexes_folder = f"{indexes_directory}/**/*{file_extension}"
     logging.info(f"looking for all files with pattern {indexes_folder}")
-    now = datetime.now().replace(tzinfo=None)
+    index_files: List[IndexFile] = []
     for path in glob.glob(indexes_folder, recursive=True):
-        last_access_time_value = os.path.getatime(path)
-        last_access_datetime = datetime.fromtimestamp(last_access_time_value).replace(tzinfo=None)
-        if last_access_datetime + timedelta(seconds=expired_time_interval_seconds) <= now:
-            logging.info(f"deleting file {path=} {last_access_datetime=}")
-            os.remove(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        relative_path = access_index.get_relative_path(path)
+        last_access = max(last_accesses.get(relative_path, 0.0), stat.st_mtime)
+        index_files.append(
+            IndexFile(last_access=last_access, path=path, relative_path=relative_path, num_bytes=stat.st_size)
+        )
+
+    now = time.time()
+    num_bytes = sum(index_file.num_bytes for index_file in index_files)
+    deleted_relative_paths = set(last_accesses) - {index_file.relative_path for index_file in index_files}
+    # ^ the files that have been deleted by other means are also removed from the access index
+    for index_file in sorted(index_files):
+        is_expired = index_file.last_access + expired_time_interval_seconds <= now
+        is_over_budget = max_bytes is not None and num_bytes > max_bytes
+        if not is_expired and not is_over_budget:
+            # the next files have been accessed more recently
+            break
+        logging.info(f"deleting file {index_file.path=} {index_file.last_access=} {is_expired=} {is_over_budget=}")
+        try:
+            os.remove(index_file.path)
+        except FileNotFoundError:
+            pass
+        num_bytes -= index_file.num_bytes
+        deleted_relative_paths.add(index_file.relative_path)
+    access_index.delete_files(deleted_relative_paths)
+    logging.info(f"the index files now use {num_bytes} bytes (max: {max_bytes})")
@@ -8,10 +8,11 @@ from datetime import datetime
 from libcommon.log import init_logging
 from libcommon.processing_graph import ProcessingGraph
 from libcommon.resources import CacheMongoResource, QueueMongoResource
-from libcommon.storage import init_duckdb_index_cache_dir
+from libcommon.storage import init_cached_assets_dir, init_duckdb_index_cache_dir
 
 from cache_maintenance.backfill import backfill_cache
 from cache_maintenance.cache_metrics import collect_cache_metrics
+from cache_maintenance.clean_cached_assets import clean_cached_assets
 from cache_maintenance.config import JobConfig
 from cache_maintenance.delete_indexes import delete_indexes
 from cache_maintenance.queue_metrics import collect_queue_metrics
@@ -20,7 +21,14 @@ from cache_maintenance.queue_metrics import collect_queue_metrics
 def run_job() -> None:
     job_config = JobConfig.from_env()
     action = job_config.action
-    supported_actions = ["backfill", "collect-cache-metrics", "collect-queue-metrics", "delete-indexes", "skip"]
+    supported_actions = [
+        "backfill",
+        "clean-cached-assets",
+        "collect-cache-metrics",
+        "collect-queue-metrics",
+        "delete-indexes",
+        "skip",
+    ]
     #  In the future we will support other kind of actions
     if not action:
         logging.warning("No action mode was selected, skipping tasks.")
@@ -66,6 +74,16 @@ def run_job() -> None:
                 subdirectory=job_config.duckdb.subdirectory,
                 expired_time_interval_seconds=job_config.duckdb.expired_time_interval_seconds,
                 file_extension=job_config.duckdb.file_extension,
+                max_bytes=job_config.duckdb.max_bytes,
+            )
+        elif action == "clean-cached-assets":
+            cached_assets_directory = init_cached_assets_dir(directory=job_config.cached_assets.storage_directory)
+            clean_cached_assets(
+                cached_assets_directory=cached_assets_directory,
+                max_bytes=job_config.clean_cached_assets.max_bytes,
+                max_measured_rows_number=job_config.clean_cached_assets.max_measured_rows_number,
+                max_deleted_rows_number=job_config.clean_cached_assets.max_deleted_rows_number,
+                scan_interval_seconds=job_config.clean_cached_assets.scan_interval_seconds,
             )
 
         end_time = datetime.now()
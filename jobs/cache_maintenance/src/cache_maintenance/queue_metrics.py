@@ -4,7 +4,7 @@
 import logging
 
 from libcommon.processing_graph import ProcessingGraph
-from libcommon.queue import JobTotalMetricDocument, Queue
+from libcommon.queue import JobTotalMetricDocument, Queue, StartedJobsTotalDocument
 
 
 def collect_queue_metrics(processing_graph: ProcessingGraph) -> None:
@@ -15,4 +15,23 @@ def collect_queue_metrics(processing_graph: ProcessingGraph) -> None:
             JobTotalMetricDocument.objects(job_type=processing_step.job_type, status=status).upsert_one(
                 total=new_total
             )
+    # reconcile the started jobs totals, that could drift if a process dies between updating a job and its total.
+    # The workers update the totals concurrently: a total is only replaced if it has not changed since it was read,
+    # before counting the started jobs. Otherwise, it will be reconciled on the next run.
+    started_jobs_totals = {
+        started_jobs_total.namespace: started_jobs_total.total
+        for started_jobs_total in StartedJobsTotalDocument.objects().only("namespace", "total")
+    }
+    started_jobs_count_by_namespace = queue.get_started_jobs_count_by_namespace()
+    for namespace in started_jobs_totals.keys() | started_jobs_count_by_namespace.keys():
+        old_total = started_jobs_totals.get(namespace)
+        new_total = started_jobs_count_by_namespace.get(namespace, 0)
+        if old_total == new_total:
+            continue
+        if old_total is None:
+            StartedJobsTotalDocument.objects(namespace=namespace).update_one(
+                upsert=True, set_on_insert__total=new_total
+            )
+        else:
+            StartedJobsTotalDocument.objects(namespace=namespace, total=old_total).update_one(total=new_total)
     logging.info("queue metrics have been collected")
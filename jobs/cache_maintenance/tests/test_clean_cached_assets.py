@@ -0,0 +1,145 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import os
+import time
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+import pytest
+from libcommon.viewer_utils.access_index import (
+    AssetsAccessIndex,
+    AssetsAccessLog,
+    get_last_cleaning,
+)
+
+from cache_maintenance.clean_cached_assets import clean_cached_assets
+
+
+@pytest.mark.parametrize(
+    "max_bytes,max_deleted_rows_number,expected_remaining_rows",
+    [
+        (8_000, 100, [0, 1, 2, 3, 4, 5, 6, 7]),
+        (5_000, 100, [3, 4, 5, 6, 7]),
+        (4_500, 100, [4, 5, 6, 7]),
+        (0, 100, []),
+        (0, 2, [2, 3, 4, 5, 6, 7]),
+    ],
+)
+def test_clean_cached_assets(
+    tmp_path: Path, max_bytes: int, max_deleted_rows_number: int, expected_remaining_rows: List[int]
+) -> None:
+    cached_assets_directory = tmp_path / "cached-assets"
+    split_dir = cached_assets_directory / "ds/--/default/train"
+    cached_assets_directory.mkdir()
+    access_index = AssetsAccessIndex(cached_assets_directory)
+    n_rows = 8
+    for row_idx in range(n_rows):
+        (split_dir / str(row_idx) / "image").mkdir(parents=True)
+        (split_dir / str(row_idx) / "image" / "image.jpg").write_bytes(b"\0" * 1_000)
+        # the rows are accessed in order
+        access_index.add_accesses([(("ds", "default", "train", row_idx), float(row_idx))])
+
+    clean_cached_assets(
+        cached_assets_directory=cached_assets_directory,
+        max_bytes=max_bytes,
+        max_measured_rows_number=100,
+        max_deleted_rows_number=max_deleted_rows_number,
+        scan_interval_seconds=3_600,
+    )
+
+    remaining_rows = sorted(int(row_dir.name) for row_dir in split_dir.glob("*"))
+    assert remaining_rows == expected_remaining_rows
+    assert access_index.get_num_bytes() == 1_000 * len(expected_remaining_rows)
+    last_cleaning = get_last_cleaning(cached_assets_directory)
+    assert last_cleaning is not None
+    assert last_cleaning["num_bytes"] == 1_000 * len(expected_remaining_rows)
+    assert last_cleaning["reclaimed_bytes"] == 1_000 * (n_rows - len(expected_remaining_rows))
+    assert last_cleaning["deleted_rows_number"] == n_rows - len(expected_remaining_rows)
+
+
+def test_clean_cached_assets_is_incremental(tmp_path: Path) -> None:
+    access_index = AssetsAccessIndex(tmp_path)
+    access_index.add_accesses([(("ds", "default", "train", row_idx), 1.0) for row_idx in range(5)])
+    clean_cached_assets(
+        cached_assets_directory=tmp_path,
+        max_bytes=0,
+        max_measured_rows_number=3,
+        max_deleted_rows_number=100,
+        scan_interval_seconds=3_600,
+    )
+    # the rows directories don't exist: the rows are removed from the index
+    assert len(access_index.get_rows_to_measure(max_rows_number=10)) == 2
+    clean_cached_assets(
+        cached_assets_directory=tmp_path,
+        max_bytes=0,
+        max_measured_rows_number=3,
+        max_deleted_rows_number=100,
+        scan_interval_seconds=3_600,
+    )
+    assert access_index.get_rows_to_measure(max_rows_number=10) == []
+    assert access_index.get_least_recently_accessed_rows(max_rows_number=10) == []
+
+
+def test_clean_cached_assets_untracked_and_grown_rows(tmp_path: Path) -> None:
+    access_index = AssetsAccessIndex(tmp_path)
+    split_dir = tmp_path / "user/ds/--/default/train"
+    # rows directories created before the access index, or whose accesses have not been written
+    for row_idx in range(3):
+        (split_dir / str(row_idx)).mkdir(parents=True)
+        (split_dir / str(row_idx) / "image.jpg").write_bytes(b"\0" * 1_000)
+        os.utime(split_dir / str(row_idx), (row_idx, row_idx))
+    # a tracked row, that has been accessed recently
+    (split_dir / "3").mkdir()
+    (split_dir / "3" / "image.jpg").write_bytes(b"\0" * 1_000)
+    access_index.add_accesses([(("user/ds", "default", "train", 3), time.time())])
+
+    def clean(max_bytes: int) -> None:
+        clean_cached_assets(
+            cached_assets_directory=tmp_path,
+            max_bytes=max_bytes,
+            max_measured_rows_number=100,
+            max_deleted_rows_number=100,
+            scan_interval_seconds=3_600,
+        )
+
+    clean(max_bytes=3_000)
+    # the untracked rows are counted, and the oldest one is deleted
+    assert sorted(row_dir.name for row_dir in split_dir.iterdir()) == ["1", "2", "3"]
+    assert access_index.get_num_bytes() == 3_000
+
+    # the accessed row grows: it is measured again
+    (split_dir / "3" / "audio.wav").write_bytes(b"\0" * 1_000)
+    access_index.add_accesses([(("user/ds", "default", "train", 3), time.time())])
+    clean(max_bytes=3_000)
+    assert sorted(row_dir.name for row_dir in split_dir.iterdir()) == ["2", "3"]
+    assert access_index.get_num_bytes() == 3_000
+
+    # the directory is not scanned again before the interval
+    (split_dir / "4").mkdir()
+    clean(max_bytes=3_000)
+    assert access_index.get_rows_to_measure(max_rows_number=10) == []
+
+
+def test_clean_cached_assets_merges_the_access_logs(tmp_path: Path) -> None:
+    split_dir = tmp_path / "ds/--/default/train"
+    for row_idx in range(2):
+        (split_dir / str(row_idx)).mkdir(parents=True)
+        (split_dir / str(row_idx) / "image.jpg").write_bytes(b"\0" * 1_000)
+    # the row 0 is accessed after the row 1
+    access_log = AssetsAccessLog(tmp_path, flush_interval_seconds=0)
+    with patch("libcommon.viewer_utils.access_index.time.time", return_value=2.0):
+        access_log.record_access(dataset="ds", config="default", split="train", row_indices=[0])
+    with patch("libcommon.viewer_utils.access_index.time.time", return_value=1.0):
+        access_log.record_access(dataset="ds", config="default", split="train", row_indices=[1])
+
+    clean_cached_assets(
+        cached_assets_directory=tmp_path,
+        max_bytes=1_000,
+        max_measured_rows_number=100,
+        max_deleted_rows_number=100,
+        scan_interval_seconds=3_600,
+    )
+    assert sorted(row_dir.name for row_dir in split_dir.iterdir()) == ["0"]
+    assert not any(access_log.directory.iterdir())
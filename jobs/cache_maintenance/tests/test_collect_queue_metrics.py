@@ -1,8 +1,16 @@
 # SPDX-License-Identifier: Apache-2.0
 # Copyright 2023 The HuggingFace Authors.
 
+from typing import Dict
+from unittest.mock import patch
+
 from libcommon.processing_graph import ProcessingGraph
-from libcommon.queue import JobTotalMetricDocument, Queue
+from libcommon.queue import (
+    JobTotalMetricDocument,
+    Queue,
+    StartedJobsTotalDocument,
+    increase_started_jobs_total,
+)
 from libcommon.utils import Status
 
 from cache_maintenance.queue_metrics import collect_queue_metrics
@@ -37,3 +45,51 @@ def test_collect_queue_metrics() -> None:
     remaining_status = [job for job in job_metrics if job.status != "waiting"]
     assert remaining_status
     assert all(job.total == 0 for job in remaining_status)
+
+
+def test_collect_queue_metrics_reconciles_started_jobs_totals() -> None:
+    processing_graph = ProcessingGraph(
+        processing_graph_specification={"test_type": {"input_type": "dataset", "job_runner_version": 1}}
+    )
+    queue = Queue()
+    queue.add_job(job_type="test_type", dataset="org/dataset", revision="revision", difficulty=50)
+    queue.start_job()
+    # the totals have drifted, e.g. because a worker died between starting a job and increasing the total
+    StartedJobsTotalDocument.objects(namespace="org").update(total=3)
+    StartedJobsTotalDocument(namespace="other_org", total=1).save()
+
+    collect_queue_metrics(processing_graph=processing_graph)
+
+    assert {total.namespace: total.total for total in StartedJobsTotalDocument.objects()} == {
+        "org": 1,
+        "other_org": 0,
+    }
+
+
+def test_collect_queue_metrics_keeps_concurrent_started_jobs_totals_updates() -> None:
+    processing_graph = ProcessingGraph(
+        processing_graph_specification={"test_type": {"input_type": "dataset", "job_runner_version": 1}}
+    )
+    queue = Queue()
+    queue.add_job(job_type="test_type", dataset="org/dataset", revision="revision", difficulty=50)
+    queue.add_job(job_type="test_type", dataset="new_org/dataset", revision="revision", difficulty=50)
+    queue.start_job()
+    queue.start_job()
+    StartedJobsTotalDocument.objects(namespace="org").update(total=3)
+    StartedJobsTotalDocument.objects(namespace="new_org").delete()
+    get_started_jobs_count_by_namespace = queue.get_started_jobs_count_by_namespace
+
+    def start_job_while_counting(self: Queue) -> Dict[str, int]:
+        started_jobs_count_by_namespace = get_started_jobs_count_by_namespace()
+        # a worker starts a job of the namespace after the totals have been read
+        increase_started_jobs_total(namespace="org")
+        return started_jobs_count_by_namespace
+
+    with patch.object(Queue, "get_started_jobs_count_by_namespace", start_job_while_counting):
+        collect_queue_metrics(processing_graph=processing_graph)
+
+    # the concurrent update is not overwritten: the total will be reconciled on the next run
+    assert {total.namespace: total.total for total in StartedJobsTotalDocument.objects()} == {
+        "org": 4,
+        "new_org": 1,
+    }
@@ -5,11 +5,13 @@ import os
 import time
 from pathlib import Path
 
+from libcommon.viewer_utils.access_index import IndexesAccessIndex
+
 from cache_maintenance.delete_indexes import delete_indexes
 
 
-def test_delete_indexes() -> None:
-    duckdb_index_cache_directory = "/tmp"
+def test_delete_indexes(tmp_path: Path) -> None:
+    duckdb_index_cache_directory = str(tmp_path)
     subdirectory = "download"
     file_extension = ".duckdb"
     expired_time_interval_seconds = 2
@@ -31,4 +33,33 @@ def test_delete_indexes() -> None:
     delete_indexes(duckdb_index_cache_directory, subdirectory, file_extension, expired_time_interval_seconds)
     assert not index_file.is_file()
 
-    os.rmdir(f"{duckdb_index_cache_directory}/{subdirectory}")
+
+def test_delete_indexes_with_max_bytes(tmp_path: Path) -> None:
+    indexes_directory = tmp_path / "downloads"
+    index_files = {
+        name: indexes_directory / f"{name}-0123" / "config" / "split" / "index.duckdb"
+        for name in ["old", "recent", "popular"]
+    }
+    for index_file in index_files.values():
+        index_file.parent.mkdir(parents=True)
+        index_file.write_bytes(b"0" * 100)
+    # the files have been downloaded one hour ago, and the access time of the files is not reliable
+    one_hour_ago = time.time() - 3_600
+    for index_file in index_files.values():
+        os.utime(index_file, (one_hour_ago, one_hour_ago))
+    access_index = IndexesAccessIndex(indexes_directory, flush_interval_seconds=100)
+    access_index.record_access(index_files["recent"])
+    access_index.record_access(index_files["popular"])
+    access_index.record_access(index_files["popular"])
+    access_index.flush()
+
+    delete_indexes(tmp_path, "downloads", ".duckdb", expired_time_interval_seconds=24 * 3_600, max_bytes=250)
+    # the least recently used index is deleted to fit in the budget
+    assert not index_files["old"].exists()
+    assert index_files["recent"].exists()
+    assert index_files["popular"].exists()
+
+    delete_indexes(tmp_path, "downloads", ".duckdb", expired_time_interval_seconds=24 * 3_600, max_bytes=100)
+    assert not index_files["recent"].exists()
+    assert index_files["popular"].exists()
+    assert list(access_index.get_last_accesses()) == ["popular-0123/config/split/index.duckdb"]
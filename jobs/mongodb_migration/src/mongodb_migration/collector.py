@@ -60,6 +60,9 @@ from mongodb_migration.migrations._20230703110100_cache_add_partial_field_in_con
 from mongodb_migration.migrations._20230705160600_queue_job_add_difficulty import (
     MigrationQueueAddDifficultyToJob,
 )
+from mongodb_migration.migrations._20230824100000_queue_job_cancel_duplicate_started_jobs import (
+    MigrationQueueCancelDuplicateStartedJobs,
+)
 from mongodb_migration.renaming_migrations import (
     CacheRenamingMigration,
     QueueRenamingMigration,
@@ -264,4 +267,7 @@ class MigrationsCollector:
                 alias=METRICS_MONGOENGINE_ALIAS,
                 collection_name=QUEUE_METRICS_COLLECTION,
             ),
+            MigrationQueueCancelDuplicateStartedJobs(
+                version="20230824100000", description="cancel the duplicate started jobs of a unicity_id"
+            ),
         ]
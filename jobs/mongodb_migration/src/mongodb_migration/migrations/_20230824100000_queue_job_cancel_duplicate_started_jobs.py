@@ -0,0 +1,47 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import logging
+from typing import Any, Iterator, Mapping
+
+from libcommon.constants import QUEUE_COLLECTION_JOBS, QUEUE_MONGOENGINE_ALIAS
+from libcommon.utils import Status, get_datetime
+from mongoengine.connection import get_db
+
+from mongodb_migration.migration import IrreversibleMigrationError, Migration
+
+
+def get_duplicate_started_jobs() -> Iterator[Mapping[str, Any]]:
+    db = get_db(QUEUE_MONGOENGINE_ALIAS)
+    return db[QUEUE_COLLECTION_JOBS].aggregate(
+        [
+            {"$match": {"status": Status.STARTED.value}},
+            {"$sort": {"started_at": 1}},
+            {"$group": {"_id": "$unicity_id", "job_ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ]
+    )
+
+
+# connection already occurred in the main.py (caveat: we use globals)
+class MigrationQueueCancelDuplicateStartedJobs(Migration):
+    def up(self) -> None:
+        logging.info(
+            "Cancel the started jobs that share their unicity_id with an older started job, before the unique index on"
+            " the unicity_id of the started jobs is created"
+        )
+        db = get_db(QUEUE_MONGOENGINE_ALIAS)
+        for duplicate in get_duplicate_started_jobs():
+            db[QUEUE_COLLECTION_JOBS].update_many(
+                {"_id": {"$in": duplicate["job_ids"][1:]}, "status": Status.STARTED.value},
+                {"$set": {"status": Status.CANCELLED.value, "finished_at": get_datetime()}},
+            )
+
+    def down(self) -> None:
+        raise IrreversibleMigrationError("This migration does not support rollback")
+
+    def validate(self) -> None:
+        logging.info("Ensure that no unicity_id has more than one started job")
+
+        if any(True for _ in get_duplicate_started_jobs()):
+            raise ValueError("Some unicity_ids still have more than one started job")
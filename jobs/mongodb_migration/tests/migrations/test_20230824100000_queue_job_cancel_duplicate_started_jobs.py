@@ -0,0 +1,53 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+from libcommon.constants import QUEUE_COLLECTION_JOBS, QUEUE_MONGOENGINE_ALIAS
+from libcommon.resources import MongoResource
+from mongoengine.connection import get_db
+from pytest import raises
+
+from mongodb_migration.migration import IrreversibleMigrationError
+from mongodb_migration.migrations._20230824100000_queue_job_cancel_duplicate_started_jobs import (
+    MigrationQueueCancelDuplicateStartedJobs,
+)
+
+
+def test_queue_cancel_duplicate_started_jobs(mongo_host: str) -> None:
+    with MongoResource(
+        database="test_queue_cancel_duplicate_started_jobs", host=mongo_host, mongoengine_alias="queue"
+    ):
+        db = get_db(QUEUE_MONGOENGINE_ALIAS)
+        db[QUEUE_COLLECTION_JOBS].insert_many(
+            [
+                {"_id": f"{unicity_id}_{status}_{started_at}", "unicity_id": unicity_id, "status": status}
+                | ({} if started_at is None else {"started_at": started_at})
+                for unicity_id, status, started_at in [
+                    ("a", "started", "2022-01-02"),
+                    ("a", "started", "2022-01-01"),
+                    ("a", "waiting", None),
+                    ("b", "started", "2022-01-01"),
+                    ("b", "success", "2022-01-01"),
+                ]
+            ]
+        )
+
+        migration = MigrationQueueCancelDuplicateStartedJobs(
+            version="20230824100000",
+            description="cancel the duplicate started jobs of a unicity_id",
+        )
+        migration.up()
+
+        # the oldest started job of every unicity_id is kept
+        assert {job["_id"]: job["status"] for job in db[QUEUE_COLLECTION_JOBS].find()} == {
+            "a_started_2022-01-02": "cancelled",
+            "a_started_2022-01-01": "started",
+            "a_waiting_None": "waiting",
+            "b_started_2022-01-01": "started",
+            "b_success_2022-01-01": "success",
+        }
+        migration.validate()
+
+        with raises(IrreversibleMigrationError):
+            migration.down()
+
+        db[QUEUE_COLLECTION_JOBS].drop()
@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+"""Benchmark the fast path of to_rows_list, on a text-only table.
+
+The fast path (the rows are built from pa.Table.to_pylist, without looking at every cell) is compared to the
+transformation of every cell (transform_rows), which is needed only when the table has assets (images, audio). Both
+must return the same rows. Run it from libs/libapi:
+
+    poetry run python benchmarks/to_rows_list.py
+"""
+
+import argparse
+import tempfile
+import timeit
+from typing import List
+
+import pyarrow as pa
+from datasets import Features, Sequence, Value
+from libcommon.rows_utils import transform_rows
+from libcommon.utils import Row
+
+from libapi.utils import to_rows_list
+
+FEATURES = Features(
+    {
+        "text": Value("string"),
+        "label": Value("int64"),
+        "tokens": Sequence(Value("string")),
+        "meta": {"a": Value("int64"), "b": Value("string")},
+    }
+)
+CACHED_ASSETS_BASE_URL = "http://localhost/cached-assets"
+
+
+def get_text_table(num_rows: int) -> pa.Table:
+    return pa.table(
+        {
+            "text": [f"text {i}" for i in range(num_rows)],
+            "label": list(range(num_rows)),
+            "tokens": [[str(j) for j in range(i % 5)] for i in range(num_rows)],
+            "meta": [{"a": i, "b": None} for i in range(num_rows)],
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-rows", type=int, nargs="+", default=[100, 1_000, 5_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as cached_assets_directory:
+        for num_rows in args.num_rows:
+            pa_table = get_text_table(num_rows)
+
+            def transform() -> List[Row]:
+                return transform_rows(
+                    dataset="ds",
+                    config="default",
+                    split="train",
+                    rows=pa_table.to_pylist(),
+                    features=FEATURES,
+                    cached_assets_base_url=CACHED_ASSETS_BASE_URL,
+                    cached_assets_directory=cached_assets_directory,
+                    offset=0,
+                    row_idx_column=None,
+                )
+
+            def fast_path() -> List[Row]:
+                return [
+                    row_item["row"]
+                    for row_item in to_rows_list(
+                        pa_table,
+                        "ds",
+                        "default",
+                        "train",
+                        cached_assets_base_url=CACHED_ASSETS_BASE_URL,
+                        cached_assets_directory=cached_assets_directory,
+                        offset=0,
+                        features=FEATURES,
+                        unsupported_columns=[],
+                    )
+                ]
+
+            if fast_path() != transform():
+                raise RuntimeError("the fast path does not return the same rows as transform_rows")
+            transform_seconds = min(timeit.repeat(transform, number=1, repeat=args.repeat))
+            fast_path_seconds = min(timeit.repeat(fast_path, number=1, repeat=args.repeat))
+            print(
+                f"{num_rows=:>6}: transform_rows {transform_seconds * 1_000:.1f} ms, fast path"
+                f" {fast_path_seconds * 1_000:.1f} ms ({transform_seconds / fast_path_seconds:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,10 @@
 # Copyright 2023 The HuggingFace Authors.
 
 import logging
+from typing import Optional
 
-from libcommon.prometheus import Prometheus
+from libcommon.prometheus import Prometheus, update_cached_assets_disk_usage
+from libcommon.storage import StrPath
 from prometheus_client import CONTENT_TYPE_LATEST
 from starlette.requests import Request
 from starlette.responses import Response
@@ -11,11 +13,13 @@ from starlette.responses import Response
 from libapi.utils import Endpoint
 
 
-def create_metrics_endpoint() -> Endpoint:
+def create_metrics_endpoint(cached_assets_directory: Optional[StrPath] = None) -> Endpoint:
     prometheus = Prometheus()
 
     async def metrics_endpoint(_: Request) -> Response:
         logging.info("/metrics")
+        if cached_assets_directory is not None:
+            update_cached_assets_disk_usage(directory=cached_assets_directory)
         return Response(prometheus.getLatestContent(), headers={"Content-Type": CONTENT_TYPE_LATEST})
 
     return metrics_endpoint
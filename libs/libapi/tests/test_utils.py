@@ -1,57 +1,127 @@
 # SPDX-License-Identifier: Apache-2.0
 # Copyright 2023 The HuggingFace Authors.
 
-import os
-import time
+from io import BytesIO
 from pathlib import Path
-from typing import List
 from unittest.mock import patch
 
-import pytest
-from libcommon.storage import StrPath
+import pyarrow as pa
+from datasets import Features, Image, Sequence, Value
+from libcommon.rows_utils import transform_rows
+from PIL import Image as PILImage  # type: ignore
 
-from libapi.utils import clean_cached_assets
+from libapi.utils import to_rows_list
 
-
-@pytest.mark.parametrize(
-    "n_rows,keep_most_recent_rows_number,keep_first_rows_number,max_cleaned_rows_number,expected_remaining_rows",
-    [
-        (8, 1, 1, 100, [0, 7]),
-        (8, 2, 2, 100, [0, 1, 6, 7]),
-        (8, 1, 1, 3, [0, 4, 5, 6, 7]),
-    ],
+TEXT_FEATURES = Features(
+    {
+        "text": Value("string"),
+        "label": Value("int64"),
+        "tokens": Sequence(Value("string")),
+        "meta": {"a": Value("int64"), "b": Value("string")},
+        "unsupported": Value("binary"),
+    }
 )
-def test_clean_cached_assets(
-    tmp_path: Path,
-    n_rows: int,
-    keep_most_recent_rows_number: int,
-    keep_first_rows_number: int,
-    max_cleaned_rows_number: int,
-    expected_remaining_rows: list[int],
-) -> None:
-    cached_assets_directory = tmp_path / "cached-assets"
-    split_dir = cached_assets_directory / "ds/--/plain_text/train"
-    split_dir.mkdir(parents=True)
-    for i in range(n_rows):
-        (split_dir / str(i)).mkdir()
-        time.sleep(0.01)
-
-    def deterministic_glob_rows_in_assets_dir(
-        dataset: str,
-        assets_directory: StrPath,
-    ) -> List[Path]:
-        return sorted(
-            list(Path(assets_directory).resolve().glob(os.path.join(dataset, "--", "*", "*", "*"))),
-            key=lambda p: int(p.name),
+
+
+def get_text_table(num_rows: int) -> pa.Table:
+    return pa.table(
+        {
+            "text": [f"text {i}" for i in range(num_rows)],
+            "label": list(range(num_rows)),
+            "tokens": [[str(j) for j in range(i % 5)] for i in range(num_rows)],
+            "meta": [{"a": i, "b": None} for i in range(num_rows)],
+        }
+    )
+
+
+def test_to_rows_list_without_assets(tmp_path: Path) -> None:
+    pa_table = get_text_table(3)
+    with patch("libapi.utils.transform_rows") as mock_transform_rows:
+        rows = to_rows_list(
+            pa_table,
+            "ds",
+            "default",
+            "train",
+            cached_assets_base_url="http://localhost/cached-assets",
+            cached_assets_directory=tmp_path,
+            offset=10,
+            features=TEXT_FEATURES,
+            unsupported_columns=["unsupported"],
         )
+    mock_transform_rows.assert_not_called()
+    assert rows == [
+        {
+            "row_idx": 10 + idx,
+            "row": {
+                "text": f"text {idx}",
+                "label": idx,
+                "tokens": [str(j) for j in range(idx)],
+                "meta": {"a": idx, "b": None},
+                "unsupported": None,
+            },
+            "truncated_cells": [],
+        }
+        for idx in range(3)
+    ]
+
+
+def test_to_rows_list_with_assets(tmp_path: Path) -> None:
+    buffer = BytesIO()
+    PILImage.new("RGB", (2, 3)).save(buffer, format="PNG")
+    pa_table = pa.table({"image": [{"bytes": buffer.getvalue(), "path": None}], "label": [0]})
+    rows = to_rows_list(
+        pa_table,
+        "ds",
+        "default",
+        "train",
+        cached_assets_base_url="http://localhost/cached-assets",
+        cached_assets_directory=tmp_path,
+        offset=0,
+        features=Features({"image": Image(), "label": Value("int64")}),
+        unsupported_columns=[],
+    )
+    assert rows == [
+        {
+            "row_idx": 0,
+            "row": {
+                "image": {
+                    "src": "http://localhost/cached-assets/ds/--/default/train/0/image/image.jpg",
+                    "height": 3,
+                    "width": 2,
+                },
+                "label": 0,
+            },
+            "truncated_cells": [],
+        }
+    ]
+
 
-    with patch("libapi.utils.glob_rows_in_assets_dir", deterministic_glob_rows_in_assets_dir):
-        clean_cached_assets(
+def test_to_rows_list_fast_path(tmp_path: Path) -> None:
+    # on a text-only table, the fast path returns the same rows as the transformation of every cell
+    pa_table = get_text_table(100)
+    features = Features({column: feature for column, feature in TEXT_FEATURES.items() if column != "unsupported"})
+    expected_rows = transform_rows(
+        dataset="ds",
+        config="default",
+        split="train",
+        rows=pa_table.to_pylist(),
+        features=features,
+        cached_assets_base_url="http://localhost/cached-assets",
+        cached_assets_directory=tmp_path,
+        offset=0,
+        row_idx_column=None,
+    )
+    with patch("libcommon.rows_utils.get_cell_value") as mock_get_cell_value:
+        rows = to_rows_list(
+            pa_table,
             "ds",
-            cached_assets_directory,
-            keep_most_recent_rows_number=keep_most_recent_rows_number,
-            keep_first_rows_number=keep_first_rows_number,
-            max_cleaned_rows_number=max_cleaned_rows_number,
+            "default",
+            "train",
+            cached_assets_base_url="http://localhost/cached-assets",
+            cached_assets_directory=tmp_path,
+            offset=0,
+            features=features,
+            unsupported_columns=[],
         )
-    remaining_rows = sorted(int(row_dir.name) for row_dir in split_dir.glob("*"))
-    assert remaining_rows == expected_remaining_rows
+    mock_get_cell_value.assert_not_called()
+    assert [item["row"] for item in rows] == expected_rows
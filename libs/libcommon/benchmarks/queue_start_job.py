@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+"""Benchmark the throughput of the job claims, with 10, 100 and 500 simulated workers (threads).
+
+The current claim (an atomic find_one_and_update, made exclusive by the unique partial index on the unicity_id of the
+started jobs) is compared to the previous one (a lock on the unicity_id, then one query per job to start or cancel).
+
+It needs a real MongoDB (mongomock does not make the updates atomic across threads), and deletes the jobs of the
+database. Run it from libs/libcommon:
+
+    QUEUE_MONGO_URL=mongodb://localhost:27017 poetry run python benchmarks/queue_start_job.py
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Type
+from uuid import uuid4
+
+from libcommon.queue import (
+    AlreadyStartedJobError,
+    EmptyQueueError,
+    JobDocument,
+    LockTimeoutError,
+    NoWaitingJobError,
+    Queue,
+    StartedJobsTotalDocument,
+    increase_started_jobs_total,
+    lock,
+)
+from libcommon.resources import QueueMongoResource
+from libcommon.utils import Priority, Status, get_datetime
+
+NUM_UNICITY_IDS = 200
+NUM_NAMESPACES = 20
+
+
+class LockQueue(Queue):
+    """The previous claim strategy, for comparison."""
+
+    def _start_newest_job_and_cancel_others(self, job: JobDocument) -> JobDocument:
+        RETRIES = 20
+        try:
+            with lock(key=job.unicity_id, owner=str(uuid4()), sleeps=[0.1] * RETRIES):
+                waiting_jobs = JobDocument.objects(
+                    unicity_id=job.unicity_id, status__in=[Status.WAITING, Status.STARTED]
+                ).order_by("-created_at")
+                datetime = get_datetime()
+                if waiting_jobs(status=Status.STARTED).count() > 0:
+                    raise AlreadyStartedJobError(f"job {job.unicity_id} has been started by another worker")
+                first_job = waiting_jobs.first()
+                if not first_job:
+                    raise NoWaitingJobError(f"no waiting job could be found for {job.unicity_id}")
+                first_job.update(started_at=datetime, status=Status.STARTED)
+                increase_started_jobs_total(namespace=first_job.namespace)
+                for other_job in waiting_jobs.skip(1):
+                    other_job.update(finished_at=datetime, status=Status.CANCELLED)
+                return first_job.reload()
+        except TimeoutError as err:
+            raise LockTimeoutError(f"could not acquire the lock for job {job.unicity_id}") from err
+
+
+def start_and_finish_jobs(queue: Queue) -> List[str]:
+    # a simulated worker: claim the jobs until the queue is empty
+    started_job_ids: List[str] = []
+    while True:
+        try:
+            job_info = queue.start_job()
+        except EmptyQueueError:
+            return started_job_ids
+        except (AlreadyStartedJobError, NoWaitingJobError, LockTimeoutError):
+            continue
+        started_job_ids.append(job_info["job_id"])
+        queue.finish_job(job_id=job_info["job_id"], is_success=True)
+
+
+def run(queue_class: Type[Queue], num_workers: int) -> float:
+    JobDocument.objects().delete()
+    StartedJobsTotalDocument.objects().delete()
+    queue = queue_class()
+    for _ in range(2):
+        # the older job of every unicity_id is cancelled when the newer one is started
+        queue.create_jobs(
+            [
+                {
+                    "job_id": "not used",
+                    "type": "test_type",
+                    "params": {
+                        "dataset": f"namespace_{i % NUM_NAMESPACES}/dataset_{i}",
+                        "revision": "r",
+                        "config": None,
+                        "split": None,
+                    },
+                    "priority": Priority.LOW,
+                    "difficulty": 50,
+                }
+                for i in range(NUM_UNICITY_IDS)
+            ]
+        )
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        started_job_ids = [
+            job_id for job_ids in executor.map(start_and_finish_jobs, [queue] * num_workers) for job_id in job_ids
+        ]
+    claims_per_second = len(started_job_ids) / (time.perf_counter() - start)
+    # every unicity_id has been started exactly once
+    if len(started_job_ids) != NUM_UNICITY_IDS:
+        raise RuntimeError(f"{len(started_job_ids)} jobs have been started, instead of {NUM_UNICITY_IDS}")
+    return claims_per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("QUEUE_MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="benchmark_queue_start_job")
+    parser.add_argument("--num-workers", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+    with QueueMongoResource(database=args.database, host=args.mongo_url):
+        for num_workers in args.num_workers:
+            for name, queue_class in [("atomic claim", Queue), ("lock", LockQueue)]:
+                claims_per_second = run(queue_class=queue_class, num_workers=num_workers)
+                print(f"{name:>12}, {num_workers=:>3}: {claims_per_second:.1f} claims per second")
+        JobDocument.objects().delete()
+        StartedJobsTotalDocument.objects().delete()
+
+
+if __name__ == "__main__":
+    main()
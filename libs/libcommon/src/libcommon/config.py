@@ -38,12 +38,14 @@ from libcommon.processing_graph import ProcessingGraphSpecification
 
 ASSETS_BASE_URL = "assets"
 ASSETS_STORAGE_DIRECTORY = None
+ASSETS_MAX_WORKERS = 4
 
 
 @dataclass(frozen=True)
 class AssetsConfig:
     base_url: str = ASSETS_BASE_URL
     storage_directory: Optional[str] = ASSETS_STORAGE_DIRECTORY
+    max_workers: int = ASSETS_MAX_WORKERS
 
     @classmethod
     def from_env(cls) -> "AssetsConfig":
@@ -52,25 +54,22 @@ class AssetsConfig:
             return cls(
                 base_url=env.str(name="BASE_URL", default=ASSETS_BASE_URL),
                 storage_directory=env.str(name="STORAGE_DIRECTORY", default=ASSETS_STORAGE_DIRECTORY),
+                max_workers=env.int(name="MAX_WORKERS", default=ASSETS_MAX_WORKERS),
             )
 
 
 CACHED_ASSETS_BASE_URL = "cached-assets"
 CACHED_ASSETS_STORAGE_DIRECTORY = None
-CACHED_ASSETS_CLEAN_CACHE_PROBA = 0.05
-CACHED_ASSETS_KEEP_FIRST_ROWS_NUMBER = 100
-CACHED_ASSETS_KEEP_MOST_RECENT_ROWS_NUMBER = 200
-CACHED_ASSETS_MAX_CLEANED_ROWS_NUMBER = 10_000
+CACHED_ASSETS_MAX_WORKERS = 8
+CACHED_ASSETS_ACCESS_INDEX_FLUSH_INTERVAL_SECONDS = 10.0
 
 
 @dataclass(frozen=True)
 class CachedAssetsConfig:
     base_url: str = ASSETS_BASE_URL
     storage_directory: Optional[str] = CACHED_ASSETS_STORAGE_DIRECTORY
-    clean_cache_proba: float = CACHED_ASSETS_CLEAN_CACHE_PROBA
-    keep_first_rows_number: int = CACHED_ASSETS_KEEP_FIRST_ROWS_NUMBER
-    keep_most_recent_rows_number: int = CACHED_ASSETS_KEEP_MOST_RECENT_ROWS_NUMBER
-    max_cleaned_rows_number: int = CACHED_ASSETS_MAX_CLEANED_ROWS_NUMBER
+    max_workers: int = CACHED_ASSETS_MAX_WORKERS
+    access_index_flush_interval_seconds: float = CACHED_ASSETS_ACCESS_INDEX_FLUSH_INTERVAL_SECONDS
 
     @classmethod
     def from_env(cls) -> "CachedAssetsConfig":
@@ -79,15 +78,10 @@ class CachedAssetsConfig:
             return cls(
                 base_url=env.str(name="BASE_URL", default=CACHED_ASSETS_BASE_URL),
                 storage_directory=env.str(name="STORAGE_DIRECTORY", default=CACHED_ASSETS_STORAGE_DIRECTORY),
-                clean_cache_proba=env.float(name="CLEAN_CACHE_PROBA", default=CACHED_ASSETS_CLEAN_CACHE_PROBA),
-                keep_first_rows_number=env.float(
-                    name="KEEP_FIRST_ROWS_NUMBER", default=CACHED_ASSETS_KEEP_FIRST_ROWS_NUMBER
-                ),
-                keep_most_recent_rows_number=env.float(
-                    name="KEEP_MOST_RECENT_ROWS_NUMBER", default=CACHED_ASSETS_KEEP_MOST_RECENT_ROWS_NUMBER
-                ),
-                max_cleaned_rows_number=env.float(
-                    name="MAX_CLEAN_SAMPLE_SIZE", default=CACHED_ASSETS_MAX_CLEANED_ROWS_NUMBER
+                max_workers=env.int(name="MAX_WORKERS", default=CACHED_ASSETS_MAX_WORKERS),
+                access_index_flush_interval_seconds=env.float(
+                    name="ACCESS_INDEX_FLUSH_INTERVAL_SECONDS",
+                    default=CACHED_ASSETS_ACCESS_INDEX_FLUSH_INTERVAL_SECONDS,
                 ),
             )
 
@@ -108,6 +102,43 @@ class ParquetMetadataConfig:
             )
 
 
+ROWS_INDEX_CACHE_MAX_BYTES = 200_000_000
+ROWS_INDEX_CACHE_MAX_COUNT = 100
+ROWS_INDEX_CACHE_TTL_SECONDS = 3_600
+ROWS_INDEX_ROW_GROUP_CACHE_MAX_BYTES = 500_000_000
+ROWS_INDEX_SHARED_ROW_GROUP_CACHE_DIRECTORY = None
+ROWS_INDEX_SHARED_ROW_GROUP_CACHE_MAX_BYTES = 1_000_000_000
+
+
+@dataclass(frozen=True)
+class RowsIndexConfig:
+    cache_max_bytes: int = ROWS_INDEX_CACHE_MAX_BYTES
+    cache_max_count: int = ROWS_INDEX_CACHE_MAX_COUNT
+    cache_ttl_seconds: int = ROWS_INDEX_CACHE_TTL_SECONDS
+    row_group_cache_max_bytes: int = ROWS_INDEX_ROW_GROUP_CACHE_MAX_BYTES
+    shared_row_group_cache_directory: Optional[str] = ROWS_INDEX_SHARED_ROW_GROUP_CACHE_DIRECTORY
+    shared_row_group_cache_max_bytes: int = ROWS_INDEX_SHARED_ROW_GROUP_CACHE_MAX_BYTES
+
+    @classmethod
+    def from_env(cls) -> "RowsIndexConfig":
+        env = Env(expand_vars=True)
+        with env.prefixed("ROWS_INDEX_"):
+            return cls(
+                cache_max_bytes=env.int(name="CACHE_MAX_BYTES", default=ROWS_INDEX_CACHE_MAX_BYTES),
+                cache_max_count=env.int(name="CACHE_MAX_COUNT", default=ROWS_INDEX_CACHE_MAX_COUNT),
+                cache_ttl_seconds=env.int(name="CACHE_TTL_SECONDS", default=ROWS_INDEX_CACHE_TTL_SECONDS),
+                row_group_cache_max_bytes=env.int(
+                    name="ROW_GROUP_CACHE_MAX_BYTES", default=ROWS_INDEX_ROW_GROUP_CACHE_MAX_BYTES
+                ),
+                shared_row_group_cache_directory=env.str(
+                    name="SHARED_ROW_GROUP_CACHE_DIRECTORY", default=ROWS_INDEX_SHARED_ROW_GROUP_CACHE_DIRECTORY
+                ),
+                shared_row_group_cache_max_bytes=env.int(
+                    name="SHARED_ROW_GROUP_CACHE_MAX_BYTES", default=ROWS_INDEX_SHARED_ROW_GROUP_CACHE_MAX_BYTES
+                ),
+            )
+
+
 COMMON_HF_ENDPOINT = "https://huggingface.co"
 COMMON_HF_TOKEN = None
 
@@ -10,10 +10,13 @@ PARQUET_METADATA_CACHE_APPNAME = "datasets_server_parquet_metadata"
 DESCRIPTIVE_STATISTICS_CACHE_APPNAME = "datasets_server_descriptive_statistics"
 DUCKDB_INDEX_CACHE_APPNAME = "datasets_server_duckdb_index"
 CACHE_METRICS_COLLECTION = "cacheTotalMetric"
+CACHE_SPLIT_REQUESTS_COLLECTION = "splitRequests"
+CACHE_SPLIT_REQUESTS_TTL_SECONDS = 604_800  # 7 days
 QUEUE_METRICS_COLLECTION = "jobTotalMetric"
 METRICS_MONGOENGINE_ALIAS = "metrics"
 QUEUE_COLLECTION_JOBS = "jobsBlue"
 QUEUE_COLLECTION_LOCKS = "locks"
+QUEUE_COLLECTION_STARTED_JOBS_TOTALS = "startedJobsTotal"
 QUEUE_MONGOENGINE_ALIAS = "queue"
 QUEUE_TTL_SECONDS = 600  # 10 minutes
 LOCK_TTL_SECONDS = 600  # 10 minutes
@@ -26,8 +29,8 @@ DEFAULT_JOB_RUNNER_VERSION = 1
 PROCESSING_STEP_CONFIG_INFO_VERSION = 2
 PROCESSING_STEP_CONFIG_IS_VALID_VERSION = 1
 PROCESSING_STEP_CONFIG_OPT_IN_OUT_URLS_COUNT_VERSION = 3
-PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_VERSION = 4
-PROCESSING_STEP_CONFIG_PARQUET_METADATA_VERSION = 2
+PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_VERSION = 5
+PROCESSING_STEP_CONFIG_PARQUET_METADATA_VERSION = 3
 PROCESSING_STEP_CONFIG_PARQUET_VERSION = 6
 PROCESSING_STEP_CONFIG_SIZE_VERSION = 2
 PROCESSING_STEP_CONFIG_SPLIT_NAMES_FROM_INFO_VERSION = 3
@@ -39,7 +42,7 @@ PROCESSING_STEP_DATASET_OPT_IN_OUT_URLS_COUNT_VERSION = 2
 PROCESSING_STEP_DATASET_PARQUET_VERSION = 2
 PROCESSING_STEP_DATASET_SIZE_VERSION = 2
 PROCESSING_STEP_DATASET_SPLIT_NAMES_VERSION = 3
-PROCESSING_STEP_SPLIT_DUCKDB_INDEX_VERSION = 2
+PROCESSING_STEP_SPLIT_DUCKDB_INDEX_VERSION = 3
 PROCESSING_STEP_SPLIT_FIRST_ROWS_FROM_PARQUET_VERSION = 2
 PROCESSING_STEP_SPLIT_FIRST_ROWS_FROM_STREAMING_VERSION = 3
 PROCESSING_STEP_SPLIT_IMAGE_URL_COLUMNS_VERSION = 1
@@ -48,6 +51,7 @@ PROCESSING_STEP_SPLIT_OPT_IN_OUT_URLS_COUNT_VERSION = 2
 PROCESSING_STEP_SPLIT_DESCRIPTIVE_STATISTICS_VERSION = 1
 PROCESSING_STEP_SPLIT_OPT_IN_OUT_URLS_SCAN_VERSION = 4
 
+PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_MAX_ROW_GROUP_BYTE_SIZE = 10_000_000
 PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_ROW_GROUP_SIZE_FOR_AUDIO_DATASETS = 100
 PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_ROW_GROUP_SIZE_FOR_IMAGE_DATASETS = 100
 PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_ROW_GROUP_SIZE_FOR_BINARY_DATASETS = 100
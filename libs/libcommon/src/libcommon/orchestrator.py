@@ -652,16 +652,20 @@ class DatasetOrchestrator:
         Raises:
             ValueError: If the job is not found, or if the processing step is not found.
         """
-        # check if the job is still in started status
         job_info = job_result["job_info"]
-        if not Queue().is_job_started(job_id=job_info["job_id"]):
-            logging.debug("the job was cancelled, don't update the cache")
-            return
-        # if the job could not provide an output, finish it and return
+        method = "DatasetOrchestrator.finish_job"
+        context = f"job_type={job_info['type']}"
+        # if the job could not provide an output, finish it and return. Finishing the job checks if it's still started
         if not job_result["output"]:
-            Queue().finish_job(job_id=job_info["job_id"], is_success=False)
+            with StepProfiler(method=method, step="finish job", context=context):
+                Queue().finish_job(job_id=job_info["job_id"], is_success=False)
             logging.debug("the job raised an exception, don't update the cache")
             return
+        # check if the job is still in started status
+        with StepProfiler(method=method, step="check job", context=context):
+            if not Queue().is_job_started(job_id=job_info["job_id"]):
+                logging.debug("the job was cancelled, don't update the cache")
+                return
         # update the cache
         output = job_result["output"]
         params = job_info["params"]
@@ -669,25 +673,29 @@ class DatasetOrchestrator:
             processing_step = self.processing_graph.get_processing_step_by_job_type(job_info["type"])
         except ProcessingStepDoesNotExist as e:
             raise ValueError(f"Processing step for job type {job_info['type']} does not exist") from e
-        upsert_response_params(
-            # inputs
-            kind=processing_step.cache_kind,
-            job_params=params,
-            job_runner_version=job_result["job_runner_version"],
-            # output
-            content=output["content"],
-            http_status=output["http_status"],
-            error_code=output["error_code"],
-            details=output["details"],
-            progress=output["progress"],
-        )
+        with StepProfiler(method=method, step="update cache", context=context):
+            upsert_response_params(
+                # inputs
+                kind=processing_step.cache_kind,
+                job_params=params,
+                job_runner_version=job_result["job_runner_version"],
+                # output
+                content=output["content"],
+                http_status=output["http_status"],
+                error_code=output["error_code"],
+                details=output["details"],
+                progress=output["progress"],
+            )
         logging.debug("the job output has been written to the cache.")
         # finish the job
-        Queue().finish_job(job_id=job_info["job_id"], is_success=job_result["is_success"])
+        with StepProfiler(method=method, step="finish job", context=context):
+            Queue().finish_job(job_id=job_info["job_id"], is_success=job_result["is_success"])
         logging.debug("the job has been finished.")
         # trigger the next steps
-        plan = AfterJobPlan(job_info=job_info, processing_graph=self.processing_graph)
-        plan.run()
+        with StepProfiler(method=method, step="plan next steps", context=context):
+            plan = AfterJobPlan(job_info=job_info, processing_graph=self.processing_graph)
+        with StepProfiler(method=method, step="run plan", context=context):
+            plan.run()
         logging.debug("jobs have been created for the next steps.")
 
     def has_some_cache(self) -> bool:
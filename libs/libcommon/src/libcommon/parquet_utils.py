@@ -1,23 +1,57 @@
 import asyncio
+import contextlib
+import hashlib
+import io
+import json
 import logging
 import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from functools import lru_cache, partial
-from typing import Callable, List, Literal, Optional, TypedDict, Union
+from http import HTTPStatus
+from typing import Callable, Dict, List, Literal, Optional, Tuple, TypedDict, Union
 
 import numpy as np
+import numpy.typing as npt
 import pyarrow as pa
 import pyarrow.parquet as pq
 from datasets import Features
 from datasets.features.features import FeatureType
+from filelock import FileLock
+from fsspec.asyn import sync
 from fsspec.implementations.http import HTTPFile, HTTPFileSystem
 from huggingface_hub import HfFileSystem
 
 from libcommon.processing_graph import ProcessingGraph
-from libcommon.prometheus import StepProfiler
-from libcommon.simple_cache import get_previous_step_or_raise
+from libcommon.prometheus import (
+    ROW_GROUP_CACHE_BYTES,
+    ROW_GROUP_CACHE_EVICTED_BYTES_TOTAL,
+    ROW_GROUP_CACHE_HITS_TOTAL,
+    ROW_GROUP_CACHE_MISSES_TOTAL,
+    ROWS_INDEX_CACHE_BUILD_SECONDS_SAVED_TOTAL,
+    ROWS_INDEX_CACHE_BYTES,
+    ROWS_INDEX_CACHE_EVICTIONS_TOTAL,
+    ROWS_INDEX_CACHE_HITS_TOTAL,
+    ROWS_INDEX_CACHE_MISSES_TOTAL,
+    SHARED_ROW_GROUP_CACHE_EVICTED_BYTES_TOTAL,
+    SHARED_ROW_GROUP_CACHE_HITS_TOTAL,
+    SHARED_ROW_GROUP_CACHE_MISSES_TOTAL,
+    StepProfiler,
+)
+from libcommon.simple_cache import (
+    CacheEntryDoesNotExistError,
+    get_previous_step_or_raise,
+    get_response_without_content,
+)
 from libcommon.storage import StrPath
 from libcommon.viewer_utils.features import get_supported_unsupported_columns
+from libcommon.viewer_utils.parquet_metadata import (
+    create_row_group_index,
+    load_row_group_index,
+)
 
 
 class ParquetResponseEmptyError(Exception):
@@ -43,6 +77,313 @@ class ParquetFileMetadataItem(TypedDict):
     parquet_metadata_subpath: str
 
 
+RowGroupCacheKey = Tuple[str, Optional[str], int, Tuple[str, ...]]
+# ^ (parquet file url, dataset git revision, row group id, columns)
+# the url is on the moving refs/convert/parquet revision: the revision prevents serving the row groups of a previous
+# conversion
+
+
+SHARED_ROW_GROUP_CACHE_SUBDIRECTORY = "shared-row-group-cache"
+SHARED_ROW_GROUP_CACHE_LOCK_FILENAME = ".lock"
+SHARED_ROW_GROUP_CACHE_NUM_BYTES_FILENAME = ".num_bytes"
+SHARED_ROW_GROUP_CACHE_FILE_EXTENSION = ".arrow"
+SHARED_ROW_GROUP_CACHE_VERSION = 2
+# ^ increase it when the keys or the format of the files change: the files of the other versions are deleted on startup
+SHARED_ROW_GROUP_CACHE_EVICTION_RATIO = 0.8
+# ^ the eviction frees space down to this ratio of max_bytes, so that the directory is not listed on every write
+
+
+class SharedRowGroupCache:
+    """A cache of decoded row groups shared by the processes of a machine, e.g. the uvicorn workers of /rows.
+
+    The row groups are stored as Arrow IPC files in a dedicated subdirectory of a directory, ideally on a tmpfs like
+    /dev/shm, and they are memory-mapped on read, without any copy. The files are written to a temporary file and then
+    renamed, so that a reader never sees a partial file, and the writes and evictions are done under a file lock, so
+    that the processes never write the same row group twice. The total size of the files is tracked in a file, and
+    when it exceeds max_bytes, the least recently used row groups (the modification time of a file is updated on read)
+    are evicted, down to a fraction of max_bytes.
+
+    The files are stored in a subdirectory per version of the cache, and the files of the other versions, which
+    survive a restart of the processes, are deleted on startup. The errors of the file system are logged, and the
+    cache is then skipped: the row group is read from the parquet file.
+
+    Args:
+        directory (StrPath): The directory where the cache subdirectory is created. It is created if needed.
+        max_bytes (int): The maximum number of bytes of the Arrow IPC files. A row group bigger than max_bytes is
+          never cached.
+    """
+
+    def __init__(self, directory: StrPath, max_bytes: int):
+        self.directory = os.path.join(directory, SHARED_ROW_GROUP_CACHE_SUBDIRECTORY)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = FileLock(os.path.join(self.directory, SHARED_ROW_GROUP_CACHE_LOCK_FILENAME))
+        self.files_directory = os.path.join(self.directory, f"v{SHARED_ROW_GROUP_CACHE_VERSION}")
+        self._num_bytes_path = os.path.join(self.files_directory, SHARED_ROW_GROUP_CACHE_NUM_BYTES_FILENAME)
+        with self._lock:
+            self._delete_other_versions()
+            os.makedirs(self.files_directory, exist_ok=True)
+
+    def _delete_other_versions(self) -> None:
+        # must be called under the lock. Only the cache subdirectory is cleaned: the directory can be shared
+        for entry in os.scandir(self.directory):
+            if entry.name == SHARED_ROW_GROUP_CACHE_LOCK_FILENAME or entry.path == self.files_directory:
+                continue
+            logging.info(f"delete the shared row group cache entry of another version: {entry.path}")
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+
+    def get_path(self, key: RowGroupCacheKey) -> str:
+        url, revision, row_group_id, columns = key
+        digest = hashlib.sha256(json.dumps([url, revision, row_group_id, list(columns)]).encode("utf-8")).hexdigest()
+        return os.path.join(self.files_directory, f"{digest}{SHARED_ROW_GROUP_CACHE_FILE_EXTENSION}")
+
+    def get(self, key: RowGroupCacheKey) -> Optional[pa.Table]:
+        path = self.get_path(key)
+        try:
+            pa_table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        except FileNotFoundError:
+            # ^ also raised if the file has been evicted by another process in the meantime
+            SHARED_ROW_GROUP_CACHE_MISSES_TOTAL.inc()
+            return None
+        except (OSError, pa.ArrowInvalid):
+            logging.warning(f"failed to read the row group from the shared cache: {path}", exc_info=True)
+            SHARED_ROW_GROUP_CACHE_MISSES_TOTAL.inc()
+            return None
+        with contextlib.suppress(FileNotFoundError):
+            # ^ the file can be evicted by another process after it has been memory-mapped
+            os.utime(path)
+        SHARED_ROW_GROUP_CACHE_HITS_TOTAL.inc()
+        return pa_table
+
+    def put(self, key: RowGroupCacheKey, pa_table: pa.Table) -> None:
+        path = self.get_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with self._lock:
+                if os.path.exists(path):
+                    return
+                with pa.OSFile(tmp_path, "wb") as sink:
+                    with pa.ipc.new_file(sink, pa_table.schema) as writer:
+                        writer.write_table(pa_table)
+                size = os.path.getsize(tmp_path)
+                if size > self.max_bytes:
+                    os.remove(tmp_path)
+                    return
+                os.replace(tmp_path, path)
+                num_bytes = self._read_num_bytes()
+                num_bytes = self._evict() if num_bytes is None else num_bytes + size
+                if num_bytes > self.max_bytes:
+                    num_bytes = self._evict()
+                self._write_num_bytes(num_bytes)
+        except OSError:
+            logging.warning(f"failed to write the row group to the shared cache: {path}", exc_info=True)
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+    def _read_num_bytes(self) -> Optional[int]:
+        # must be called under the lock
+        try:
+            with open(self._num_bytes_path) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            # not written yet, or by a process that has been killed while writing it: it is computed again
+            return None
+
+    def _write_num_bytes(self, num_bytes: int) -> None:
+        # must be called under the lock
+        with open(self._num_bytes_path, "w") as f:
+            f.write(str(num_bytes))
+
+    def _evict(self) -> int:
+        # must be called under the lock. Returns the total size of the remaining files
+        entries = []
+        for entry in os.scandir(self.files_directory):
+            if entry.name.endswith(SHARED_ROW_GROUP_CACHE_FILE_EXTENSION):
+                with contextlib.suppress(FileNotFoundError):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        num_bytes = sum(size for _, size, _ in entries)
+        if num_bytes <= self.max_bytes:
+            return num_bytes
+        evicted_bytes = 0
+        for _, size, path in entries:
+            if num_bytes <= self.max_bytes * SHARED_ROW_GROUP_CACHE_EVICTION_RATIO:
+                break
+            # a process that has memory-mapped the file can still read it
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            num_bytes -= size
+            evicted_bytes += size
+        SHARED_ROW_GROUP_CACHE_EVICTED_BYTES_TOTAL.inc(evicted_bytes)
+        return num_bytes
+
+
+class RowGroupCache:
+    """A thread-safe LRU cache of decoded row groups, bounded by the total number of Arrow bytes it holds.
+
+    It is meant to be shared by all the RowsIndex objects of a process, so that users paging through the same
+    split at different offsets reuse the row groups that have already been downloaded. If a shared cache is
+    provided, it is consulted on a miss, and it is populated with the new row groups, so that the other processes
+    of the machine can reuse them.
+
+    Args:
+        max_bytes (int): The maximum number of Arrow bytes held in the cache. The least recently used row groups
+          are evicted first. A row group bigger than max_bytes is never cached.
+        shared_cache (SharedRowGroupCache, optional): The cache shared with the other processes.
+    """
+
+    def __init__(self, max_bytes: int, shared_cache: Optional[SharedRowGroupCache] = None):
+        self.max_bytes = max_bytes
+        self.shared_cache = shared_cache
+        self.num_bytes = 0
+        self._tables: "OrderedDict[RowGroupCacheKey, pa.Table]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def get(self, key: RowGroupCacheKey) -> Optional[pa.Table]:
+        pa_table = self.get_in_process(key)
+        if pa_table is None:
+            pa_table = self.get_from_shared_cache(key)
+        return pa_table
+
+    def get_in_process(self, key: RowGroupCacheKey) -> Optional[pa.Table]:
+        with self._lock:
+            pa_table = self._tables.get(key)
+            if pa_table is not None:
+                self._tables.move_to_end(key)
+                ROW_GROUP_CACHE_HITS_TOTAL.inc()
+                return pa_table
+            ROW_GROUP_CACHE_MISSES_TOTAL.inc()
+            return None
+
+    def get_from_shared_cache(self, key: RowGroupCacheKey) -> Optional[pa.Table]:
+        # reads from the disk
+        if self.shared_cache is None:
+            return None
+        pa_table = self.shared_cache.get(key)
+        if pa_table is not None:
+            self._put_in_process(key, pa_table)
+        return pa_table
+
+    def put(self, key: RowGroupCacheKey, pa_table: pa.Table) -> None:
+        self._put_in_process(key, pa_table)
+        if self.shared_cache is not None:
+            self.shared_cache.put(key, pa_table)
+
+    def _put_in_process(self, key: RowGroupCacheKey, pa_table: pa.Table) -> None:
+        num_bytes = pa_table.nbytes
+        if num_bytes > self.max_bytes:
+            return
+        with self._lock:
+            previous_table = self._tables.pop(key, None)
+            if previous_table is not None:
+                self.num_bytes -= previous_table.nbytes
+            self._tables[key] = pa_table
+            self.num_bytes += num_bytes
+            evicted_bytes = 0
+            while self.num_bytes > self.max_bytes:
+                _, evicted_table = self._tables.popitem(last=False)
+                self.num_bytes -= evicted_table.nbytes
+                evicted_bytes += evicted_table.nbytes
+            ROW_GROUP_CACHE_EVICTED_BYTES_TOTAL.inc(evicted_bytes)
+            ROW_GROUP_CACHE_BYTES.set(self.num_bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+            self.num_bytes = 0
+            ROW_GROUP_CACHE_BYTES.set(0)
+
+
+class PrefetchedFile(io.RawIOBase):
+    """A read-only file-like object that only serves byte ranges that have been fetched beforehand.
+
+    When the parquet metadata are provided, pyarrow only reads the column chunks of the requested row groups, so
+    their byte ranges can be fetched concurrently, and then decoded without any network access.
+
+    Args:
+        size (int): The size of the remote file, in bytes.
+        ranges (Dict[int, bytes]): The fetched bytes, by start position in the remote file.
+    """
+
+    def __init__(self, size: int, ranges: Dict[int, bytes]):
+        self.size = size
+        self.ranges = ranges
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self.position
+
+    def readinto(self, buffer: "memoryview") -> int:  # type: ignore[override]
+        if self.position >= self.size:
+            return 0
+        for start, data in self.ranges.items():
+            if start <= self.position < start + len(data):
+                chunk = data[self.position - start : self.position - start + len(buffer)]  # noqa: E203
+                buffer[: len(chunk)] = chunk
+                self.position += len(chunk)
+                return len(chunk)
+        raise IOError(f"The bytes at position {self.position} have not been fetched.")
+
+
+def get_column_chunks_byte_ranges(
+    metadata: pq.FileMetaData, row_group_id: int, columns: List[str]
+) -> List[Tuple[int, int]]:
+    """Get the byte ranges of the column chunks of a row group, for the requested columns
+
+    A column is matched with its leaf columns in the parquet schema the same way pyarrow does (by prefix of the
+    column path), so that the ranges cover everything pyarrow reads for read_row_group(columns=columns). Contiguous
+    column chunks are merged into one range.
+
+    Returns:
+        List[Tuple[int, int]]: The (start, num_bytes) ranges, sorted by start.
+    """
+    row_group_metadata = metadata.row_group(row_group_id)
+    requested_columns = set(columns)
+    ranges: List[Tuple[int, int]] = []
+    for column_id in range(row_group_metadata.num_columns):
+        path = metadata.schema.column(column_id).path.split(".")
+        if not any(".".join(path[: i + 1]) in requested_columns for i in range(len(path))):
+            continue
+        column_chunk = row_group_metadata.column(column_id)
+        start = (
+            column_chunk.dictionary_page_offset
+            if column_chunk.has_dictionary_page and column_chunk.dictionary_page_offset
+            else column_chunk.data_page_offset
+        )
+        ranges.append((start, column_chunk.total_compressed_size))
+    merged_ranges: List[Tuple[int, int]] = []
+    for start, num_bytes in sorted(ranges):
+        if merged_ranges and merged_ranges[-1][0] + merged_ranges[-1][1] == start:
+            merged_ranges[-1] = (merged_ranges[-1][0], merged_ranges[-1][1] + num_bytes)
+        else:
+            merged_ranges.append((start, num_bytes))
+    return merged_ranges
+
+
 @dataclass
 class ParquetIndexWithMetadata:
     features: Features
@@ -54,17 +395,86 @@ class ParquetIndexWithMetadata:
     num_rows: List[int]
     httpfs: HTTPFileSystem
     hf_token: Optional[str]
+    revision: Optional[str] = None
+    row_group_cache: Optional[RowGroupCache] = None
+    row_group_index: Optional[npt.NDArray[np.void]] = None
 
     num_rows_total: int = field(init=False)
+    parquet_files_metadata: Dict[int, pq.FileMetaData] = field(init=False, default_factory=dict)
 
     def __post_init__(self) -> None:
-        if self.httpfs._session is None:
-            self.httpfs_session = asyncio.run(self.httpfs.set_session())
-        else:
-            self.httpfs_session = self.httpfs._session
+        # the aiohttp session must be created on the IO loop of the HTTPFileSystem, where the requests are sent
+        self.httpfs_session = sync(self.httpfs.loop, self.httpfs.set_session)
         self.num_rows_total = sum(self.num_rows)
 
-    def query(self, offset: int, length: int) -> pa.Table:
+    def open_parquet_file(self, url: str, metadata: pq.FileMetaData, size: int) -> pq.ParquetFile:
+        return pq.ParquetFile(
+            HTTPFile(
+                self.httpfs,
+                url,
+                session=self.httpfs_session,
+                size=size,
+                loop=self.httpfs.loop,
+                cache_type=None,
+                **self.httpfs.kwargs,
+            ),
+            metadata=metadata,
+            pre_buffer=True,
+        )
+
+    def get_parquet_file_metadata(self, file_id: int) -> pq.FileMetaData:
+        # the metadata of a parquet file are read from the disk only once per index
+        if file_id not in self.parquet_files_metadata:
+            self.parquet_files_metadata[file_id] = pq.read_metadata(self.metadata_paths[file_id])
+        return self.parquet_files_metadata[file_id]
+
+    def estimate_memory_usage(self) -> int:
+        """Estimate the number of bytes held by the index: the parquet metadata loaded so far, and the row group index
+
+        The parquet metadata are loaded lazily, so the estimate grows as the split is queried.
+        """
+        return (
+            sum(int(metadata.serialized_size) for metadata in self.parquet_files_metadata.values())
+            + (self.row_group_index.nbytes if self.row_group_index is not None else 0)
+            + sum(len(url) + len(path) for url, path in zip(self.parquet_files_urls, self.metadata_paths))
+        )
+
+    def get_columns(self, columns: Optional[List[str]] = None) -> List[str]:
+        """Get the columns to read: the supported columns, restricted to the requested ones if any.
+
+        The order of the supported columns is kept.
+        """
+        if columns is None:
+            return self.supported_columns
+        return [column for column in self.supported_columns if column in columns]
+
+    def get_row_group_cache_key(self, url: str, row_group_id: int, columns: List[str]) -> RowGroupCacheKey:
+        return (url, self.revision, row_group_id, tuple(columns))
+
+    def read_row_group(
+        self, parquet_file: pq.ParquetFile, url: str, row_group_id: int, columns: List[str]
+    ) -> pa.Table:
+        """Read a row group, from the row group cache if possible.
+
+        Args:
+            parquet_file (pq.ParquetFile): The parquet file that contains the row group.
+            url (str): The URL of the parquet file, used as part of the cache key.
+            row_group_id (int): The index of the row group in the parquet file.
+            columns (List[str]): The columns to read.
+
+        Returns:
+            pa.Table: The row group, restricted to the columns.
+        """
+        if self.row_group_cache is None:
+            return parquet_file.read_row_group(i=row_group_id, columns=columns)
+        key = self.get_row_group_cache_key(url=url, row_group_id=row_group_id, columns=columns)
+        pa_table = self.row_group_cache.get(key)
+        if pa_table is None:
+            pa_table = parquet_file.read_row_group(i=row_group_id, columns=columns)
+            self.row_group_cache.put(key, pa_table)
+        return pa_table
+
+    def query(self, offset: int, length: int, columns: Optional[List[str]] = None) -> pa.Table:
         """Query the parquet files
 
         Note that this implementation will always read at least one row group, to get the list of columns and always
@@ -73,10 +483,14 @@ class ParquetIndexWithMetadata:
         Args:
             offset (int): The first row to read.
             length (int): The number of rows to read.
+            columns (List[str], optional): The columns to read. Defaults to all the supported columns.
 
         Returns:
             pa.Table: The requested rows.
         """
+        columns = self.get_columns(columns)
+        if self.row_group_index is not None:
+            return self.query_with_row_group_index(offset=offset, length=length, columns=columns)
         with StepProfiler(
             method="parquet_index_with_metadata.query", step="get the parquet files than contain the requested rows"
         ):
@@ -99,19 +513,7 @@ class ParquetIndexWithMetadata:
             method="parquet_index_with_metadata.query", step="load the remote parquet files using metadata from disk"
         ):
             parquet_files = [
-                pq.ParquetFile(
-                    HTTPFile(
-                        self.httpfs,
-                        url,
-                        session=self.httpfs_session,
-                        size=size,
-                        loop=self.httpfs.loop,
-                        cache_type=None,
-                        **self.httpfs.kwargs,
-                    ),
-                    metadata=pq.read_metadata(metadata_path),
-                    pre_buffer=True,
-                )
+                self.open_parquet_file(url=url, metadata=pq.read_metadata(metadata_path), size=size)
                 for url, metadata_path, size in zip(urls, metadata_paths, num_bytes)
             ]
 
@@ -126,8 +528,10 @@ class ParquetIndexWithMetadata:
                 ]
             )
             row_group_readers: List[Callable[[], pa.Table]] = [
-                partial(parquet_file.read_row_group, i=group_id, columns=self.supported_columns)
-                for parquet_file in parquet_files
+                partial(
+                    self.read_row_group, parquet_file=parquet_file, url=url, row_group_id=group_id, columns=columns
+                )
+                for parquet_file, url in zip(parquet_files, urls)
                 for group_id in range(parquet_file.metadata.num_row_groups)
             ]
 
@@ -146,6 +550,141 @@ class ParquetIndexWithMetadata:
             first_row_in_pa_table = row_group_offsets[first_row_group_id - 1] if first_row_group_id > 0 else 0
             return pa_table.slice(parquet_offset - first_row_in_pa_table, length)
 
+    def find_row_groups(self, offset: int, length: int) -> npt.NDArray[np.void]:
+        """Find the row groups that contain the requested rows
+
+        If the split has no precomputed row group index, an index is built from the metadata of the parquet files that
+        contain the requested rows.
+
+        Args:
+            offset (int): The first row to read.
+            length (int): The number of rows to read.
+
+        Returns:
+            npt.NDArray[np.void]: The records of the row group index (ROW_GROUP_INDEX_DTYPE) to read, with at least
+              one row group. The file ids and first rows are relative to the whole split.
+        """
+        last_row_in_parquet = self.num_rows_total - 1
+        first_row = min(offset, last_row_in_parquet)
+        last_row = max(min(offset + length - 1, last_row_in_parquet), first_row)
+        row_group_index = self.row_group_index
+        if row_group_index is None:
+            parquet_file_offsets = np.cumsum(self.num_rows)
+            first_parquet_file_id, last_parquet_file_id = np.searchsorted(
+                parquet_file_offsets, [max(first_row, 0), last_row], side="right"
+            )
+            row_group_index = create_row_group_index(
+                [
+                    self.get_parquet_file_metadata(file_id)
+                    for file_id in range(first_parquet_file_id, last_parquet_file_id + 1)
+                ]
+            )
+            row_group_index["file_id"] += first_parquet_file_id
+            if first_parquet_file_id > 0:
+                row_group_index["first_row"] += parquet_file_offsets[first_parquet_file_id - 1]
+        first_row_group_idx, last_row_group_idx = (
+            np.searchsorted(row_group_index["first_row"], [first_row, last_row], side="right") - 1
+        )
+        return row_group_index[max(first_row_group_idx, 0) : last_row_group_idx + 1]  # noqa: E203
+
+    def query_with_row_group_index(self, offset: int, length: int, columns: List[str]) -> pa.Table:
+        """Query the parquet files, using the precomputed row group index to find the row groups to read
+
+        The lookup is a binary search in the memory-mapped index, and only the metadata of the parquet files that
+        contain the requested rows are loaded (once per index). The returned table is the same as with query().
+        """
+        with StepProfiler(
+            method="parquet_index_with_metadata.query_with_row_group_index",
+            step="get the row groups that contain the requested rows",
+        ):
+            row_groups = self.find_row_groups(offset=offset, length=length)
+
+        with StepProfiler(method="parquet_index_with_metadata.query_with_row_group_index", step="read the row groups"):
+            pa_tables = []
+            for row_group in row_groups:
+                file_id = int(row_group["file_id"])
+                parquet_file = self.open_parquet_file(
+                    url=self.parquet_files_urls[file_id],
+                    metadata=self.get_parquet_file_metadata(file_id),
+                    size=self.num_bytes[file_id],
+                )
+                pa_tables.append(
+                    self.read_row_group(
+                        parquet_file=parquet_file,
+                        url=self.parquet_files_urls[file_id],
+                        row_group_id=int(row_group["row_group_id"]),
+                        columns=columns,
+                    )
+                )
+            pa_table = pa.concat_tables(pa_tables)
+            return pa_table.slice(offset - int(row_groups[0]["first_row"]), length)
+
+    async def fetch_byte_ranges(self, url: str, byte_ranges: List[Tuple[int, int]]) -> List[bytes]:
+        # must run on the IO loop of the HTTPFileSystem: its aiohttp session cannot be used from another event loop
+        data: List[bytes] = await asyncio.gather(
+            *[self.httpfs._cat_file(url, start=start, end=start + num_bytes) for start, num_bytes in byte_ranges]
+        )
+        return data
+
+    async def fetch_row_group(self, row_group: np.void, columns: List[str]) -> pa.Table:
+        file_id = int(row_group["file_id"])
+        row_group_id = int(row_group["row_group_id"])
+        url = self.parquet_files_urls[file_id]
+        key = self.get_row_group_cache_key(url=url, row_group_id=row_group_id, columns=columns)
+        if self.row_group_cache is not None:
+            pa_table = self.row_group_cache.get_in_process(key)
+            if pa_table is None and self.row_group_cache.shared_cache is not None:
+                # reads from the disk: don't block the event loop
+                pa_table = await asyncio.to_thread(self.row_group_cache.get_from_shared_cache, key)
+            if pa_table is not None:
+                return pa_table
+        metadata = await asyncio.to_thread(self.get_parquet_file_metadata, file_id)
+        byte_ranges = get_column_chunks_byte_ranges(metadata=metadata, row_group_id=row_group_id, columns=columns)
+        data = await asyncio.to_thread(sync, self.httpfs.loop, self.fetch_byte_ranges, url, byte_ranges)
+        parquet_file = pq.ParquetFile(
+            PrefetchedFile(
+                size=self.num_bytes[file_id], ranges={start: chunk for (start, _), chunk in zip(byte_ranges, data)}
+            ),
+            metadata=metadata,
+        )
+
+        def read_row_group() -> pa.Table:
+            pa_table = parquet_file.read_row_group(i=row_group_id, columns=columns)
+            if self.row_group_cache is not None:
+                # might write to the shared cache: don't block the event loop
+                self.row_group_cache.put(key, pa_table)
+            return pa_table
+
+        return await asyncio.to_thread(read_row_group)
+
+    async def query_async(self, offset: int, length: int, columns: Optional[List[str]] = None) -> pa.Table:
+        """Query the parquet files, without blocking the event loop
+
+        Only the column chunks of the requested columns are fetched, with HTTP range requests sent concurrently on
+        the IO loop of the HTTPFileSystem, and the row groups are decoded in threads. The returned table is the same
+        as with query().
+
+        Args:
+            offset (int): The first row to read.
+            length (int): The number of rows to read.
+            columns (List[str], optional): The columns to read. Defaults to all the supported columns.
+
+        Returns:
+            pa.Table: The requested rows.
+        """
+        columns = self.get_columns(columns)
+        with StepProfiler(
+            method="parquet_index_with_metadata.query_async", step="get the row groups that contain the requested rows"
+        ):
+            row_groups = await asyncio.to_thread(self.find_row_groups, offset=offset, length=length)
+
+        with StepProfiler(method="parquet_index_with_metadata.query_async", step="fetch and read the row groups"):
+            pa_tables = await asyncio.gather(
+                *[self.fetch_row_group(row_group, columns=columns) for row_group in row_groups]
+            )
+            pa_table = pa.concat_tables(pa_tables)
+            return pa_table.slice(offset - int(row_groups[0]["first_row"]), length)
+
     @staticmethod
     def from_parquet_metadata_items(
         parquet_file_metadata_items: List[ParquetFileMetadataItem],
@@ -154,6 +693,9 @@ class ParquetIndexWithMetadata:
         httpfs: HTTPFileSystem,
         hf_token: Optional[str],
         unsupported_features: List[FeatureType] = [],
+        row_group_cache: Optional[RowGroupCache] = None,
+        row_group_index_subpath: Optional[str] = None,
+        revision: Optional[str] = None,
     ) -> "ParquetIndexWithMetadata":
         if not parquet_file_metadata_items:
             raise ParquetResponseEmptyError("No parquet files found.")
@@ -185,6 +727,25 @@ class ParquetIndexWithMetadata:
                 features,
                 unsupported_features=unsupported_features,
             )
+
+        row_group_index = None
+        if row_group_index_subpath:
+            with StepProfiler(
+                method="parquet_index_with_metadata.from_parquet_metadata_items", step="load the row group index"
+            ):
+                try:
+                    row_group_index = load_row_group_index(
+                        os.path.join(parquet_metadata_directory, row_group_index_subpath)
+                    )
+                    if (
+                        len(row_group_index) == 0
+                        or int(row_group_index["file_id"].max()) >= len(parquet_files_urls)
+                        or int(row_group_index[-1]["first_row"] + row_group_index[-1]["num_rows"]) != sum(num_rows)
+                    ):
+                        raise ValueError("The row group index does not match the list of parquet files.")
+                except Exception as e:
+                    logging.warning(f"Could not use the row group index, falling back to the parquet metadata: {e}")
+                    row_group_index = None
         return ParquetIndexWithMetadata(
             features=features,
             supported_columns=supported_columns,
@@ -195,6 +756,9 @@ class ParquetIndexWithMetadata:
             num_rows=num_rows,
             httpfs=httpfs,
             hf_token=hf_token,
+            revision=revision,
+            row_group_cache=row_group_cache,
+            row_group_index=row_group_index,
         )
 
 
@@ -209,6 +773,7 @@ class RowsIndex:
         hf_token: Optional[str],
         parquet_metadata_directory: StrPath,
         unsupported_features: List[FeatureType] = [],
+        row_group_cache: Optional[RowGroupCache] = None,
     ):
         self.dataset = dataset
         self.revision: Optional[str] = None
@@ -216,6 +781,7 @@ class RowsIndex:
         self.split = split
         self.processing_graph = processing_graph
         self.httpfs = httpfs
+        self.row_group_cache = row_group_cache
         self.parquet_index = self._init_parquet_index(
             hf_token=hf_token,
             parquet_metadata_directory=parquet_metadata_directory,
@@ -247,6 +813,8 @@ class RowsIndex:
                     features = Features.from_dict(content["features"])
                 else:
                     features = None
+                # config-parquet-metadata version<3 didn't have the row group index
+                row_group_index_subpath = content.get("row_group_index_subpaths", {}).get(self.split)
             logging.info(
                 f"Create ParquetIndexWithMetadata for dataset={self.dataset}, config={self.config}, split={self.split}"
             )
@@ -261,6 +829,9 @@ class RowsIndex:
                 httpfs=self.httpfs,
                 hf_token=hf_token,
                 unsupported_features=unsupported_features,
+                row_group_cache=self.row_group_cache,
+                row_group_index_subpath=row_group_index_subpath,
+                revision=self.revision,
             )
 
     # note that this cache size is global for the class, not per instance
@@ -284,6 +855,125 @@ class RowsIndex:
         )
         return self.parquet_index.query(offset=offset, length=length)
 
+    async def query_async(self, offset: int, length: int, columns: Optional[List[str]] = None) -> pa.Table:
+        """Query the parquet files, without blocking the event loop
+
+        The row groups are fetched concurrently and decoded in threads. Contrary to query(), the result is not
+        memoized, but the row groups are cached in the row group cache if any.
+
+        Args:
+            offset (int): The first row to read.
+            length (int): The number of rows to read.
+            columns (List[str], optional): The columns to read. Defaults to all the supported columns.
+
+        Returns:
+            pa.Table: The requested rows.
+        """
+        logging.info(
+            f"Query {type(self.parquet_index).__name__} (async) for dataset={self.dataset}, config={self.config},"
+            f" split={self.split}, offset={offset}, length={length}, columns={columns}"
+        )
+        return await self.parquet_index.query_async(offset=offset, length=length, columns=columns)
+
+
+RowsIndexCacheKey = Tuple[str, str, str]
+# ^ (dataset, config, split)
+
+
+@dataclass
+class RowsIndexCacheEntry:
+    rows_index: RowsIndex
+    revision: Optional[str]
+    created_at: float
+    build_seconds: float
+    num_bytes: int
+
+
+class RowsIndexCache:
+    """A thread-safe LRU cache of RowsIndex objects, bounded by a number of entries and by their estimated memory.
+
+    An entry is removed when it has expired, or when the revision of the dataset it has been built for is not the
+    current one anymore.
+
+    Args:
+        max_count (int): The maximum number of entries.
+        max_bytes (int): The maximum number of bytes held by the entries, as estimated by
+          ParquetIndexWithMetadata.estimate_memory_usage(). The least recently used entries are evicted first.
+        ttl_seconds (int): The time to live of an entry, in seconds.
+    """
+
+    def __init__(self, max_count: int, max_bytes: int, ttl_seconds: int):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.num_bytes = 0
+        self._entries: "OrderedDict[RowsIndexCacheKey, RowsIndexCacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: RowsIndexCacheKey, revision: Optional[str]) -> Optional[RowsIndex]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                ROWS_INDEX_CACHE_MISSES_TOTAL.inc()
+                return None
+            if time.monotonic() - entry.created_at > self.ttl_seconds:
+                self._remove(key, reason="ttl")
+                ROWS_INDEX_CACHE_MISSES_TOTAL.inc()
+                return None
+            if entry.revision != revision:
+                self._remove(key, reason="revision")
+                ROWS_INDEX_CACHE_MISSES_TOTAL.inc()
+                return None
+            self._entries.move_to_end(key)
+            ROWS_INDEX_CACHE_HITS_TOTAL.inc()
+            ROWS_INDEX_CACHE_BUILD_SECONDS_SAVED_TOTAL.inc(entry.build_seconds)
+            # the parquet metadata are loaded lazily: the index might have grown since it has been cached
+            num_bytes = entry.rows_index.parquet_index.estimate_memory_usage()
+            self.num_bytes += num_bytes - entry.num_bytes
+            entry.num_bytes = num_bytes
+            self._evict(keep=key)
+            return entry.rows_index
+
+    def put(self, key: RowsIndexCacheKey, rows_index: RowsIndex, build_seconds: float) -> None:
+        num_bytes = rows_index.parquet_index.estimate_memory_usage()
+        if num_bytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, reason="replaced")
+            self._entries[key] = RowsIndexCacheEntry(
+                rows_index=rows_index,
+                revision=rows_index.revision,
+                created_at=time.monotonic(),
+                build_seconds=build_seconds,
+                num_bytes=num_bytes,
+            )
+            self.num_bytes += num_bytes
+            self._evict(keep=key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.num_bytes = 0
+            ROWS_INDEX_CACHE_BYTES.set(0)
+
+    def _remove(self, key: RowsIndexCacheKey, reason: str) -> None:
+        entry = self._entries.pop(key)
+        self.num_bytes -= entry.num_bytes
+        ROWS_INDEX_CACHE_EVICTIONS_TOTAL.labels(reason=reason).inc()
+
+    def _evict(self, keep: RowsIndexCacheKey) -> None:
+        # evict the least recently used entries, but never the one that has just been accessed
+        while len(self._entries) > self.max_count or self.num_bytes > self.max_bytes:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            self._remove(key, reason="size")
+        ROWS_INDEX_CACHE_BYTES.set(self.num_bytes)
+
 
 class Indexer:
     def __init__(
@@ -294,6 +984,12 @@ class Indexer:
         unsupported_features: List[FeatureType] = [],
         all_columns_supported_datasets_allow_list: Union[Literal["all"], List[str]] = "all",
         hf_token: Optional[str] = None,
+        row_group_cache_max_bytes: int = 0,
+        shared_row_group_cache_directory: Optional[StrPath] = None,
+        shared_row_group_cache_max_bytes: int = 0,
+        rows_index_cache_max_count: int = 8,
+        rows_index_cache_max_bytes: int = 100_000_000,
+        rows_index_cache_ttl_seconds: int = 3_600,
     ):
         self.processing_graph = processing_graph
         self.parquet_metadata_directory = parquet_metadata_directory
@@ -301,13 +997,63 @@ class Indexer:
         self.hf_token = hf_token
         self.unsupported_features = unsupported_features
         self.all_columns_supported_datasets_allow_list = all_columns_supported_datasets_allow_list
+        # the row group cache is shared by all the RowsIndex objects created by the indexer
+        shared_row_group_cache = (
+            SharedRowGroupCache(directory=shared_row_group_cache_directory, max_bytes=shared_row_group_cache_max_bytes)
+            if shared_row_group_cache_directory and shared_row_group_cache_max_bytes > 0
+            else None
+        )
+        self.row_group_cache = (
+            RowGroupCache(max_bytes=row_group_cache_max_bytes, shared_cache=shared_row_group_cache)
+            if row_group_cache_max_bytes > 0 or shared_row_group_cache is not None
+            else None
+        )
+        self.rows_index_cache = (
+            RowsIndexCache(
+                max_count=rows_index_cache_max_count,
+                max_bytes=rows_index_cache_max_bytes,
+                ttl_seconds=rows_index_cache_ttl_seconds,
+            )
+            if rows_index_cache_max_count > 0
+            else None
+        )
+
+    def get_revision(self, dataset: str, config: str) -> Optional[str]:
+        """Get the dataset git revision of the current parquet metadata of a config, without loading their content"""
+        for processing_step in self.processing_graph.get_config_parquet_metadata_processing_steps():
+            try:
+                response = get_response_without_content(
+                    kind=processing_step.cache_kind, dataset=dataset, config=config, split=None
+                )
+            except CacheEntryDoesNotExistError:
+                continue
+            if response["http_status"] == HTTPStatus.OK:
+                return response["dataset_git_revision"]
+        return None
 
-    @lru_cache(maxsize=8)
     def get_rows_index(
         self,
         dataset: str,
         config: str,
         split: str,
+    ) -> RowsIndex:
+        """Get the rows index of a split, from the rows index cache if it is still valid"""
+        if self.rows_index_cache is None:
+            return self.create_rows_index(dataset=dataset, config=config, split=split)
+        key = (dataset, config, split)
+        revision = self.get_revision(dataset=dataset, config=config)
+        rows_index = self.rows_index_cache.get(key, revision=revision)
+        if rows_index is None:
+            started_at = time.perf_counter()
+            rows_index = self.create_rows_index(dataset=dataset, config=config, split=split)
+            self.rows_index_cache.put(key, rows_index, build_seconds=time.perf_counter() - started_at)
+        return rows_index
+
+    def create_rows_index(
+        self,
+        dataset: str,
+        config: str,
+        split: str,
     ) -> RowsIndex:
         filter_features = (
             self.all_columns_supported_datasets_allow_list != "all"
@@ -323,4 +1069,5 @@ class Indexer:
             hf_token=self.hf_token,
             parquet_metadata_directory=self.parquet_metadata_directory,
             unsupported_features=unsupported_features,
+            row_group_cache=self.row_group_cache,
         )
@@ -9,6 +9,7 @@ from typing import Any, Optional, Type, TypeVar
 from prometheus_client import (
     REGISTRY,
     CollectorRegistry,
+    Counter,
     Gauge,
     Histogram,
     generate_latest,
@@ -19,6 +20,7 @@ from psutil import disk_usage
 from libcommon.queue import JobTotalMetricDocument
 from libcommon.simple_cache import CacheTotalMetricDocument
 from libcommon.storage import StrPath
+from libcommon.viewer_utils.access_index import get_last_cleaning
 
 
 class Prometheus:
@@ -81,6 +83,93 @@ PARQUET_METADATA_DISK_USAGE = Gauge(
     labelnames=["type"],
     multiprocess_mode="liveall",
 )
+ROW_GROUP_CACHE_HITS_TOTAL = Counter(
+    name="row_group_cache_hits_total",
+    documentation="Number of row groups read from the in-memory row group cache (/rows)",
+)
+ROW_GROUP_CACHE_MISSES_TOTAL = Counter(
+    name="row_group_cache_misses_total",
+    documentation="Number of row groups not found in the in-memory row group cache (/rows)",
+)
+ROW_GROUP_CACHE_EVICTED_BYTES_TOTAL = Counter(
+    name="row_group_cache_evicted_bytes_total",
+    documentation="Number of Arrow bytes evicted from the in-memory row group cache (/rows)",
+)
+ROW_GROUP_CACHE_BYTES = Gauge(
+    name="row_group_cache_bytes",
+    documentation="Number of Arrow bytes currently held in the in-memory row group cache (/rows)",
+    multiprocess_mode="livesum",
+)
+SHARED_ROW_GROUP_CACHE_HITS_TOTAL = Counter(
+    name="shared_row_group_cache_hits_total",
+    documentation="Number of row groups read from the row group cache shared by the processes of a machine (/rows)",
+)
+SHARED_ROW_GROUP_CACHE_MISSES_TOTAL = Counter(
+    name="shared_row_group_cache_misses_total",
+    documentation="Number of row groups not found in the row group cache shared by the processes of a machine (/rows)",
+)
+SHARED_ROW_GROUP_CACHE_EVICTED_BYTES_TOTAL = Counter(
+    name="shared_row_group_cache_evicted_bytes_total",
+    documentation="Number of bytes evicted from the row group cache shared by the processes of a machine (/rows)",
+)
+ROWS_INDEX_CACHE_HITS_TOTAL = Counter(
+    name="rows_index_cache_hits_total",
+    documentation="Number of rows indexes read from the in-memory rows index cache (/rows)",
+)
+ROWS_INDEX_CACHE_MISSES_TOTAL = Counter(
+    name="rows_index_cache_misses_total",
+    documentation="Number of rows indexes not found in the in-memory rows index cache (/rows)",
+)
+ROWS_INDEX_CACHE_EVICTIONS_TOTAL = Counter(
+    name="rows_index_cache_evictions_total",
+    documentation="Number of rows indexes removed from the in-memory rows index cache (/rows), by reason",
+    labelnames=["reason"],
+)
+ROWS_INDEX_CACHE_BUILD_SECONDS_SAVED_TOTAL = Counter(
+    name="rows_index_cache_build_seconds_saved_total",
+    documentation="Time spent building the rows indexes that have been read from the rows index cache (/rows)",
+)
+ROWS_INDEX_CACHE_BYTES = Gauge(
+    name="rows_index_cache_bytes",
+    documentation="Estimated number of bytes held by the rows indexes of the in-memory rows index cache (/rows)",
+    multiprocess_mode="livesum",
+)
+DUCKDB_CONNECTION_POOL_HITS_TOTAL = Counter(
+    name="duckdb_connection_pool_hits_total",
+    documentation="Number of queries run on an already open DuckDB connection (/search)",
+)
+DUCKDB_CONNECTION_POOL_MISSES_TOTAL = Counter(
+    name="duckdb_connection_pool_misses_total",
+    documentation="Number of queries that required to open a DuckDB connection (/search)",
+)
+DUCKDB_CONNECTION_POOL_EVICTIONS_TOTAL = Counter(
+    name="duckdb_connection_pool_evictions_total",
+    documentation="Number of DuckDB connections closed by the connection pool (/search), by reason",
+    labelnames=["reason"],
+)
+DUCKDB_CONNECTION_POOL_BYTES = Gauge(
+    name="duckdb_connection_pool_bytes",
+    documentation="Memory used by the DuckDB connections of the connection pool, as reported by DuckDB (/search)",
+    multiprocess_mode="livesum",
+)
+MATCHING_IDS_CACHE_HITS_TOTAL = Counter(
+    name="matching_ids_cache_hits_total",
+    documentation="Number of full-text searches whose matching rows were read from the cache (/search)",
+)
+MATCHING_IDS_CACHE_MISSES_TOTAL = Counter(
+    name="matching_ids_cache_misses_total",
+    documentation="Number of full-text searches that required to score the rows of the index (/search)",
+)
+MATCHING_IDS_CACHE_EVICTIONS_TOTAL = Counter(
+    name="matching_ids_cache_evictions_total",
+    documentation="Number of lists of matching rows removed from the cache (/search), by reason",
+    labelnames=["reason"],
+)
+MATCHING_IDS_CACHE_BYTES = Gauge(
+    name="matching_ids_cache_bytes",
+    documentation="Memory used by the lists of matching rows in the cache (/search)",
+    multiprocess_mode="livesum",
+)
 METHOD_STEPS_PROCESSING_TIME = Histogram(
     "method_steps_processing_time_seconds",
     "Histogram of the processing time of specific steps in methods for a given context (in seconds)",
@@ -113,6 +202,14 @@ def update_assets_disk_usage(directory: StrPath) -> None:
     update_disk_gauge(ASSETS_DISK_USAGE, directory)
 
 
+def update_cached_assets_disk_usage(directory: StrPath) -> None:
+    # the cached assets are cleaned by the cache maintenance job, which stores the result of its last run in a file
+    cleaning = get_last_cleaning(directory)
+    if cleaning is not None:
+        ASSETS_DISK_USAGE.labels(type="cached_assets_used").set(cleaning["num_bytes"])
+        ASSETS_DISK_USAGE.labels(type="cached_assets_reclaimed").set(cleaning["reclaimed_bytes"])
+
+
 def update_descriptive_statistics_disk_usage(directory: StrPath) -> None:
     update_disk_gauge(DESCRIPTIVE_STATISTICS_DISK_USAGE, directory)
 
@@ -6,13 +6,23 @@ import json
 import logging
 import time
 import types
-from collections import Counter
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
-from itertools import groupby
-from operator import itemgetter
 from types import TracebackType
-from typing import Generic, List, Literal, Optional, Sequence, Type, TypedDict, TypeVar
-from uuid import uuid4
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Type,
+    TypedDict,
+    TypeVar,
+)
 
 import pandas as pd
 import pytz
@@ -27,6 +37,7 @@ from mongoengine.fields import (
     StringField,
 )
 from mongoengine.queryset.queryset import QuerySet
+from pymongo.change_stream import CollectionChangeStream
 
 from libcommon.constants import (
     DEFAULT_DIFFICULTY_MAX,
@@ -34,6 +45,7 @@ from libcommon.constants import (
     LOCK_TTL_SECONDS,
     QUEUE_COLLECTION_JOBS,
     QUEUE_COLLECTION_LOCKS,
+    QUEUE_COLLECTION_STARTED_JOBS_TOTALS,
     QUEUE_METRICS_COLLECTION,
     QUEUE_MONGOENGINE_ALIAS,
     QUEUE_TTL_SECONDS,
@@ -47,6 +59,9 @@ from libcommon.utils import (
     inputs_to_string,
 )
 
+# number of waiting jobs checked against the started jobs of their unicity_id when selecting the next job
+NEXT_WAITING_JOB_CANDIDATES = 10
+
 # START monkey patching ### hack ###
 # see https://github.com/sbdchd/mongo-types#install
 U = TypeVar("U", bound=Document)
@@ -162,9 +177,17 @@ class JobDocument(Document):
             ("type", "dataset", "status"),
             ("type", "dataset", "revision", "config", "split", "status", "priority"),
             ("priority", "status", "created_at", "namespace"),
+            ("priority", "status", "namespace"),
             ("priority", "status", "type", "namespace", "unicity_id", "created_at", "-difficulty"),
             ("status", "type"),
             ("unicity_id", "-created_at", "status"),
+            # at most one job is started for a given unicity_id
+            {
+                "fields": ["unicity_id"],
+                "name": "unicity_id_1_started",
+                "unique": True,
+                "partialFilterExpression": {"status": Status.STARTED},
+            },
             {
                 "fields": ["finished_at"],
                 "expireAfterSeconds": QUEUE_TTL_SECONDS,
@@ -275,6 +298,41 @@ class JobTotalMetricDocument(Document):
     objects = QuerySetManager["JobTotalMetricDocument"]()
 
 
+class StartedJobsTotalDocument(Document):
+    """Number of started jobs of a namespace, used to schedule the jobs fairly between the namespaces.
+
+    The totals are updated when a job is started, finished or cancelled, so that the scheduler does not have to scan
+    the started jobs. They are reconciled with the jobs collection by the collect-queue-metrics job.
+
+    Args:
+        namespace (`str`): The dataset namespace (user or organization) if any, else the dataset name.
+        total (`int`): The number of started jobs of the namespace.
+    """
+
+    id = ObjectIdField(db_field="_id", primary_key=True, default=ObjectId)
+    namespace = StringField(required=True, unique=True)
+    total = IntField(required=True, default=0)
+
+    meta = {
+        "collection": QUEUE_COLLECTION_STARTED_JOBS_TOTALS,
+        "db_alias": QUEUE_MONGOENGINE_ALIAS,
+        "indexes": [("total", "namespace")],
+    }
+    objects = QuerySetManager["StartedJobsTotalDocument"]()
+
+
+def _update_started_jobs_total(namespace: str, increase_by: int) -> None:
+    StartedJobsTotalDocument.objects(namespace=namespace).upsert_one(inc__total=increase_by)
+
+
+def increase_started_jobs_total(namespace: str) -> None:
+    _update_started_jobs_total(namespace=namespace, increase_by=DEFAULT_INCREASE_AMOUNT)
+
+
+def decrease_started_jobs_total(namespace: str) -> None:
+    _update_started_jobs_total(namespace=namespace, increase_by=DEFAULT_DECREASE_AMOUNT)
+
+
 class Lock(Document):
     meta = {
         "collection": QUEUE_COLLECTION_LOCKS,
@@ -503,12 +561,37 @@ class Queue:
             `int`: The number of canceled jobs
         """
         try:
-            existing = JobDocument.objects(pk__in=job_ids)
-            existing.update(finished_at=get_datetime(), status=Status.CANCELLED)
-            return existing.count()
+            started_jobs = JobDocument.objects(pk__in=job_ids, status=Status.STARTED).only("namespace")
+            started_jobs_count_by_namespace = Counter(job.namespace for job in started_jobs)
+            cancelled_jobs_count = JobDocument.objects(pk__in=job_ids).update(
+                finished_at=get_datetime(), status=Status.CANCELLED
+            )
+            for namespace, started_jobs_count in started_jobs_count_by_namespace.items():
+                _update_started_jobs_total(
+                    namespace=namespace, increase_by=DEFAULT_DECREASE_AMOUNT * started_jobs_count
+                )
+            return cancelled_jobs_count
         except Exception:
             return 0
 
+    def _get_job_query_filters(
+        self,
+        difficulty_min: Optional[int] = None,
+        difficulty_max: Optional[int] = None,
+        job_types_blocked: Optional[list[str]] = None,
+        job_types_only: Optional[list[str]] = None,
+    ) -> JobQueryFilters:
+        filters: JobQueryFilters = {}
+        if job_types_blocked:
+            filters["type__nin"] = job_types_blocked
+        if job_types_only:
+            filters["type__in"] = job_types_only
+        if difficulty_min is not None and difficulty_min > DEFAULT_DIFFICULTY_MIN:
+            filters["difficulty__gte"] = difficulty_min
+        if difficulty_max is not None and difficulty_max < DEFAULT_DIFFICULTY_MAX:
+            filters["difficulty__lte"] = difficulty_max
+        return filters
+
     def _get_next_waiting_job_for_priority(
         self,
         priority: Priority,
@@ -540,68 +623,57 @@ class Queue:
             f"Getting next waiting job for priority {priority}, blocked types: {job_types_blocked}, only types:"
             f" {job_types_only}"
         )
-        filters: JobQueryFilters = {}
-        if job_types_blocked:
-            filters["type__nin"] = job_types_blocked
-        if job_types_only:
-            filters["type__in"] = job_types_only
-        if difficulty_min is not None and difficulty_min > DEFAULT_DIFFICULTY_MIN:
-            filters["difficulty__gte"] = difficulty_min
-        if difficulty_max is not None and difficulty_max < DEFAULT_DIFFICULTY_MAX:
-            filters["difficulty__lte"] = difficulty_max
-        started_jobs = JobDocument.objects(status=Status.STARTED, **filters)
-        logging.debug(f"Number of started jobs: {started_jobs.count()}")
-        started_job_namespaces = [job.namespace for job in started_jobs.only("namespace")]
-        logging.debug(f"Started job namespaces: {started_job_namespaces}")
-
-        next_waiting_job = (
-            JobDocument.objects(
-                status=Status.WAITING, namespace__nin=set(started_job_namespaces), priority=priority, **filters
-            )
-            .order_by("+created_at")
-            .only("type", "dataset", "revision", "config", "split", "priority", "unicity_id")
-            .no_cache()
-            .first()
+        filters = self._get_job_query_filters(
+            difficulty_min=difficulty_min,
+            difficulty_max=difficulty_max,
+            job_types_blocked=job_types_blocked,
+            job_types_only=job_types_only,
         )
-
-        # ^ no_cache should generate a query on every iteration, which should solve concurrency issues between workers
-        if next_waiting_job is not None:
-            return next_waiting_job
-        logging.debug("No waiting job for namespace without started job")
-
-        # all the waiting jobs, if any, are for namespaces that already have started jobs.
-        #
-        # Let's:
-        # - exclude the waiting jobs which unicity_id is already in a started job
-        # and, among the remaining waiting jobs, let's:
-        # - select the oldest waiting job for the namespace with the least number of started jobs
-        started_unicity_ids = {job.unicity_id for job in started_jobs.only("unicity_id")}
-        descending_frequency_namespace_counts = [
-            [namespace, count] for namespace, count in Counter(started_job_namespaces).most_common()
-        ]
-        logging.debug(f"Descending frequency namespace counts: {descending_frequency_namespace_counts}")
-        descending_frequency_namespace_groups = [
-            [item[0] for item in data] for (_, data) in groupby(descending_frequency_namespace_counts, itemgetter(1))
-        ]
-        # maybe we could get rid of this loop
-        while descending_frequency_namespace_groups:
-            least_common_namespaces_group = descending_frequency_namespace_groups.pop()
+        waiting_jobs = JobDocument.objects(status=Status.WAITING, priority=priority, **filters)
+        waiting_namespaces = waiting_jobs.distinct("namespace")
+        # the started jobs are counted per namespace, whatever their type and difficulty. The namespaces without a
+        # total, or with a total of 0, have no started job.
+        started_jobs_totals = {
+            started_jobs_total.namespace: started_jobs_total.total
+            for started_jobs_total in StartedJobsTotalDocument.objects(
+                namespace__in=waiting_namespaces, total__gt=0
+            ).only("namespace", "total")
+        }
+        logging.debug(f"Started jobs totals: {started_jobs_totals}")
+        namespaces_by_started_jobs_total: DefaultDict[int, List[str]] = defaultdict(list)
+        for namespace in waiting_namespaces:
+            namespaces_by_started_jobs_total[started_jobs_totals.get(namespace, 0)].append(namespace)
+
+        # select the oldest waiting job for the namespaces with the least number of started jobs
+        for started_jobs_total in sorted(namespaces_by_started_jobs_total):
+            least_common_namespaces_group = namespaces_by_started_jobs_total[started_jobs_total]
             logging.debug(f"Least common namespaces group: {least_common_namespaces_group}")
-            next_waiting_job = (
-                JobDocument.objects(
-                    status=Status.WAITING,
-                    namespace__in=least_common_namespaces_group,
-                    unicity_id__nin=started_unicity_ids,
-                    priority=priority,
-                    **filters,
-                )
+            next_waiting_jobs = (
+                waiting_jobs.filter(namespace__in=least_common_namespaces_group)
                 .order_by("+created_at")
                 .only("type", "dataset", "revision", "config", "split", "priority", "unicity_id")
                 .no_cache()
-                .first()
             )
-            if next_waiting_job is not None:
-                return next_waiting_job
+            # ^ no_cache should generate a query on every iteration, which should solve concurrency issues between
+            # workers
+            if started_jobs_total == 0:
+                next_waiting_job = next_waiting_jobs.first()
+                if next_waiting_job is not None:
+                    return next_waiting_job
+                continue
+            # exclude the waiting jobs whose unicity_id is already in a started job, checking the oldest ones with an
+            # indexed query
+            candidate_jobs = list(next_waiting_jobs.limit(NEXT_WAITING_JOB_CANDIDATES))
+            candidate_unicity_ids = [candidate_job.unicity_id for candidate_job in candidate_jobs]
+            started_unicity_ids = {
+                started_job.unicity_id
+                for started_job in JobDocument.objects(
+                    status=Status.STARTED, unicity_id__in=candidate_unicity_ids
+                ).only("unicity_id")
+            }
+            for candidate_job in candidate_jobs:
+                if candidate_job.unicity_id not in started_unicity_ids:
+                    return candidate_job
         raise EmptyQueueError("no job available with the priority")
 
     def get_next_waiting_job(
@@ -644,7 +716,9 @@ class Queue:
     def _start_newest_job_and_cancel_others(self, job: JobDocument) -> JobDocument:
         """Start a job (the newest one for unicity_id) and cancel the other ones.
 
-        A lock is used to ensure that the job is not started by another worker.
+        The newest waiting job is claimed atomically (find_one_and_update). The claim is exclusive: the unique partial
+        index on the unicity_id of the started jobs rejects it if another job has already been started for the same
+        unicity_id. The older waiting jobs are cancelled only once the claim has succeeded.
 
         Args:
             job: the job to start
@@ -654,52 +728,32 @@ class Queue:
 
         Raises:
             AlreadyStartedJobError: if a started job already exist for the same unicity_id.
-            LockTimeoutError: if the lock could not be acquired after 20 retries.
+            NoWaitingJobError: if the waiting jobs for the same unicity_id have already been claimed by other workers.
         """
         # could be a method of Job
-        RETRIES = 20
-        # uuid is used to differentiate between workers
-        # otherwise another worker might acquire the lock
-        lock_owner = str(uuid4())
+        datetime = get_datetime()
+        # start the most recent one (the ids break the ties between the jobs created in the same millisecond)
         try:
-            # retry for 2 seconds
-            with lock(key=job.unicity_id, owner=lock_owner, sleeps=[0.1] * RETRIES):
-                # get all the pending jobs for the same unicity_id
-                waiting_jobs = JobDocument.objects(
-                    unicity_id=job.unicity_id, status__in=[Status.WAITING, Status.STARTED]
-                ).order_by("-created_at")
-                datetime = get_datetime()
-                # raise if any job has already been started for unicity_id
-                num_started_jobs = waiting_jobs(status=Status.STARTED).count()
-                if num_started_jobs > 0:
-                    if num_started_jobs > 1:
-                        logging.critical(f"job {job.unicity_id} has been started {num_started_jobs} times. Max is 1.")
-                    raise AlreadyStartedJobError(f"job {job.unicity_id} has been started by another worker")
-                # get the most recent one
-                first_job = waiting_jobs.first()
-                if not first_job:
-                    raise NoWaitingJobError(f"no waiting job could be found for {job.unicity_id}")
-                # start it
-                first_job.update(
-                    started_at=datetime,
-                    status=Status.STARTED,
-                    write_concern={"w": "majority", "fsync": True},
-                    read_concern={"level": "majority"},
-                )
-                # and cancel the other ones, if any
-                for job in waiting_jobs.skip(1):
-                    # TODO: try to do a bulk update (not sure it's possible)
-                    job.update(
-                        finished_at=datetime,
-                        status=Status.CANCELLED,
-                        write_concern={"w": "majority", "fsync": True},
-                        read_concern={"level": "majority"},
-                    )
-                return first_job.reload()
-        except TimeoutError as err:
-            raise LockTimeoutError(
-                f"could not acquire the lock for job {job.unicity_id} after {RETRIES} retries."
-            ) from err
+            first_job: Optional[JobDocument] = (
+                JobDocument.objects(unicity_id=job.unicity_id, status=Status.WAITING)
+                .order_by("-created_at", "-id")
+                .modify(new=True, started_at=datetime, status=Status.STARTED)  # type: ignore[assignment]
+            )
+        except NotUniqueError as err:
+            raise AlreadyStartedJobError(f"job {job.unicity_id} has been started by another worker") from err
+        if first_job is None:
+            raise NoWaitingJobError(f"no waiting job could be found for {job.unicity_id}")
+        increase_started_jobs_total(namespace=first_job.namespace)
+        # and cancel the older ones, if any, in one query. The jobs created in the meantime remain waiting.
+        JobDocument.objects(
+            unicity_id=job.unicity_id, status=Status.WAITING, created_at__lte=first_job.created_at
+        ).update(
+            finished_at=datetime,
+            status=Status.CANCELLED,
+            write_concern={"w": "majority", "fsync": True},
+            read_concern={"level": "majority"},
+        )
+        return first_job
 
     def start_job(
         self,
@@ -710,8 +764,8 @@ class Queue:
     ) -> JobInfo:
         """Start the next job in the queue.
 
-        The job is moved from the waiting state to the started state. A lock is used to ensure that only one worker
-        can start a job at a time.
+        The job is moved from the waiting state to the started state. The claim is atomic: only one worker can start
+        a job, and at most one job is started for a given unicity_id.
 
         Args:
             difficulty_min: if not None, only jobs with a difficulty greater or equal to this value are considered.
@@ -723,7 +777,7 @@ class Queue:
             EmptyQueueError: if there is no job in the queue, within the limit of the maximum number of started jobs
             for a dataset
             AlreadyStartedJobError: if a started job already exist for the same unicity_id
-            LockTimeoutError: if the lock cannot be acquired
+            NoWaitingJobError: if the job has been claimed by another worker in the meantime
 
         Returns: the job id, the type, the input arguments: dataset, revision, config and split
         """
@@ -748,6 +802,93 @@ class Queue:
         started_job = self._start_newest_job_and_cancel_others(job=next_waiting_job)
         return started_job.info()
 
+    def start_jobs(
+        self,
+        max_jobs: int,
+        batch_difficulty_max: int,
+        difficulty_min: Optional[int] = None,
+        difficulty_max: Optional[int] = None,
+        job_types_blocked: Optional[list[str]] = None,
+        job_types_only: Optional[list[str]] = None,
+    ) -> Iterator[JobInfo]:
+        """Start the next job in the queue and, if it's an easy job, other easy jobs to process back to back.
+
+        The first job is selected and started as in `start_job`. If its difficulty is lower or equal to
+        batch_difficulty_max, up to max_jobs - 1 other waiting jobs with the same priority and a difficulty lower or
+        equal to batch_difficulty_max are started after it. They are selected as in `start_job` (the namespaces with
+        the least started jobs first), one by one, only when the iterator reaches them: if the worker stops processing
+        the batch (a job raises, or the worker is killed), no other job is started. The batch ends early if there is
+        no such job anymore, or if the next job cannot be started (e.g. it has been claimed by another worker).
+
+        Args:
+            max_jobs (`int`): the maximum number of jobs to start.
+            batch_difficulty_max (`int`): the maximum difficulty of the jobs started together.
+            difficulty_min: if not None, only jobs with a difficulty greater or equal to this value are considered.
+            difficulty_max: if not None, only jobs with a difficulty lower or equal to this value are considered.
+            job_types_blocked: if not None, jobs of the given types are not considered.
+            job_types_only: if not None, only jobs of the given types are considered.
+
+        Raises:
+            EmptyQueueError: if there is no job in the queue, within the limit of the maximum number of started jobs
+            for a dataset
+            AlreadyStartedJobError: if a started job already exist for the same unicity_id as the first job
+            NoWaitingJobError: if the first job has been claimed by another worker in the meantime
+
+        Returns: an iterator over the started jobs, in the order in which they should be processed
+        """
+        # the first job is started now, to raise if there is no job to process
+        first_job_info = self.start_job(
+            difficulty_min=difficulty_min,
+            difficulty_max=difficulty_max,
+            job_types_blocked=job_types_blocked,
+            job_types_only=job_types_only,
+        )
+        if max_jobs <= 1 or first_job_info["difficulty"] > batch_difficulty_max:
+            return iter([first_job_info])
+        if difficulty_max is not None:
+            batch_difficulty_max = min(difficulty_max, batch_difficulty_max)
+        return self._start_batch_jobs(
+            first_job_info=first_job_info,
+            max_jobs=max_jobs,
+            difficulty_min=difficulty_min,
+            difficulty_max=batch_difficulty_max,
+            job_types_blocked=job_types_blocked,
+            job_types_only=job_types_only,
+        )
+
+    def _start_batch_jobs(
+        self,
+        first_job_info: JobInfo,
+        max_jobs: int,
+        difficulty_min: Optional[int] = None,
+        difficulty_max: Optional[int] = None,
+        job_types_blocked: Optional[list[str]] = None,
+        job_types_only: Optional[list[str]] = None,
+    ) -> Iterator[JobInfo]:
+        yield first_job_info
+        for _ in range(max_jobs - 1):
+            # the next job is selected and started only when the previous one has been processed
+            try:
+                next_waiting_job = self._get_next_waiting_job_for_priority(
+                    priority=first_job_info["priority"],
+                    difficulty_min=difficulty_min,
+                    difficulty_max=difficulty_max,
+                    job_types_blocked=job_types_blocked,
+                    job_types_only=job_types_only,
+                )
+                job_info = self._start_newest_job_and_cancel_others(job=next_waiting_job).info()
+            except EmptyQueueError:
+                return
+            except (AlreadyStartedJobError, NoWaitingJobError) as err:
+                # the job has been claimed by another worker in the meantime
+                logging.debug(f"end the batch: {err}")
+                return
+            except Exception:
+                # the jobs already processed are not affected, and the worker can select the next job as usual
+                logging.exception("end the batch: failed to start the next job")
+                return
+            yield job_info
+
     def get_job_with_id(self, job_id: str) -> JobDocument:
         """Get the job for a given job id.
 
@@ -827,16 +968,17 @@ class Queue:
             `bool`: whether the job existed, and had the expected format (STARTED status, non-empty started_at, empty
             finished_at) before finishing
         """
-        try:
-            job = self._get_started_job(job_id=job_id)
-        except DoesNotExist:
-            logging.error(f"job {job_id} does not exist. Aborting.")
-            return False
-        except StartedJobError as e:
-            logging.error(f"job {job_id} has not the expected format for a started job. Aborting: {e}")
-            return False
         finished_status = Status.SUCCESS if is_success else Status.ERROR
-        job.update(finished_at=get_datetime(), status=finished_status)
+        # check the job format and finish it in the same round trip. The job might have been cancelled in the meantime
+        job: Optional[JobDocument] = (
+            JobDocument.objects(pk=job_id, status=Status.STARTED, finished_at=None, started_at__ne=None)
+            .only("namespace")
+            .modify(finished_at=get_datetime(), status=finished_status)  # type: ignore[assignment]
+        )
+        if job is None:
+            logging.error(f"job {job_id} does not exist or has not the expected format for a started job. Aborting.")
+            return False
+        decrease_started_jobs_total(namespace=job.namespace)
         release_locks(owner=job_id)
         return True
 
@@ -977,6 +1119,18 @@ class Queue:
             )
         ]
 
+    def get_started_jobs_count_by_namespace(self) -> Dict[str, int]:
+        """Count the number of started jobs by namespace.
+
+        Returns: a dictionary with the number of started jobs for each namespace that has started jobs
+        """
+        return {
+            result["_id"]: result["total"]
+            for result in JobDocument.objects(status=Status.STARTED).aggregate(
+                [{"$group": {"_id": "$namespace", "total": {"$sum": 1}}}]
+            )
+        }
+
     def heartbeat(self, job_id: str) -> None:
         """Update the job `last_heartbeat` field with the current date.
         This is used to keep track of running jobs.
@@ -1018,9 +1172,81 @@ class Queue:
         return [zombie.info() for zombie in zombies]
 
 
+NEW_JOBS_WATCHER_MAX_AWAIT_TIME_MS = 1_000
+
+
+class NewJobsWatcher:
+    """Watch the creation of the jobs that a worker can process, to wake up the worker instead of polling the queue.
+
+    It relies on a MongoDB change stream on the jobs collection, which requires a replica set. The change stream is
+    opened on the first wait, and kept open between the waits so that the jobs created in the meantime are notified.
+
+    Args:
+        difficulty_min: if not None, only jobs with a difficulty greater or equal to this value are considered.
+        difficulty_max: if not None, only jobs with a difficulty lower or equal to this value are considered.
+        job_types_blocked: if not None, jobs of the given types are not considered.
+        job_types_only: if not None, only jobs of the given types are considered.
+    """
+
+    def __init__(
+        self,
+        difficulty_min: Optional[int] = None,
+        difficulty_max: Optional[int] = None,
+        job_types_blocked: Optional[list[str]] = None,
+        job_types_only: Optional[list[str]] = None,
+    ) -> None:
+        match: Dict[str, Any] = {"operationType": "insert"}
+        type_filter: Dict[str, List[str]] = {}
+        if job_types_blocked:
+            type_filter["$nin"] = job_types_blocked
+        if job_types_only:
+            type_filter["$in"] = job_types_only
+        if type_filter:
+            match["fullDocument.type"] = type_filter
+        difficulty_filter: Dict[str, int] = {}
+        if difficulty_min is not None and difficulty_min > DEFAULT_DIFFICULTY_MIN:
+            difficulty_filter["$gte"] = difficulty_min
+        if difficulty_max is not None and difficulty_max < DEFAULT_DIFFICULTY_MAX:
+            difficulty_filter["$lte"] = difficulty_max
+        if difficulty_filter:
+            match["fullDocument.difficulty"] = difficulty_filter
+        self.pipeline = [{"$match": match}]
+        self._change_stream: Optional[CollectionChangeStream] = None
+
+    def wait(self, timeout_seconds: float) -> bool:
+        """Wait until a job that matches the filters is created, or until the timeout.
+
+        Args:
+            timeout_seconds (`float`): the maximum time to wait. It can be exceeded by up to one second.
+
+        Raises:
+            [`pymongo.errors.PyMongoError`]: if the change stream cannot be opened, e.g. on a standalone server.
+
+        Returns:
+            `bool`: True if a job has been created, False if the timeout has been reached.
+        """
+        if self._change_stream is None:
+            self._change_stream = JobDocument._get_collection().watch(
+                self.pipeline, max_await_time_ms=NEW_JOBS_WATCHER_MAX_AWAIT_TIME_MS
+            )
+        deadline = time.monotonic() + timeout_seconds
+        while time.monotonic() < deadline:
+            # ^ try_next returns None if no job has been created during max_await_time_ms
+            if self._change_stream.try_next() is not None:  # type: ignore[attr-defined]
+                return True
+        return False
+
+    def close(self) -> None:
+        """Close the change stream, to forget the jobs created until now. It is reopened on the next wait."""
+        if self._change_stream is not None:
+            self._change_stream.close()
+            self._change_stream = None
+
+
 # only for the tests
 def _clean_queue_database() -> None:
     """Delete all the jobs in the database"""
     JobDocument.drop_collection()  # type: ignore
     JobTotalMetricDocument.drop_collection()  # type: ignore
     Lock.drop_collection()  # type: ignore
+    StartedJobsTotalDocument.drop_collection()  # type: ignore
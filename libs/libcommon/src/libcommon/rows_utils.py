@@ -1,13 +1,38 @@
 # SPDX-License-Identifier: Apache-2.0
 # Copyright 2023 The HuggingFace Authors.
 
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, List, Optional, TypeVar
 
-from datasets import Features
+import pyarrow as pa
+from datasets import Audio, Features, Image
 
 from libcommon.storage import StrPath
 from libcommon.utils import Row
-from libcommon.viewer_utils.features import get_cell_value
+from libcommon.viewer_utils.features import get_cell_value, get_lazy_asset_cell_value
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def get_executor(max_workers: int) -> ThreadPoolExecutor:
+    # one executor per process (the number of workers is set by the configuration), shared by the calls: the number of
+    # threads is bounded, even with concurrent calls, and the threads are reused
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transform_rows")
+
+
+def map_rows(transform_row: Callable[[int, T], Row], rows: List[T], max_workers: int = 1) -> List[Row]:
+    """
+    Apply transform_row to the index and the value of every row, in order.
+
+    If max_workers is greater than 1, the rows are transformed in parallel by a process-wide pool of max_workers
+    threads: encoding the images (PIL) and the audio files (soundfile, and ffmpeg through pydub) releases the GIL, so
+    that the time to transform a page of media rows scales with the number of cores instead of the number of rows.
+    """
+    if max_workers <= 1 or len(rows) <= 1:
+        return [transform_row(row_idx, row) for row_idx, row in enumerate(rows)]
+    return list(get_executor(max_workers).map(transform_row, range(len(rows)), rows))
 
 
 def transform_rows(
@@ -20,21 +45,78 @@ def transform_rows(
     cached_assets_directory: StrPath,
     offset: int,
     row_idx_column: Optional[str],
+    revision: Optional[str] = None,
+    max_workers: int = 1,
+    lazy_assets_url: Optional[str] = None,
 ) -> List[Row]:
-    return [
-        {
-            featureName: get_cell_value(
-                dataset=dataset,
-                config=config,
-                split=split,
-                row_idx=offset + row_idx if row_idx_column is None else row[row_idx_column],
-                cell=row[featureName] if featureName in row else None,
-                featureName=featureName,
-                fieldType=fieldType,
-                assets_base_url=cached_assets_base_url,
-                assets_directory=cached_assets_directory,
-            )
-            for (featureName, fieldType) in features.items()
-        }
-        for row_idx, row in enumerate(rows)
+    """
+    Transform the cells of the rows, e.g. save the images and audio files to the assets directory and return their URL.
+
+    The rows are transformed in parallel by a pool of max_workers threads, see map_rows.
+
+    If the revision is passed, the assets file names contain it, and the assets that already exist for this revision
+    are not written again.
+
+    If lazy_assets_url is passed, the assets of the top-level Image and Audio columns are not created: the cells
+    contain the URL of the assets route, which creates them on the first request.
+    """
+
+    def transform_row(row_idx: int, row: Row) -> Row:
+        transformed_row = {}
+        for featureName, fieldType in features.items():
+            cell_row_idx = offset + row_idx if row_idx_column is None else row[row_idx_column]
+            cell = row[featureName] if featureName in row else None
+            if lazy_assets_url is not None and isinstance(fieldType, (Image, Audio)):
+                transformed_row[featureName] = get_lazy_asset_cell_value(
+                    dataset=dataset,
+                    config=config,
+                    split=split,
+                    row_idx=cell_row_idx,
+                    cell=cell,
+                    featureName=featureName,
+                    fieldType=fieldType,
+                    lazy_assets_url=lazy_assets_url,
+                    revision=revision,
+                )
+            else:
+                transformed_row[featureName] = get_cell_value(
+                    dataset=dataset,
+                    config=config,
+                    split=split,
+                    row_idx=cell_row_idx,
+                    cell=cell,
+                    featureName=featureName,
+                    fieldType=fieldType,
+                    assets_base_url=cached_assets_base_url,
+                    assets_directory=cached_assets_directory,
+                    overwrite=revision is None,
+                    revision=revision,
+                )
+        return transformed_row
+
+    return map_rows(transform_row, rows, max_workers=max_workers)
+
+
+def to_rows(pa_table: pa.Table, columns: List[str]) -> List[Row]:
+    """
+    Convert a pyarrow table to a list of rows, column by column, without transforming the cells.
+
+    It is much faster than transform_rows on pa_table.to_pylist(), because it avoids the per-cell Python recursion, but
+    it must only be used when no cell has to be transformed, ie. when no column contains an Image or an Audio.
+
+    Args:
+        pa_table (`pa.Table`): The table to convert.
+        columns (`List[str]`): The columns of the rows, in order. The columns missing in the table are filled with
+          None.
+
+    Returns:
+        `List[Row]`: The rows.
+    """
+    num_rows = pa_table.num_rows
+    if not columns:
+        return [{} for _ in range(num_rows)]
+    table_columns = set(pa_table.column_names)
+    values = [
+        pa_table.column(column).to_pylist() if column in table_columns else [None] * num_rows for column in columns
     ]
+    return [dict(zip(columns, row_values)) for row_values in zip(*values)]
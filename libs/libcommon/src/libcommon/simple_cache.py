@@ -14,6 +14,7 @@ from typing import (
     NamedTuple,
     Optional,
     Set,
+    Tuple,
     Type,
     TypedDict,
     TypeVar,
@@ -35,11 +36,14 @@ from mongoengine.fields import (
     StringField,
 )
 from mongoengine.queryset.queryset import QuerySet
+from pymongo import UpdateOne
 
 from libcommon.constants import (
     CACHE_COLLECTION_RESPONSES,
     CACHE_METRICS_COLLECTION,
     CACHE_MONGOENGINE_ALIAS,
+    CACHE_SPLIT_REQUESTS_COLLECTION,
+    CACHE_SPLIT_REQUESTS_TTL_SECONDS,
 )
 from libcommon.utils import JobParams, get_datetime
 
@@ -154,6 +158,44 @@ class CacheTotalMetricDocument(Document):
     objects = QuerySetManager["CacheTotalMetricDocument"]()
 
 
+class SplitRequestsDocument(Document):
+    """Number of requests to the rows of a split, used to warm the caches of the /rows service on startup.
+
+    The documents of the splits that have not been requested for CACHE_SPLIT_REQUESTS_TTL_SECONDS are deleted.
+
+    Args:
+        dataset (`str`): The requested dataset.
+        config (`str`): The requested config.
+        split (`str`): The requested split.
+        num_requests (`int`): The number of requests.
+        last_requested_at (`datetime`): When the split has been last requested.
+    """
+
+    id = ObjectIdField(db_field="_id", primary_key=True, default=ObjectId)
+    dataset = StringField(required=True)
+    config = StringField(required=True)
+    split = StringField(required=True)
+    num_requests = IntField(required=True, default=0)
+    last_requested_at = DateTimeField(default=get_datetime)
+
+    meta = {
+        "collection": CACHE_SPLIT_REQUESTS_COLLECTION,
+        "db_alias": CACHE_MONGOENGINE_ALIAS,
+        "indexes": [
+            {
+                "fields": ["dataset", "config", "split"],
+                "unique": True,
+            },
+            ("-num_requests",),
+            {
+                "fields": ["last_requested_at"],
+                "expireAfterSeconds": CACHE_SPLIT_REQUESTS_TTL_SECONDS,
+            },
+        ],
+    }
+    objects = QuerySetManager["SplitRequestsDocument"]()
+
+
 # Fix issue with mongoengine: https://github.com/MongoEngine/mongoengine/issues/1242#issuecomment-810501601
 # mongoengine automatically sets "config" and "splits" as required fields, because they are listed in the unique_with
 # field of the "kind" field. But it's an error, since unique indexes (which are used to enforce unique_with) accept
@@ -188,6 +230,27 @@ def decrease_metric_for_artifact(kind: str, dataset: str, config: Optional[str],
     decrease_metric(kind=kind, http_status=existing_cache.http_status, error_code=existing_cache.error_code)
 
 
+class CacheTotalMetricKey(NamedTuple):
+    kind: str
+    http_status: int
+    error_code: Optional[str]
+
+
+def _update_metrics_in_bulk(increases: Mapping[CacheTotalMetricKey, int]) -> None:
+    # a single round trip to the database, and none if the changes cancel each other out
+    operations = [
+        UpdateOne(
+            {"kind": key.kind, "http_status": int(key.http_status), "error_code": key.error_code},
+            {"$inc": {"total": increase_by}},
+            upsert=True,
+        )
+        for key, increase_by in increases.items()
+        if increase_by != 0
+    ]
+    if operations:
+        CacheTotalMetricDocument._get_collection().bulk_write(operations, ordered=False)
+
+
 # Note: we let the exceptions throw (ie DocumentTooLarge): it's the responsibility of the caller to manage them
 def upsert_response(
     kind: str,
@@ -203,18 +266,31 @@ def upsert_response(
     progress: Optional[float] = None,
     updated_at: Optional[datetime] = None,
 ) -> None:
-    decrease_metric_for_artifact(kind=kind, dataset=dataset, config=config, split=split)
-    CachedResponseDocument.objects(kind=kind, dataset=dataset, config=config, split=split).upsert_one(
-        content=content,
-        http_status=http_status,
-        error_code=error_code,
-        details=details,
-        dataset_git_revision=dataset_git_revision,
-        progress=progress,
-        updated_at=updated_at or get_datetime(),
-        job_runner_version=job_runner_version,
+    # get the previous entry in the same round trip as the upsert, to update the metrics
+    previous_response: Optional[CachedResponseDocument] = (
+        CachedResponseDocument.objects(kind=kind, dataset=dataset, config=config, split=split)
+        .only("http_status", "error_code")
+        .modify(  # type: ignore[assignment]
+            upsert=True,
+            content=content,
+            http_status=http_status,
+            error_code=error_code,
+            details=details,
+            dataset_git_revision=dataset_git_revision,
+            progress=progress,
+            updated_at=updated_at or get_datetime(),
+            job_runner_version=job_runner_version,
+        )
     )
-    increase_metric(kind=kind, http_status=http_status, error_code=error_code)
+    increases: Dict[CacheTotalMetricKey, int] = {
+        CacheTotalMetricKey(kind=kind, http_status=http_status, error_code=error_code): DEFAULT_INCREASE_AMOUNT
+    }
+    if previous_response is not None:
+        previous_key = CacheTotalMetricKey(
+            kind=kind, http_status=previous_response.http_status, error_code=previous_response.error_code
+        )
+        increases[previous_key] = increases.get(previous_key, 0) + DEFAULT_DECREASE_AMOUNT
+    _update_metrics_in_bulk(increases)
 
 
 def upsert_response_params(
@@ -878,7 +954,37 @@ def fetch_names(
         return []
 
 
+def increase_split_requests(dataset: str, config: str, split: str) -> None:
+    increase_splits_requests({SplitFullName(dataset=dataset, config=config, split=split): (1, get_datetime())})
+
+
+def increase_splits_requests(splits_requests: Mapping[SplitFullName, Tuple[int, datetime]]) -> None:
+    """Add the requests to several splits (number of requests, time of the last request), in one round trip."""
+    operations = [
+        UpdateOne(
+            {"dataset": split_full_name.dataset, "config": split_full_name.config, "split": split_full_name.split},
+            {"$inc": {"num_requests": num_requests}, "$max": {"last_requested_at": last_requested_at}},
+            upsert=True,
+        )
+        for split_full_name, (num_requests, last_requested_at) in splits_requests.items()
+    ]
+    if operations:
+        SplitRequestsDocument._get_collection().bulk_write(operations, ordered=False)
+
+
+def get_most_requested_splits(limit: int) -> List[SplitFullName]:
+    """Get the splits with the most requests, in decreasing order of number of requests"""
+    return [
+        SplitFullName(dataset=document.dataset, config=document.config, split=document.split)
+        for document in SplitRequestsDocument.objects()
+        .order_by("-num_requests")
+        .only("dataset", "config", "split")
+        .limit(limit)
+    ]
+
+
 # only for the tests
 def _clean_cache_database() -> None:
     CachedResponseDocument.drop_collection()  # type: ignore
     CacheTotalMetricDocument.drop_collection()  # type: ignore
+    SplitRequestsDocument.drop_collection()  # type: ignore
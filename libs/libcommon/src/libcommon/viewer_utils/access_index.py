@@ -0,0 +1,381 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import contextlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import (
+    ContextManager,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+
+import orjson
+
+from libcommon.storage import StrPath
+
+ACCESS_INDEX_FILENAME = ".access-index.sqlite"
+ACCESS_INDEX_TIMEOUT_SECONDS = 5.0
+ACCESS_INDEX_MAX_PENDING_ROWS = 10_000
+ACCESS_LOGS_DIRNAME = ".access-logs"
+ACCESS_LOG_ROTATION_SECONDS = 300
+LAST_CLEANING_FILENAME = ".last-cleaning.json"
+
+RowKey = Tuple[str, str, str, int]
+# ^ (dataset, config, split, row_idx)
+
+
+@contextlib.contextmanager
+def connect(path: Path) -> Generator[sqlite3.Connection, None, None]:
+    # one short-lived connection per operation: the index is used by several threads and processes
+    connection = sqlite3.connect(path, timeout=ACCESS_INDEX_TIMEOUT_SECONDS)
+    try:
+        with connection:
+            # ^ commits, or rolls back on error
+            yield connection
+    finally:
+        connection.close()
+
+
+class AssetsCleaning(TypedDict):
+    cleaned_at: float
+    num_bytes: int
+    reclaimed_bytes: int
+    deleted_rows_number: int
+
+
+def get_access_log_period(now: float) -> int:
+    return int(now // ACCESS_LOG_ROTATION_SECONDS)
+
+
+class AssetsAccessLog:
+    """
+    An append-only log of the accesses to the rows directories of an assets directory, written by the services.
+
+    The assets directory is shared by the pods of several services (on NFS), where the SQLite locks are not reliable:
+    the services don't write to the access index. Instead, every process appends its accesses to its own log files,
+    in the `.access-logs` subdirectory, and starts a new file every `ACCESS_LOG_ROTATION_SECONDS` seconds, so that
+    every file has a single writer. The accesses are buffered in memory and written in batches, at most every
+    `flush_interval_seconds` seconds. The cache maintenance job, the only writer of the access index, merges the
+    complete files into the index, then deletes them (see `AssetsAccessIndex.merge_access_logs`).
+
+    Args:
+        assets_directory (`StrPath`): the assets directory, where the access logs are stored.
+        flush_interval_seconds (`float`): the minimal time between two writes to the log. 0 means that the accesses
+          are written immediately.
+    """
+
+    def __init__(self, assets_directory: StrPath, flush_interval_seconds: float):
+        self.directory = Path(assets_directory).resolve() / ACCESS_LOGS_DIRNAME
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_interval_seconds = flush_interval_seconds
+        self._pending: Dict[RowKey, float] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record_access(self, dataset: str, config: str, split: str, row_indices: Iterable[int]) -> None:
+        """Record the access to some rows of a split. The log is written if the flush interval has elapsed."""
+        now = time.time()
+        with self._lock:
+            for row_idx in row_indices:
+                self._pending[(dataset, config, split, row_idx)] = now
+            should_flush = (
+                time.monotonic() - self._last_flush >= self.flush_interval_seconds
+                or len(self._pending) >= ACCESS_INDEX_MAX_PENDING_ROWS
+            )
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append the pending accesses to the log file of the process."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        content = b"".join(orjson.dumps([*row_key, last_access]) + b"\n" for row_key, last_access in pending.items())
+        # the pid is read on every write: the app can be created before the workers are forked
+        path = self.directory / f"{get_access_log_period(time.time())}-{socket.gethostname()}-{os.getpid()}.jsonl"
+        try:
+            with self._write_lock, path.open("ab") as f:
+                f.write(content)
+        except OSError:
+            logging.warning(f"failed to write {len(pending)} accesses to {path}, they will be retried")
+            with self._lock:
+                for row_key, last_access in pending.items():
+                    self._pending.setdefault(row_key, last_access)
+
+
+def record_cleaning(assets_directory: StrPath, num_bytes: int, reclaimed_bytes: int, deleted_rows_number: int) -> None:
+    """Store the result of a run of the cleaning job, so that the services can report it. Only the last one is kept."""
+    path = Path(assets_directory).resolve() / LAST_CLEANING_FILENAME
+    cleaning: AssetsCleaning = {
+        "cleaned_at": time.time(),
+        "num_bytes": num_bytes,
+        "reclaimed_bytes": reclaimed_bytes,
+        "deleted_rows_number": deleted_rows_number,
+    }
+    # written to a temporary file, then renamed, so that the readers never get a partial file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(orjson.dumps(cleaning))
+    os.replace(tmp_path, path)
+
+
+def get_last_cleaning(assets_directory: StrPath) -> Optional[AssetsCleaning]:
+    """Get the result of the last run of the cleaning job, if any."""
+    path = Path(assets_directory).resolve() / LAST_CLEANING_FILENAME
+    try:
+        cleaning: AssetsCleaning = orjson.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logging.warning(f"failed to read the last cleaning from {path}")
+        return None
+    return cleaning
+
+
+class AssetsAccessIndex:
+    """
+    An index of the last access time of the rows directories in an assets directory.
+
+    It replaces the "last modified time" of the rows directories, which required to touch a file in every row
+    directory on access, and to glob and stat the whole dataset directory on cleaning. The index is a SQLite database
+    stored in the assets directory, and it is only used by the cache maintenance job that evicts the least recently
+    accessed rows (see `clean-cached-assets`), which runs one instance at a time. The services record the accesses to
+    the append-only access logs (see `AssetsAccessLog`), that the job merges into the index.
+
+    The size of the rows directories is measured afterwards, out of the request path, by the job, and measured again
+    if they have been accessed since, because assets can be added to an existing row. The job also adds the rows
+    directories that are missing from the index (created before the index, or whose accesses have been lost) from a
+    periodic scan of the directory.
+
+    Args:
+        assets_directory (`StrPath`): the assets directory, where the SQLite database is stored.
+    """
+
+    def __init__(self, assets_directory: StrPath):
+        self.path = Path(assets_directory).resolve() / ACCESS_INDEX_FILENAME
+        self.access_logs_directory = self.path.parent / ACCESS_LOGS_DIRNAME
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rows_access (dataset TEXT NOT NULL, config TEXT NOT NULL, split TEXT NOT"
+                " NULL, row_idx INTEGER NOT NULL, last_access REAL NOT NULL, num_bytes INTEGER, measured_at REAL,"
+                " PRIMARY KEY (dataset, config, split, row_idx))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS rows_access_last_access ON rows_access (last_access)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS rows_access_to_measure ON rows_access (measured_at) WHERE measured_at IS"
+                " NULL OR measured_at < last_access"
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS scans (scanned_at REAL NOT NULL)")
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return connect(self.path)
+
+    def add_accesses(self, rows_last_access: Iterable[Tuple[RowKey, float]]) -> None:
+        """Store the last access time of rows. The most recent access is kept."""
+        with self._connect() as connection:
+            connection.executemany(
+                (
+                    "INSERT INTO rows_access (dataset, config, split, row_idx, last_access) VALUES (?, ?, ?, ?, ?) ON"
+                    " CONFLICT (dataset, config, split, row_idx) DO UPDATE SET last_access = max(last_access,"
+                    " excluded.last_access)"
+                ),
+                [(*row_key, last_access) for row_key, last_access in rows_last_access],
+            )
+
+    def merge_access_logs(self) -> int:
+        """Merge the complete access logs into the index, then delete them. Return the number of merged rows."""
+        # a file can be written until the end of its period, and a write started before can take some time
+        max_period = get_access_log_period(time.time()) - 2
+        merged_rows_number = 0
+        for path in sorted(self.access_logs_directory.glob("*.jsonl")):
+            period, _, _ = path.name.partition("-")
+            if not period.isdigit() or int(period) > max_period:
+                continue
+            rows_last_access: Dict[RowKey, float] = {}
+            with path.open("rb") as f:
+                for line in f:
+                    try:
+                        dataset, config, split, row_idx, last_access = orjson.loads(line)
+                    except (ValueError, TypeError):
+                        # e.g. the last line of a process that has been killed while writing
+                        logging.warning(f"ignoring an invalid line in the access log {path}")
+                        continue
+                    row_key = (dataset, config, split, row_idx)
+                    rows_last_access[row_key] = max(last_access, rows_last_access.get(row_key, last_access))
+            self.add_accesses(rows_last_access.items())
+            path.unlink()
+            merged_rows_number += len(rows_last_access)
+        return merged_rows_number
+
+    def add_rows(self, rows_last_access: Iterable[Tuple[RowKey, float]]) -> int:
+        """Add the rows that are missing from the index, and return the number of added rows."""
+        with self._connect() as connection:
+            cursor = connection.executemany(
+                (
+                    "INSERT INTO rows_access (dataset, config, split, row_idx, last_access) VALUES (?, ?, ?, ?, ?) ON"
+                    " CONFLICT (dataset, config, split, row_idx) DO NOTHING"
+                ),
+                [(*row_key, last_access) for row_key, last_access in rows_last_access],
+            )
+            return cursor.rowcount
+
+    def get_rows_to_measure(self, max_rows_number: int) -> List[RowKey]:
+        """Get rows whose directory size has not been measured yet, then rows accessed since they were measured."""
+        with self._connect() as connection:
+            return [
+                (dataset, config, split, row_idx)
+                for dataset, config, split, row_idx in connection.execute(
+                    (
+                        "SELECT dataset, config, split, row_idx FROM rows_access WHERE measured_at IS NULL OR"
+                        " measured_at < last_access ORDER BY measured_at ASC LIMIT ?"
+                    ),
+                    (max_rows_number,),
+                )
+            ]
+
+    def set_num_bytes(self, rows_num_bytes: Iterable[Tuple[RowKey, int]], measured_at: float) -> None:
+        """Store the size of the rows directories, measured after `measured_at`."""
+        with self._connect() as connection:
+            connection.executemany(
+                (
+                    "UPDATE rows_access SET num_bytes = ?, measured_at = ? WHERE dataset = ? AND config = ? AND split"
+                    " = ? AND row_idx = ?"
+                ),
+                [(num_bytes, measured_at, *row_key) for row_key, num_bytes in rows_num_bytes],
+            )
+
+    def get_num_bytes(self) -> int:
+        """Get the total size of the measured rows directories."""
+        with self._connect() as connection:
+            (num_bytes,) = connection.execute("SELECT COALESCE(SUM(num_bytes), 0) FROM rows_access").fetchone()
+        return int(num_bytes)
+
+    def get_least_recently_accessed_rows(self, max_rows_number: int) -> List[Tuple[RowKey, int]]:
+        """Get the least recently accessed rows, among the measured ones, with the size of their directory."""
+        with self._connect() as connection:
+            return [
+                ((dataset, config, split, row_idx), num_bytes)
+                for dataset, config, split, row_idx, num_bytes in connection.execute(
+                    (
+                        "SELECT dataset, config, split, row_idx, num_bytes FROM rows_access WHERE num_bytes IS NOT"
+                        " NULL ORDER BY last_access ASC LIMIT ?"
+                    ),
+                    (max_rows_number,),
+                )
+            ]
+
+    def delete_rows(self, row_keys: Iterable[RowKey]) -> None:
+        """Remove rows from the index, once their directories have been deleted."""
+        with self._connect() as connection:
+            connection.executemany(
+                "DELETE FROM rows_access WHERE dataset = ? AND config = ? AND split = ? AND row_idx = ?",
+                list(row_keys),
+            )
+
+    def record_scan(self, scanned_at: float) -> None:
+        """Store the time of the last scan of the directory by the cleaning job."""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM scans")
+            connection.execute("INSERT INTO scans (scanned_at) VALUES (?)", (scanned_at,))
+
+    def get_last_scan_time(self) -> Optional[float]:
+        """Get the time of the last scan of the directory by the cleaning job, if any."""
+        with self._connect() as connection:
+            row = connection.execute("SELECT scanned_at FROM scans").fetchone()
+        return None if row is None else float(row[0])
+
+
+class IndexesAccessIndex:
+    """
+    An index of the last access time of the index files downloaded to a directory, e.g. the DuckDB indexes of /search.
+
+    The access time of the files cannot be used to find the least recently used indexes: it is often not updated
+    (`noatime` mount option), and updating it on every request writes to the disk. The accesses are buffered in memory
+    and written to a SQLite database (stored in the directory, and shared by the processes) in batches, at most every
+    `flush_interval_seconds` seconds. The files are identified by their path relative to the directory.
+
+    Args:
+        indexes_directory (`StrPath`): the directory of the index files, where the SQLite database is stored.
+        flush_interval_seconds (`float`): the minimal time between two writes to the database. 0 means that the
+          accesses are written immediately.
+    """
+
+    def __init__(self, indexes_directory: StrPath, flush_interval_seconds: float):
+        self.directory = Path(indexes_directory).resolve()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / ACCESS_INDEX_FILENAME
+        self.flush_interval_seconds = flush_interval_seconds
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS files_access (path TEXT NOT NULL PRIMARY KEY, last_access REAL NOT NULL)"
+            )
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return connect(self.path)
+
+    def get_relative_path(self, file_location: StrPath) -> str:
+        return str(Path(file_location).resolve().relative_to(self.directory))
+
+    def record_access(self, *file_locations: StrPath) -> None:
+        """Record the access to files of the directory. The database is updated if the flush interval has elapsed."""
+        relative_paths = [self.get_relative_path(file_location) for file_location in file_locations]
+        now = time.time()
+        with self._lock:
+            for relative_path in relative_paths:
+                self._pending[relative_path] = now
+            should_flush = time.monotonic() - self._last_flush >= self.flush_interval_seconds
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending accesses to the database."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    (
+                        "INSERT INTO files_access (path, last_access) VALUES (?, ?) ON CONFLICT (path) DO UPDATE SET"
+                        " last_access = max(last_access, excluded.last_access)"
+                    ),
+                    list(pending.items()),
+                )
+        except sqlite3.Error:
+            logging.warning(f"failed to write {len(pending)} accesses to {self.path}, they will be retried")
+            with self._lock:
+                for relative_path, last_access in pending.items():
+                    self._pending.setdefault(relative_path, last_access)
+
+    def get_last_accesses(self) -> Dict[str, float]:
+        """Get the last access time of the files, by path relative to the directory."""
+        with self._connect() as connection:
+            return {
+                relative_path: last_access
+                for relative_path, last_access in connection.execute("SELECT path, last_access FROM files_access")
+            }
+
+    def delete_files(self, relative_paths: Iterable[str]) -> None:
+        """Remove files from the index, once they have been deleted."""
+        with self._connect() as connection:
+            connection.executemany(
+                "DELETE FROM files_access WHERE path = ?", [(relative_path,) for relative_path in relative_paths]
+            )
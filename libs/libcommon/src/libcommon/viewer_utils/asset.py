@@ -3,6 +3,7 @@
 
 import contextlib
 import os
+import threading
 from os import makedirs
 from pathlib import Path
 from typing import Generator, List, Tuple, TypedDict
@@ -16,7 +17,6 @@ from libcommon.storage import StrPath
 
 DATASET_SEPARATOR = "--"
 ASSET_DIR_MODE = 0o755
-DATASETS_SERVER_MDATE_FILENAME = ".dss"
 
 
 def create_asset_dir(
@@ -28,37 +28,19 @@ def create_asset_dir(
     return dir_path, url_dir_path
 
 
-def glob_rows_in_assets_dir(
-    dataset: str,
-    assets_directory: StrPath,
-) -> Generator[Path, None, None]:
-    return Path(assets_directory).resolve().glob(os.path.join(dataset, DATASET_SEPARATOR, "*", "*", "*"))
-
-
-def update_directory_modification_date(path: Path) -> None:
-    if path.is_dir():
-        # update the directory's last modified date
-        temporary_file = path / DATASETS_SERVER_MDATE_FILENAME
-        if temporary_file.is_dir():
-            raise ValueError(f"Cannot create temporary file {temporary_file} in {path}")
-        temporary_file.touch(exist_ok=True)
-        if temporary_file.is_file():
-            with contextlib.suppress(FileNotFoundError):
-                temporary_file.unlink()
-
-
-def update_last_modified_date_of_rows_in_assets_dir(
-    dataset: str,
-    config: str,
-    split: str,
-    offset: int,
-    length: int,
-    assets_directory: StrPath,
-) -> None:
-    update_directory_modification_date(Path(assets_directory).resolve() / dataset.split("/")[0])
-    row_dirs_path = Path(assets_directory).resolve() / dataset / DATASET_SEPARATOR / config / split
-    for row_idx in range(offset, offset + length):
-        update_directory_modification_date(row_dirs_path / str(row_idx))
+@contextlib.contextmanager
+def atomic_asset_path(file_path: Path) -> Generator[Path, None, None]:
+    """
+    Yield a temporary path, in the same directory and with the same extension as file_path, and move it to file_path
+    once written. Concurrent requests for the same asset never see a partially written file.
+    """
+    temporary_file_path = file_path.with_name(f".{os.getpid()}-{threading.get_ident()}-{file_path.name}")
+    try:
+        yield temporary_file_path
+        os.replace(temporary_file_path, file_path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            temporary_file_path.unlink()
 
 
 class ImageSource(TypedDict):
@@ -90,7 +72,8 @@ def create_image_file(
     makedirs(dir_path, ASSET_DIR_MODE, exist_ok=True)
     file_path = dir_path / filename
     if overwrite or not file_path.exists():
-        image.save(file_path)
+        with atomic_asset_path(file_path) as temporary_file_path:
+            image.save(temporary_file_path)
     return {
         "src": f"{assets_base_url}/{url_dir_path}/{filename}",
         "height": image.height,
@@ -130,10 +113,12 @@ def create_audio_files(
     wav_file_path = dir_path / wav_filename
     mp3_file_path = dir_path / mp3_filename
     if overwrite or not wav_file_path.exists():
-        soundfile.write(wav_file_path, array, sampling_rate)
+        with atomic_asset_path(wav_file_path) as temporary_file_path:
+            soundfile.write(temporary_file_path, array, sampling_rate)
     if overwrite or not mp3_file_path.exists():
         segment = AudioSegment.from_wav(wav_file_path)
-        segment.export(mp3_file_path, format="mp3")
+        with atomic_asset_path(mp3_file_path) as temporary_file_path:
+            segment.export(temporary_file_path, format="mp3")
     return [
         {"src": f"{assets_base_url}/{url_dir_path}/{mp3_filename}", "type": "audio/mpeg"},
         {"src": f"{assets_base_url}/{url_dir_path}/{wav_filename}", "type": "audio/wav"},
@@ -4,6 +4,7 @@
 import json
 from io import BytesIO
 from typing import Any, List, Optional, Tuple, Union
+from urllib.parse import urlencode
 from zlib import adler32
 
 from datasets import (
@@ -28,6 +29,8 @@ from libcommon.storage import StrPath
 from libcommon.utils import FeatureItem
 from libcommon.viewer_utils.asset import create_audio_files, create_image_file
 
+REVISION_SUFFIX_LENGTH = 7
+
 
 def append_hash_suffix(string: str, json_path: Optional[List[Union[str, int]]] = None) -> str:
     """
@@ -46,6 +49,23 @@ def append_hash_suffix(string: str, json_path: Optional[List[Union[str, int]]] =
     return f"{string}-{hex(adler32(json.dumps(json_path).encode()))[2:]}" if json_path else string
 
 
+def append_revision_suffix(string: str, revision: Optional[str] = None) -> str:
+    """
+    Append the short revision to a string.
+    Args:
+        string (``str``): The string to append the revision to.
+        revision (``str``, optional): the git revision of the dataset
+    Returns:
+        the string suffixed with the first characters of the revision
+
+    Details:
+    - no suffix if the revision is None
+    - the assets of different revisions have different file names, so that an asset that already exists for the
+      current revision does not have to be written again
+    """
+    return f"{string}-{revision[:REVISION_SUFFIX_LENGTH]}" if revision else string
+
+
 def image(
     dataset: str,
     config: str,
@@ -57,6 +77,7 @@ def image(
     assets_directory: StrPath,
     json_path: Optional[List[Union[str, int]]] = None,
     overwrite: bool = True,
+    revision: Optional[str] = None,
 ) -> Any:
     if value is None:
         return None
@@ -76,7 +97,7 @@ def image(
                 split=split,
                 row_idx=row_idx,
                 column=featureName,
-                filename=f"{append_hash_suffix('image', json_path)}{ext}",
+                filename=f"{append_revision_suffix(append_hash_suffix('image', json_path), revision)}{ext}",
                 image=value,
                 assets_base_url=assets_base_url,
                 assets_directory=assets_directory,
@@ -101,6 +122,7 @@ def audio(
     assets_directory: StrPath,
     json_path: Optional[List[Union[str, int]]] = None,
     overwrite: bool = True,
+    revision: Optional[str] = None,
 ) -> Any:
     if value is None:
         return None
@@ -128,7 +150,7 @@ def audio(
         array=array,
         sampling_rate=sampling_rate,
         assets_base_url=assets_base_url,
-        filename_base=append_hash_suffix("audio", json_path),
+        filename_base=append_revision_suffix(append_hash_suffix("audio", json_path), revision),
         assets_directory=assets_directory,
         overwrite=overwrite,
     )
@@ -146,6 +168,7 @@ def get_cell_value(
     assets_directory: StrPath,
     json_path: Optional[List[Union[str, int]]] = None,
     overwrite: bool = True,
+    revision: Optional[str] = None,
 ) -> Any:
     # always allow None values in the cells
     if cell is None:
@@ -162,6 +185,7 @@ def get_cell_value(
             assets_directory=assets_directory,
             json_path=json_path,
             overwrite=overwrite,
+            revision=revision,
         )
     elif isinstance(fieldType, Audio):
         return audio(
@@ -175,6 +199,7 @@ def get_cell_value(
             assets_directory=assets_directory,
             json_path=json_path,
             overwrite=overwrite,
+            revision=revision,
         )
     elif isinstance(fieldType, list):
         if type(cell) != list:
@@ -195,6 +220,7 @@ def get_cell_value(
                 assets_directory=assets_directory,
                 json_path=json_path + [idx] if json_path else [idx],
                 overwrite=overwrite,
+                revision=revision,
             )
             for (idx, subCell) in enumerate(cell)
         ]
@@ -215,6 +241,7 @@ def get_cell_value(
                     assets_directory=assets_directory,
                     json_path=json_path + [idx] if json_path else [idx],
                     overwrite=overwrite,
+                    revision=revision,
                 )
                 for (idx, subCell) in enumerate(cell)
             ]
@@ -238,6 +265,7 @@ def get_cell_value(
                         assets_directory=assets_directory,
                         json_path=json_path + [key, idx] if json_path else [key, idx],
                         overwrite=overwrite,
+                        revision=revision,
                     )
                     for (idx, subCellItem) in enumerate(subCell)
                 ]
@@ -261,6 +289,7 @@ def get_cell_value(
                 assets_directory=assets_directory,
                 json_path=json_path + [key] if json_path else [key],
                 overwrite=overwrite,
+                revision=revision,
             )
             for (key, subCell) in cell.items()
         }
@@ -282,6 +311,89 @@ def get_cell_value(
         raise TypeError("could not determine the type of the data cell.")
 
 
+def get_lazy_asset_url(
+    lazy_assets_url: str,
+    dataset: str,
+    config: str,
+    split: str,
+    row_idx: int,
+    column: str,
+    revision: Optional[str] = None,
+    format: Optional[str] = None,
+) -> str:
+    """
+    Get the deterministic URL of an asset that is created on the first request to the assets route (see
+    services/rows).
+
+    Args:
+        lazy_assets_url (`str`): The URL of the assets route.
+        dataset (`str`): The dataset.
+        config (`str`): The config.
+        split (`str`): The split.
+        row_idx (`int`): The index of the row in the split.
+        column (`str`): The column, which must be an Image or an Audio feature.
+        revision (`str`, optional): The git revision of the dataset.
+        format (`str`, optional): The format of the audio file, among `mp3` and `wav`. Ignored for images.
+
+    Returns:
+        `str`: The URL of the asset.
+    """
+    params = {"dataset": dataset, "config": config, "split": split, "row_idx": row_idx, "column": column}
+    if revision is not None:
+        params["revision"] = revision
+    if format is not None:
+        params["format"] = format
+    return f"{lazy_assets_url}?{urlencode(params)}"
+
+
+def get_lazy_asset_cell_value(
+    dataset: str,
+    config: str,
+    split: str,
+    row_idx: int,
+    cell: Any,
+    featureName: str,
+    fieldType: Any,
+    lazy_assets_url: str,
+    revision: Optional[str] = None,
+) -> Any:
+    """
+    Same as get_cell_value, for a top-level Image or Audio column, but the asset is not created: the cell only
+    contains the URL of the assets route, which creates the asset on the first request. The size of an image is
+    read from its header, without decoding it.
+    """
+    if cell is None:
+        return cell
+    if isinstance(fieldType, Image):
+        if not isinstance(cell, dict) or not cell.get("bytes"):
+            raise TypeError(
+                "Image cell must be an encoded dict of an image, "
+                f"but got {str(cell)[:300]}{'...' if len(str(cell)) > 300 else ''}"
+            )
+        width, height = PILImage.open(BytesIO(cell["bytes"])).size
+        return {
+            "src": get_lazy_asset_url(lazy_assets_url, dataset, config, split, row_idx, featureName, revision),
+            "height": height,
+            "width": width,
+        }
+    elif isinstance(fieldType, Audio):
+        return [
+            {
+                "src": get_lazy_asset_url(
+                    lazy_assets_url, dataset, config, split, row_idx, featureName, revision, format="mp3"
+                ),
+                "type": "audio/mpeg",
+            },
+            {
+                "src": get_lazy_asset_url(
+                    lazy_assets_url, dataset, config, split, row_idx, featureName, revision, format="wav"
+                ),
+                "type": "audio/wav",
+            },
+        ]
+    raise TypeError("only the Image and Audio cells can be created lazily.")
+
+
 # in JSON, dicts do not carry any order, so we need to return a list
 #
 # > An object is an *unordered* collection of zero or more name/value pairs, where a name is a string and a value
@@ -301,6 +413,31 @@ def to_features_list(features: Features) -> List[FeatureItem]:
     ]
 
 
+def get_asset_columns(features: Features) -> List[str]:
+    """
+    Get the columns that contain an Image or an Audio feature, at any depth.
+
+    Args:
+        features (`Features`): The features of the dataset.
+
+    Returns:
+        `List[str]`: The names of the columns whose cells are transformed into assets files.
+    """
+    asset_columns = []
+    for column, feature in features.items():
+        has_assets = False
+
+        def classify(feature: FeatureType) -> None:
+            nonlocal has_assets
+            if isinstance(feature, (Image, Audio)):
+                has_assets = True
+
+        _visit(feature, classify)
+        if has_assets:
+            asset_columns.append(str(column))
+    return asset_columns
+
+
 def get_supported_unsupported_columns(
     features: Features,
     unsupported_features: List[FeatureType] = [],
@@ -1,7 +1,11 @@
+import os
 from os import makedirs
 from pathlib import Path
-from typing import Tuple
+from tempfile import NamedTemporaryFile
+from typing import List, Tuple
 
+import numpy as np
+import numpy.typing as npt
 import pyarrow.parquet as pq
 
 from libcommon.storage import StrPath
@@ -10,6 +14,21 @@ DATASET_SEPARATOR = "--"
 
 PARQUET_METADATA_DIR_MODE = 0o755
 
+ROW_GROUP_INDEX_FILENAME = "row_group_index.npy"
+ROW_GROUP_INDEX_FILE_MODE = 0o644
+# One record per row group of the split, sorted by first row. file_id is the index of the parquet file in the list of
+# the split's parquet files sorted by filename. offset and num_bytes give the byte range of the row group in the file.
+ROW_GROUP_INDEX_DTYPE = np.dtype(
+    [
+        ("file_id", "<u4"),
+        ("row_group_id", "<u4"),
+        ("first_row", "<i8"),
+        ("num_rows", "<i8"),
+        ("offset", "<i8"),
+        ("num_bytes", "<i8"),
+    ]
+)
+
 
 def create_parquet_metadata_dir(
     dataset: str, config: str, split: str, parquet_metadata_directory: StrPath
@@ -40,3 +59,76 @@ def create_parquet_metadata_file(
         parquet_file_metadata.write_metadata_file(parquet_metadata_file_path)
     parquet_metadata_subpath = f"{parquet_metadata_dir_subpath}/{filename}"
     return parquet_metadata_subpath
+
+
+def get_row_group_byte_range(row_group_metadata: pq.RowGroupMetaData) -> Tuple[int, int]:
+    start = None
+    end = 0
+    for column_id in range(row_group_metadata.num_columns):
+        column_chunk = row_group_metadata.column(column_id)
+        column_start = (
+            column_chunk.dictionary_page_offset
+            if column_chunk.has_dictionary_page and column_chunk.dictionary_page_offset
+            else column_chunk.data_page_offset
+        )
+        start = column_start if start is None else min(start, column_start)
+        end = max(end, column_start + column_chunk.total_compressed_size)
+    if start is None:
+        return 0, 0
+    return start, end - start
+
+
+def create_row_group_index(parquet_files_metadata: List[pq.FileMetaData]) -> npt.NDArray[np.void]:
+    """Create the row group index of a split.
+
+    Args:
+        parquet_files_metadata (List[pq.FileMetaData]): The metadata of the split's parquet files, sorted by filename.
+
+    Returns:
+        npt.NDArray[np.void]: A structured array of dtype ROW_GROUP_INDEX_DTYPE, with one record per row group.
+    """
+    records = []
+    first_row = 0
+    for file_id, parquet_file_metadata in enumerate(parquet_files_metadata):
+        for row_group_id in range(parquet_file_metadata.num_row_groups):
+            row_group_metadata = parquet_file_metadata.row_group(row_group_id)
+            offset, num_bytes = get_row_group_byte_range(row_group_metadata)
+            records.append((file_id, row_group_id, first_row, row_group_metadata.num_rows, offset, num_bytes))
+            first_row += row_group_metadata.num_rows
+    return np.array(records, dtype=ROW_GROUP_INDEX_DTYPE)
+
+
+def create_row_group_index_file(
+    dataset: str,
+    config: str,
+    split: str,
+    parquet_files_metadata: List[pq.FileMetaData],
+    parquet_metadata_directory: StrPath,
+) -> str:
+    dir_path, parquet_metadata_dir_subpath = create_parquet_metadata_dir(
+        dataset=dataset,
+        config=config,
+        split=split,
+        parquet_metadata_directory=parquet_metadata_directory,
+    )
+    row_group_index = create_row_group_index(parquet_files_metadata)
+    # the file might be memory-mapped by the rows service while the job is run again: write a new file and replace the
+    # old one atomically, instead of overwriting it in place
+    with NamedTemporaryFile(dir=dir_path, prefix=f".{ROW_GROUP_INDEX_FILENAME}.", delete=False) as tmp_file:
+        try:
+            np.save(tmp_file, row_group_index, allow_pickle=False)
+            tmp_file.close()
+            os.chmod(tmp_file.name, ROW_GROUP_INDEX_FILE_MODE)
+            os.replace(tmp_file.name, dir_path / ROW_GROUP_INDEX_FILENAME)
+        except BaseException:
+            os.remove(tmp_file.name)
+            raise
+    return f"{parquet_metadata_dir_subpath}/{ROW_GROUP_INDEX_FILENAME}"
+
+
+def load_row_group_index(path: StrPath) -> npt.NDArray[np.void]:
+    """Memory-map a row group index file written by create_row_group_index_file."""
+    row_group_index: npt.NDArray[np.void] = np.load(path, mmap_mode="r", allow_pickle=False)
+    if row_group_index.dtype != ROW_GROUP_INDEX_DTYPE:
+        raise ValueError(f"Unexpected row group index dtype: {row_group_index.dtype}")
+    return row_group_index
@@ -742,44 +742,21 @@ NORMAL_STARTED_NEW = (Priority.NORMAL, Status.STARTED, NEW)
     "existing_jobs,expected_create_job,expected_delete_jobs,expected_jobs_after_backfill",
     [
         ([], True, False, [(Priority.LOW, Status.WAITING, None)]),
+        # at most one job can be started for the same unicity_id
         (
-            [
-                LOW_WAITING_OLD,
-                LOW_WAITING_NEW,
-                LOW_STARTED_OLD,
-                LOW_STARTED_NEW,
-                NORMAL_WAITING_OLD,
-                NORMAL_WAITING_NEW,
-                NORMAL_STARTED_OLD,
-                NORMAL_STARTED_NEW,
-            ],
+            [LOW_WAITING_OLD, LOW_WAITING_NEW, NORMAL_WAITING_OLD, NORMAL_WAITING_NEW, NORMAL_STARTED_OLD],
             False,
             True,
             [NORMAL_STARTED_OLD],
         ),
         (
-            [
-                LOW_WAITING_OLD,
-                LOW_WAITING_NEW,
-                LOW_STARTED_OLD,
-                LOW_STARTED_NEW,
-                NORMAL_WAITING_OLD,
-                NORMAL_WAITING_NEW,
-                NORMAL_STARTED_NEW,
-            ],
+            [LOW_WAITING_OLD, LOW_WAITING_NEW, NORMAL_WAITING_OLD, NORMAL_WAITING_NEW, NORMAL_STARTED_NEW],
             False,
             True,
             [NORMAL_STARTED_NEW],
         ),
         (
-            [
-                LOW_WAITING_OLD,
-                LOW_WAITING_NEW,
-                LOW_STARTED_OLD,
-                LOW_STARTED_NEW,
-                NORMAL_WAITING_OLD,
-                NORMAL_WAITING_NEW,
-            ],
+            [LOW_WAITING_OLD, LOW_WAITING_NEW, LOW_STARTED_OLD, NORMAL_WAITING_OLD, NORMAL_WAITING_NEW],
             False,
             True,
             [LOW_STARTED_OLD],
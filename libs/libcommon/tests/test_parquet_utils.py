@@ -0,0 +1,344 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import asyncio
+import http.server
+import io
+import os
+import threading
+from functools import partial
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from unittest.mock import MagicMock, patch
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from datasets import Features
+from fsspec.implementations.http import HTTPFileSystem
+
+from libcommon.parquet_utils import (
+    SHARED_ROW_GROUP_CACHE_EVICTION_RATIO,
+    SHARED_ROW_GROUP_CACHE_NUM_BYTES_FILENAME,
+    SHARED_ROW_GROUP_CACHE_SUBDIRECTORY,
+    SHARED_ROW_GROUP_CACHE_VERSION,
+    ParquetIndexWithMetadata,
+    PrefetchedFile,
+    RowGroupCache,
+    RowsIndexCache,
+    SharedRowGroupCache,
+    get_column_chunks_byte_ranges,
+)
+
+
+def get_table(num_rows: int) -> pa.Table:
+    return pa.table({"col": pa.array(range(num_rows), type=pa.int64())})
+
+
+def test_row_group_cache_get_put() -> None:
+    cache = RowGroupCache(max_bytes=1_000)
+    key = ("https://url/0000.parquet", "revision", 0, ("col",))
+    assert cache.get(key) is None
+    pa_table = get_table(10)
+    cache.put(key, pa_table)
+    assert cache.num_bytes == pa_table.nbytes
+    assert cache.get(key) is pa_table
+    assert cache.get(("https://url/0000.parquet", "revision", 0, ())) is None
+    assert cache.get(("https://url/0000.parquet", "revision", 1, ("col",))) is None
+    # the parquet files of a new revision have the same url
+    assert cache.get(("https://url/0000.parquet", "new_revision", 0, ("col",))) is None
+
+
+def test_row_group_cache_evicts_least_recently_used() -> None:
+    pa_table = get_table(10)  # 80 bytes
+    cache = RowGroupCache(max_bytes=2 * pa_table.nbytes)
+    key_0 = ("url", "revision", 0, ("col",))
+    key_1 = ("url", "revision", 1, ("col",))
+    key_2 = ("url", "revision", 2, ("col",))
+    cache.put(key_0, pa_table)
+    cache.put(key_1, pa_table)
+    assert cache.get(key_0) is not None
+    # ^ key_1 is now the least recently used
+    cache.put(key_2, pa_table)
+    assert len(cache) == 2
+    assert cache.num_bytes == 2 * pa_table.nbytes
+    assert cache.get(key_0) is not None
+    assert cache.get(key_1) is None
+    assert cache.get(key_2) is not None
+
+
+def test_row_group_cache_too_big_table() -> None:
+    pa_table = get_table(10)
+    cache = RowGroupCache(max_bytes=pa_table.nbytes - 1)
+    key = ("url", "revision", 0, ("col",))
+    cache.put(key, pa_table)
+    assert cache.get(key) is None
+    assert cache.num_bytes == 0
+
+
+def test_row_group_cache_clear() -> None:
+    cache = RowGroupCache(max_bytes=1_000)
+    cache.put(("url", "revision", 0, ("col",)), get_table(10))
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.num_bytes == 0
+
+
+def test_shared_row_group_cache_get_put(tmp_path: Path) -> None:
+    cache = SharedRowGroupCache(directory=tmp_path / "shm", max_bytes=10_000)
+    key = ("https://url/0000.parquet", "revision", 0, ("col",))
+    assert cache.get(key) is None
+    pa_table = get_table(10)
+    cache.put(key, pa_table)
+    assert os.path.exists(cache.get_path(key))
+    assert cache.get(key) == pa_table
+    assert cache.get(("https://url/0000.parquet", "revision", 0, ())) is None
+    # another process sees the same row group
+    assert SharedRowGroupCache(directory=tmp_path / "shm", max_bytes=10_000).get(key) == pa_table
+
+
+def test_shared_row_group_cache_deletes_other_versions(tmp_path: Path) -> None:
+    directory = tmp_path / "shm"
+    cache_directory = directory / SHARED_ROW_GROUP_CACHE_SUBDIRECTORY
+    cache_directory.mkdir(parents=True)
+    # the files written by a previous version, with other keys
+    (cache_directory / "0123.arrow").write_bytes(b"old")
+    (cache_directory / "v1").mkdir()
+    (cache_directory / "v1" / "0123.arrow").write_bytes(b"old")
+    # the files of the directory that don't belong to the cache are kept
+    (directory / "other").write_bytes(b"other")
+    cache = SharedRowGroupCache(directory=directory, max_bytes=10_000)
+    key = ("url", "revision", 0, ("col",))
+    cache.put(key, get_table(10))
+    assert sorted(os.listdir(directory)) == ["other", SHARED_ROW_GROUP_CACHE_SUBDIRECTORY]
+    assert sorted(os.listdir(cache_directory)) == [".lock", f"v{SHARED_ROW_GROUP_CACHE_VERSION}"]
+    # the files of the current version are kept when another process starts
+    assert SharedRowGroupCache(directory=directory, max_bytes=10_000).get(key) == get_table(10)
+
+
+def test_shared_row_group_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    pa_table = get_table(10)
+    cache = SharedRowGroupCache(directory=tmp_path, max_bytes=10_000)
+    key_0, key_1, key_2 = (
+        ("url", "revision", 0, ("col",)),
+        ("url", "revision", 1, ("col",)),
+        ("url", "revision", 2, ("col",)),
+    )
+    cache.put(key_0, pa_table)
+    file_size = os.path.getsize(cache.get_path(key_0))
+    # the eviction frees space down to a fraction of max_bytes
+    cache.max_bytes = int(2 * file_size / SHARED_ROW_GROUP_CACHE_EVICTION_RATIO)
+    cache.put(key_1, pa_table)
+    os.utime(cache.get_path(key_0), (0, 0))
+    os.utime(cache.get_path(key_1), (1, 1))
+    assert cache.get(key_0) is not None
+    # ^ key_1 is now the least recently used
+    cache.put(key_2, pa_table)
+    assert cache.get(key_1) is None
+    assert cache.get(key_0) is not None
+    assert cache.get(key_2) is not None
+
+
+def test_shared_row_group_cache_tracks_the_total_size(tmp_path: Path) -> None:
+    cache = SharedRowGroupCache(directory=tmp_path, max_bytes=10_000)
+    keys = [("url", "revision", row_group_id, ("col",)) for row_group_id in range(3)]
+    for key in keys:
+        cache.put(key, get_table(10))
+    num_bytes = sum(os.path.getsize(cache.get_path(key)) for key in keys)
+    num_bytes_path = os.path.join(cache.files_directory, SHARED_ROW_GROUP_CACHE_NUM_BYTES_FILENAME)
+    with open(num_bytes_path) as f:
+        assert int(f.read()) == num_bytes
+    # the directory is only listed when the total size exceeds max_bytes
+    with patch("libcommon.parquet_utils.os.scandir") as scandir:
+        cache.put(("url", "revision", 3, ("col",)), get_table(10))
+    scandir.assert_not_called()
+    # an invalid total is computed again
+    with open(num_bytes_path, "w") as f:
+        f.write("invalid")
+    cache.put(("url", "revision", 4, ("col",)), get_table(10))
+    with open(num_bytes_path) as f:
+        assert int(f.read()) == 5 * os.path.getsize(cache.get_path(keys[0]))
+
+
+def test_shared_row_group_cache_file_system_errors(tmp_path: Path) -> None:
+    cache = SharedRowGroupCache(directory=tmp_path, max_bytes=10_000)
+    key = ("url", "revision", 0, ("col",))
+    with patch("libcommon.parquet_utils.pa.OSFile", side_effect=OSError("No space left on device")):
+        # the error is logged, and the row group is not cached
+        cache.put(key, get_table(10))
+    assert cache.get(key) is None
+    assert os.listdir(cache.files_directory) == []
+    # e.g. a file truncated by a process that has been killed
+    with open(cache.get_path(key), "wb") as f:
+        f.write(b"invalid")
+    assert cache.get(key) is None
+
+
+def test_shared_row_group_cache_too_big_table(tmp_path: Path) -> None:
+    cache = SharedRowGroupCache(directory=tmp_path, max_bytes=10)
+    key = ("url", "revision", 0, ("col",))
+    cache.put(key, get_table(10))
+    assert cache.get(key) is None
+    assert os.listdir(cache.files_directory) == []
+
+
+def test_row_group_cache_with_shared_cache(tmp_path: Path) -> None:
+    shared_cache = SharedRowGroupCache(directory=tmp_path, max_bytes=10_000)
+    key = ("url", "revision", 0, ("col",))
+    pa_table = get_table(10)
+    RowGroupCache(max_bytes=1_000, shared_cache=shared_cache).put(key, pa_table)
+    # a new process only has the row group in the shared cache
+    cache = RowGroupCache(max_bytes=1_000, shared_cache=shared_cache)
+    assert len(cache) == 0
+    assert cache.get(key) == pa_table
+    assert len(cache) == 1
+
+
+def test_get_column_chunks_byte_ranges() -> None:
+    buffer = io.BytesIO()
+    pa_table = pa.table(
+        {
+            "a": list(range(10)),
+            "b": [str(i) for i in range(10)],
+            "c": [{"x": i, "y": str(i)} for i in range(10)],
+        }
+    )
+    pq.write_table(pa_table, buffer, row_group_size=5)
+    parquet_file = pq.ParquetFile(buffer)
+    metadata = parquet_file.metadata
+    size = buffer.getbuffer().nbytes
+    assert get_column_chunks_byte_ranges(metadata, 0, []) == []
+    assert len(get_column_chunks_byte_ranges(metadata, 0, ["c"])) == 2  # one per leaf column
+    for columns in [["a"], ["b"], ["c"], ["a", "c"], ["a", "b", "c"]]:
+        ranges = get_column_chunks_byte_ranges(metadata, 1, columns)
+        assert ranges == sorted(ranges)
+        prefetched_file = PrefetchedFile(
+            size=size,
+            ranges={start: buffer.getvalue()[start : start + num_bytes] for start, num_bytes in ranges},
+        )
+        # the metadata is passed explicitly: the footer has not been fetched
+        pa_table_row_group = pq.ParquetFile(prefetched_file, metadata=metadata).read_row_group(1, columns=columns)
+        assert pa_table_row_group.to_pydict() == pa_table.slice(5, 5).select(columns).to_pydict()
+
+
+def get_rows_index(revision: Optional[str] = "revision", num_bytes: int = 10) -> MagicMock:
+    rows_index = MagicMock()
+    rows_index.revision = revision
+    rows_index.parquet_index.estimate_memory_usage.return_value = num_bytes
+    return rows_index
+
+
+def test_rows_index_cache_get_put() -> None:
+    cache = RowsIndexCache(max_count=10, max_bytes=1_000, ttl_seconds=100)
+    key = ("ds", "default", "train")
+    assert cache.get(key, revision="revision") is None
+    rows_index = get_rows_index()
+    cache.put(key, rows_index, build_seconds=1.0)
+    assert cache.num_bytes == 10
+    assert cache.get(key, revision="revision") is rows_index
+    assert cache.get(("ds", "default", "test"), revision="revision") is None
+
+
+def test_rows_index_cache_evicts_least_recently_used() -> None:
+    cache = RowsIndexCache(max_count=2, max_bytes=1_000, ttl_seconds=100)
+    key_0, key_1, key_2 = ("ds", "default", "train"), ("ds", "default", "test"), ("ds", "other", "train")
+    cache.put(key_0, get_rows_index(), build_seconds=1.0)
+    cache.put(key_1, get_rows_index(), build_seconds=1.0)
+    assert cache.get(key_0, revision="revision") is not None
+    # ^ key_1 is now the least recently used
+    cache.put(key_2, get_rows_index(), build_seconds=1.0)
+    assert len(cache) == 2
+    assert cache.get(key_1, revision="revision") is None
+    assert cache.get(key_0, revision="revision") is not None
+    assert cache.get(key_2, revision="revision") is not None
+
+
+def test_rows_index_cache_max_bytes() -> None:
+    cache = RowsIndexCache(max_count=10, max_bytes=100, ttl_seconds=100)
+    key_0, key_1 = ("ds", "default", "train"), ("ds", "default", "test")
+    cache.put(key_0, get_rows_index(num_bytes=101), build_seconds=1.0)
+    assert len(cache) == 0
+    cache.put(key_0, get_rows_index(num_bytes=60), build_seconds=1.0)
+    cache.put(key_1, get_rows_index(num_bytes=60), build_seconds=1.0)
+    assert len(cache) == 1
+    assert cache.get(key_0, revision="revision") is None
+    # the estimated memory usage is updated on access
+    rows_index = get_rows_index(num_bytes=30)
+    cache.put(key_0, rows_index, build_seconds=1.0)
+    assert cache.num_bytes == 90
+    rows_index.parquet_index.estimate_memory_usage.return_value = 50
+    assert cache.get(key_0, revision="revision") is rows_index
+    assert len(cache) == 1
+    assert cache.num_bytes == 50
+
+
+def test_rows_index_cache_invalidation() -> None:
+    cache = RowsIndexCache(max_count=10, max_bytes=1_000, ttl_seconds=100)
+    key = ("ds", "default", "train")
+    cache.put(key, get_rows_index(revision="old_revision"), build_seconds=1.0)
+    assert cache.get(key, revision="new_revision") is None
+    assert len(cache) == 0
+    assert cache.num_bytes == 0
+    cache.put(key, get_rows_index(), build_seconds=1.0)
+    with patch("libcommon.parquet_utils.time.monotonic", return_value=10**9):
+        assert cache.get(key, revision="revision") is None
+    assert len(cache) == 0
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # the range requests are not supported by SimpleHTTPRequestHandler
+    def do_GET(self) -> None:
+        path = self.translate_path(self.path)
+        with open(path, "rb") as f:
+            content = f.read()
+        status = HTTPStatus.OK
+        range_header = self.headers.get("Range")
+        if range_header:
+            start, end = range_header.removeprefix("bytes=").split("-")
+            content = content[int(start) : int(end) + 1]  # noqa: E203
+            status = HTTPStatus.PARTIAL_CONTENT
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def parquet_http_server(tmp_path: Path) -> Iterator[str]:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), partial(RangeRequestHandler, directory=str(tmp_path)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    thread.join()
+
+
+def test_parquet_index_query_async_with_http_file_system(tmp_path: Path, parquet_http_server: str) -> None:
+    pa_table = get_table(100)
+    pq.write_table(pa_table, tmp_path / "0000.parquet", row_group_size=10)
+    metadata_path = tmp_path / "0000.parquet.metadata"
+    pq.ParquetFile(tmp_path / "0000.parquet").metadata.write_metadata_file(metadata_path)
+    parquet_index = ParquetIndexWithMetadata(
+        features=Features.from_arrow_schema(pa_table.schema),
+        supported_columns=["col"],
+        unsupported_columns=[],
+        parquet_files_urls=[f"{parquet_http_server}/0000.parquet"],
+        metadata_paths=[str(metadata_path)],
+        num_bytes=[os.path.getsize(tmp_path / "0000.parquet")],
+        num_rows=[100],
+        httpfs=HTTPFileSystem(),
+        hf_token=None,
+    )
+
+    async def query() -> pa.Table:
+        # like in the services: the index is created in a thread, and queried from the event loop
+        return await parquet_index.query_async(offset=15, length=10)
+
+    assert asyncio.run(query()) == pa_table.slice(15, 10)
+    # a new event loop, e.g. the warm-up and then the server
+    assert asyncio.run(query()) == pa_table.slice(15, 10)
+    assert parquet_index.query(offset=15, length=10) == pa_table.slice(15, 10)
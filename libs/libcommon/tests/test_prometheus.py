@@ -14,12 +14,14 @@ from libcommon.prometheus import (
     Prometheus,
     StepProfiler,
     update_assets_disk_usage,
+    update_cached_assets_disk_usage,
     update_queue_jobs_total,
     update_responses_in_cache_total,
 )
 from libcommon.queue import JobTotalMetricDocument
 from libcommon.resources import CacheMongoResource, QueueMongoResource
 from libcommon.simple_cache import CacheTotalMetricDocument
+from libcommon.viewer_utils.access_index import record_cleaning
 
 
 def parse_metrics(content: str) -> dict[str, float]:
@@ -224,6 +226,22 @@ def test_assets_metrics(usage_type: str, tmp_path: Path) -> None:
         assert metrics.metrics[name] <= 100
 
 
+def test_cached_assets_metrics(tmp_path: Path) -> None:
+    ASSETS_DISK_USAGE.clear()
+    update_cached_assets_disk_usage(directory=tmp_path)
+    metrics = get_metrics()
+    name = metrics.forge_metric_key(name="assets_disk_usage", content={"type": "cached_assets_reclaimed"})
+    assert name not in metrics.metrics
+
+    record_cleaning(tmp_path, num_bytes=100, reclaimed_bytes=10, deleted_rows_number=1)
+    update_cached_assets_disk_usage(directory=tmp_path)
+
+    metrics = get_metrics()
+    assert metrics.metrics[name] == 10
+    name = metrics.forge_metric_key(name="assets_disk_usage", content={"type": "cached_assets_used"})
+    assert metrics.metrics[name] == 100
+
+
 def test_process_metrics() -> None:
     metrics = get_metrics()
 
@@ -4,18 +4,31 @@
 import json
 import os
 import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from multiprocessing import Pool
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 from unittest.mock import patch
 
 import pytest
 import pytz
+from pymongo.errors import PyMongoError
 
 from libcommon.constants import QUEUE_TTL_SECONDS
-from libcommon.queue import EmptyQueueError, JobDocument, Lock, Queue, lock
+from libcommon.queue import (
+    AlreadyStartedJobError,
+    EmptyQueueError,
+    JobDocument,
+    Lock,
+    NewJobsWatcher,
+    NoWaitingJobError,
+    Queue,
+    StartedJobsTotalDocument,
+    lock,
+)
 from libcommon.resources import QueueMongoResource
 from libcommon.utils import Priority, Status, get_datetime
 
@@ -124,6 +137,23 @@ def test_cancel_jobs_by_job_id_wrong_format() -> None:
     assert queue.cancel_jobs_by_job_id(job_ids=["not_a_valid_job_id"]) == 0
 
 
+def test_finish_job_not_started() -> None:
+    test_type = "test_type"
+    test_difficulty = 50
+    queue = Queue()
+
+    job = queue.add_job(job_type=test_type, dataset="dataset", revision="test_revision", difficulty=test_difficulty)
+    # a waiting job cannot be finished
+    assert not queue.finish_job(job_id=job.info()["job_id"], is_success=True)
+    assert job.reload().status == Status.WAITING
+    # a cancelled job cannot be finished
+    job_info = queue.start_job()
+    queue.cancel_jobs_by_job_id(job_ids=[job_info["job_id"]])
+    assert not queue.finish_job(job_id=job_info["job_id"], is_success=True)
+    assert job.reload().status == Status.CANCELLED
+    assert get_started_jobs_totals() == {}
+
+
 def check_job(queue: Queue, expected_dataset: str, expected_split: str, expected_priority: Priority) -> None:
     job_info = queue.start_job()
     assert job_info["params"]["dataset"] == expected_dataset
@@ -270,6 +300,39 @@ def test_priority_logic_priority_order() -> None:
         queue.start_job()
 
 
+def get_started_jobs_totals() -> Dict[str, int]:
+    return {total.namespace: total.total for total in StartedJobsTotalDocument.objects(total__gt=0)}
+
+
+def test_started_jobs_totals() -> None:
+    queue = Queue()
+    job_ids = [
+        queue.add_job(job_type="test_type", dataset=dataset, revision="revision", difficulty=50).info()["job_id"]
+        for dataset in ["org1/dataset1", "org1/dataset2", "org2/dataset1"]
+    ]
+    started_job_ids = [queue.start_job()["job_id"] for _ in job_ids]
+    assert get_started_jobs_totals() == {"org1": 2, "org2": 1}
+    assert get_started_jobs_totals() == queue.get_started_jobs_count_by_namespace()
+    queue.finish_job(job_id=started_job_ids[0], is_success=True)
+    assert get_started_jobs_totals() == {"org1": 1, "org2": 1}
+    queue.cancel_jobs_by_job_id(job_ids=started_job_ids[1:])
+    assert get_started_jobs_totals() == {}
+    # finishing a cancelled job does not change the totals
+    queue.finish_job(job_id=started_job_ids[1], is_success=True)
+    assert StartedJobsTotalDocument.objects(total__lt=0).count() == 0
+
+
+def test_priority_logic_started_jobs_of_other_types() -> None:
+    queue = Queue()
+    queue.add_job(job_type="other_type", dataset="org1/dataset1", revision="revision", difficulty=50)
+    queue.add_job(job_type="test_type", dataset="org1/dataset2", revision="revision", difficulty=50)
+    queue.add_job(job_type="test_type", dataset="org2/dataset1", revision="revision", difficulty=50)
+    queue.start_job(job_types_only=["other_type"])
+    # the namespaces are scheduled fairly whatever the types of their started jobs
+    assert queue.start_job(job_types_only=["test_type"])["params"]["dataset"] == "org2/dataset1"
+    assert queue.start_job(job_types_only=["test_type"])["params"]["dataset"] == "org1/dataset2"
+
+
 @pytest.mark.parametrize(
     "job_types_blocked,job_types_only,should_raise",
     [
@@ -353,6 +416,113 @@ def test_difficulty(difficulty_min: Optional[int], difficulty_max: Optional[int]
         assert job_info["params"]["dataset"] == test_dataset
 
 
+@pytest.mark.parametrize(
+    "job_types_blocked,job_types_only,difficulty_min,difficulty_max,expected_types",
+    [
+        (None, None, None, None, ["type_a", "type_b", "type_c"]),
+        (["type_a"], None, None, None, ["type_b", "type_c"]),
+        (None, ["type_a", "type_b"], None, None, ["type_a", "type_b"]),
+        (["type_a"], ["type_a", "type_b"], None, None, ["type_b"]),
+        (None, None, 40, None, ["type_b", "type_c"]),
+        (None, None, 0, 50, ["type_a", "type_b"]),
+    ],
+)
+def test_new_jobs_watcher_pipeline(
+    job_types_blocked: Optional[list[str]],
+    job_types_only: Optional[list[str]],
+    difficulty_min: Optional[int],
+    difficulty_max: Optional[int],
+    expected_types: List[str],
+) -> None:
+    watcher = NewJobsWatcher(
+        difficulty_min=difficulty_min,
+        difficulty_max=difficulty_max,
+        job_types_blocked=job_types_blocked,
+        job_types_only=job_types_only,
+    )
+    # apply the pipeline of the change stream to fake change events
+    events = JobDocument._get_collection().database["test_change_events"]
+    events.insert_many(
+        [
+            {"operationType": "insert", "fullDocument": {"type": "type_a", "difficulty": 20}},
+            {"operationType": "insert", "fullDocument": {"type": "type_b", "difficulty": 50}},
+            {"operationType": "insert", "fullDocument": {"type": "type_c", "difficulty": 80}},
+            {"operationType": "update", "fullDocument": {"type": "type_a", "difficulty": 20}},
+        ]
+    )
+    assert [event["fullDocument"]["type"] for event in events.aggregate(watcher.pipeline)] == expected_types
+    events.drop()
+
+
+def test_start_jobs() -> None:
+    queue = Queue()
+    queue.add_job(job_type="easy_type", dataset="dataset1", revision="revision", difficulty=20)
+    queue.add_job(job_type="hard_type", dataset="dataset2", revision="revision", difficulty=70)
+    queue.add_job(job_type="easy_type", dataset="dataset3", revision="revision", difficulty=20)
+    queue.add_job(job_type="easy_type", dataset="dataset3", revision="revision", difficulty=20)
+    queue.add_job(job_type="easy_type", dataset="dataset4", revision="revision", difficulty=20)
+    queue.add_job(job_type="easy_type", dataset="dataset5", revision="revision", difficulty=20)
+    # the first job is easy: the next easy jobs are started after it, the hard job is skipped
+    job_infos = queue.start_jobs(max_jobs=3, batch_difficulty_max=20)
+    # only the first job is started until the next one is requested
+    assert JobDocument.objects(status=Status.STARTED).count() == 1
+    assert [job_info["params"]["dataset"] for job_info in job_infos] == ["dataset1", "dataset3", "dataset4"]
+    assert JobDocument.objects(status=Status.STARTED).count() == 3
+    assert JobDocument.objects(status=Status.CANCELLED).count() == 1
+    # the first job is hard: it's started alone
+    job_infos = queue.start_jobs(max_jobs=3, batch_difficulty_max=20)
+    assert [job_info["params"]["dataset"] for job_info in job_infos] == ["dataset2"]
+    # the easy jobs are not started if the worker only processes hard jobs
+    with pytest.raises(EmptyQueueError):
+        queue.start_jobs(max_jobs=3, batch_difficulty_max=20, difficulty_min=50)
+    job_infos = queue.start_jobs(max_jobs=3, batch_difficulty_max=20)
+    assert [job_info["params"]["dataset"] for job_info in job_infos] == ["dataset5"]
+
+
+def test_start_jobs_stopped_batch() -> None:
+    queue = Queue()
+    for dataset in ["dataset1", "dataset2", "dataset3"]:
+        queue.add_job(job_type="easy_type", dataset=dataset, revision="revision", difficulty=20)
+    job_infos = queue.start_jobs(max_jobs=3, batch_difficulty_max=20)
+    assert next(job_infos)["params"]["dataset"] == "dataset1"
+    # e.g. the worker is killed while processing the first job: the other jobs of the batch are still waiting
+    del job_infos
+    assert JobDocument.objects(status=Status.STARTED).count() == 1
+    assert JobDocument.objects(status=Status.WAITING).count() == 2
+    # the jobs started by another worker are not started again
+    queue.add_job(job_type="easy_type", dataset="dataset4", revision="revision", difficulty=20)
+    job_infos = queue.start_jobs(max_jobs=3, batch_difficulty_max=20)
+    assert next(job_infos)["params"]["dataset"] == "dataset2"
+    assert queue.start_job()["params"]["dataset"] == "dataset3"
+    assert [job_info["params"]["dataset"] for job_info in job_infos] == ["dataset4"]
+
+
+def test_start_jobs_namespace_fairness() -> None:
+    queue = Queue()
+    queue.add_job(job_type="easy_type", dataset="user/dataset1", revision="revision", difficulty=20)
+    queue.add_job(job_type="easy_type", dataset="user/dataset2", revision="revision", difficulty=20)
+    queue.add_job(job_type="easy_type", dataset="other/dataset", revision="revision", difficulty=20)
+    job_infos = queue.start_jobs(max_jobs=3, batch_difficulty_max=20)
+    # the namespaces without started jobs are selected first, as in start_job
+    assert [job_info["params"]["dataset"] for job_info in job_infos] == [
+        "user/dataset1",
+        "other/dataset",
+        "user/dataset2",
+    ]
+
+
+def test_start_jobs_claim_error() -> None:
+    queue = Queue()
+    for dataset in ["dataset1", "dataset2", "dataset3"]:
+        queue.add_job(job_type="easy_type", dataset=dataset, revision="revision", difficulty=20)
+    job_infos = queue.start_jobs(max_jobs=3, batch_difficulty_max=20)
+    assert next(job_infos)["params"]["dataset"] == "dataset1"
+    with patch.object(queue, "_start_newest_job_and_cancel_others", side_effect=PyMongoError("connection lost")):
+        # the batch ends, the error is not raised to the worker
+        assert list(job_infos) == []
+    assert JobDocument.objects(status=Status.WAITING).count() == 2
+
+
 def test_count_by_status() -> None:
     test_type = "test_type"
     test_other_type = "test_other_type"
@@ -555,3 +725,58 @@ def test_lock_git_branch(tmp_path_factory: pytest.TempPathFactory, queue_mongo_r
     assert Lock.objects().get().key == json.dumps({"dataset": "dataset", "branch": "refs/convert/parquet"})
     assert Lock.objects().get().owner is None
     Lock.objects().delete()
+
+
+def test_start_job_concurrent_claim() -> None:
+    test_type = "test_type"
+    test_dataset = "test_dataset"
+    queue = Queue()
+    job1 = queue.add_job(job_type=test_type, dataset=test_dataset, revision="r1", difficulty=50)
+    job2 = queue.add_job(job_type=test_type, dataset=test_dataset, revision="r2", difficulty=50)
+    # the newest job for the unicity_id is started, and the older ones are cancelled
+    started_job = queue._start_newest_job_and_cancel_others(job=job1)
+    assert started_job.pk == job2.pk
+    assert started_job.status == Status.STARTED
+    assert job1.reload().status == Status.CANCELLED
+    # a job created in the meantime remains waiting, and its claim is reverted while another job is started
+    job3 = queue.add_job(job_type=test_type, dataset=test_dataset, revision="r3", difficulty=50)
+    with pytest.raises(AlreadyStartedJobError):
+        queue._start_newest_job_and_cancel_others(job=job3)
+    assert job3.reload().status == Status.WAITING
+    assert job3.started_at is None
+    assert JobDocument.objects(status=Status.STARTED).count() == 1
+    # once all the waiting jobs have been claimed, there is nothing left to start
+    queue.finish_job(job_id=started_job.info()["job_id"], is_success=True)
+    assert queue._start_newest_job_and_cancel_others(job=job3).pk == job3.pk
+    with pytest.raises(NoWaitingJobError):
+        queue._start_newest_job_and_cancel_others(job=job3)
+
+
+@pytest.mark.parametrize("num_claimers", [2, 10])
+def test_start_job_concurrent_claim_threads(num_claimers: int, queue_mongo_host: str) -> None:
+    if queue_mongo_host.startswith("mongomock://"):
+        pytest.skip("mongomock does not make the updates atomic across threads")
+    test_type = "test_type"
+    test_dataset = "test_dataset"
+    queue = Queue()
+    for round_idx in range(5):
+        jobs = [
+            queue.add_job(job_type=test_type, dataset=test_dataset, revision=f"r{round_idx}_{i}", difficulty=50)
+            for i in range(3)
+        ]
+        barrier = threading.Barrier(num_claimers)
+
+        def claim() -> Optional[JobDocument]:
+            # the claimers race for the same unicity_id
+            barrier.wait()
+            try:
+                return queue._start_newest_job_and_cancel_others(job=jobs[0])
+            except (AlreadyStartedJobError, NoWaitingJobError):
+                return None
+
+        with ThreadPoolExecutor(max_workers=num_claimers) as executor:
+            started_jobs = [job for job in executor.map(lambda _: claim(), range(num_claimers)) if job is not None]
+        # exactly one claimer wins, it starts the newest job, and the older ones are cancelled
+        assert [job.pk for job in started_jobs] == [jobs[-1].pk]
+        assert [job.reload().status for job in jobs] == [Status.CANCELLED, Status.CANCELLED, Status.STARTED]
+        queue.finish_job(job_id=str(jobs[-1].pk), is_success=True)
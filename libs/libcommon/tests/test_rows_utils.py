@@ -0,0 +1,48 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import threading
+from typing import Mapping
+
+import pytest
+from datasets import Dataset
+
+from libcommon.rows_utils import map_rows, transform_rows
+from libcommon.storage import StrPath
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_transform_rows(max_workers: int, datasets: Mapping[str, Dataset], cached_assets_directory: StrPath) -> None:
+    dataset = datasets["image"]
+    rows = [{"col": dataset[0]["col"], "row_idx": row_idx} for row_idx in [3, 1, 2]]
+    transformed_rows = transform_rows(
+        dataset="dataset",
+        config="config",
+        split="split",
+        rows=rows,
+        features=dataset.features,
+        cached_assets_base_url="http://localhost/cached-assets",
+        cached_assets_directory=cached_assets_directory,
+        offset=0,
+        row_idx_column="row_idx",
+        max_workers=max_workers,
+    )
+    # the order of the rows is preserved
+    assert [row["col"]["src"] for row in transformed_rows] == [
+        f"http://localhost/cached-assets/dataset/--/config/split/{row_idx}/col/image.jpg" for row_idx in [3, 1, 2]
+    ]
+
+
+def test_map_rows_shares_a_bounded_executor() -> None:
+    thread_names = set()
+
+    def transform_row(row_idx: int, row: int) -> dict[str, int]:
+        thread_names.add(threading.current_thread().name)
+        return {"row_idx": row_idx, "value": row}
+
+    for _ in range(3):
+        assert map_rows(transform_row, list(range(10)), max_workers=2) == [
+            {"row_idx": row_idx, "value": row_idx} for row_idx in range(10)
+        ]
+    # the threads are reused between the calls
+    assert len(thread_names) <= 2
@@ -19,6 +19,8 @@ from libcommon.simple_cache import (
     CacheTotalMetricDocument,
     InvalidCursor,
     InvalidLimit,
+    SplitFullName,
+    SplitRequestsDocument,
     delete_dataset_responses,
     delete_response,
     fetch_names,
@@ -26,6 +28,7 @@ from libcommon.simple_cache import (
     get_cache_reports,
     get_cache_reports_with_content,
     get_dataset_responses_without_content_for_kind,
+    get_most_requested_splits,
     get_outdated_split_full_names_for_step,
     get_response,
     get_response_with_details,
@@ -33,8 +36,11 @@ from libcommon.simple_cache import (
     get_responses_count_by_kind_status_and_error_code,
     get_valid_datasets,
     has_any_successful_response,
+    increase_split_requests,
+    increase_splits_requests,
     upsert_response,
 )
+from libcommon.utils import get_datetime
 
 from .utils import CONFIG_NAME_1, CONTENT_ERROR, DATASET_NAME
 
@@ -882,3 +888,31 @@ def test_fetch_names(
         )
         == expected_names
     )
+
+
+def test_get_most_requested_splits() -> None:
+    assert get_most_requested_splits(limit=10) == []
+    for _ in range(3):
+        increase_split_requests(dataset="dataset", config="config", split="test")
+    increase_split_requests(dataset="dataset", config="config", split="train")
+    for _ in range(2):
+        increase_split_requests(dataset="other_dataset", config="config", split="train")
+    assert get_most_requested_splits(limit=10) == [
+        SplitFullName(dataset="dataset", config="config", split="test"),
+        SplitFullName(dataset="other_dataset", config="config", split="train"),
+        SplitFullName(dataset="dataset", config="config", split="train"),
+    ]
+    assert get_most_requested_splits(limit=1) == [SplitFullName(dataset="dataset", config="config", split="test")]
+
+
+def test_increase_splits_requests() -> None:
+    increase_splits_requests({})
+    test_split = SplitFullName(dataset="dataset", config="config", split="test")
+    train_split = SplitFullName(dataset="dataset", config="config", split="train")
+    increase_splits_requests({test_split: (2, get_datetime()), train_split: (1, get_datetime())})
+    increase_splits_requests({train_split: (2, get_datetime(days=2))})
+    assert get_most_requested_splits(limit=10) == [train_split, test_split]
+    train_document = SplitRequestsDocument.objects(split="train").get()
+    assert train_document.num_requests == 3
+    # the time of the last request is kept
+    assert train_document.last_requested_at > get_datetime(days=1).replace(tzinfo=None)
@@ -0,0 +1,174 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from libcommon.viewer_utils.access_index import (
+    ACCESS_LOG_ROTATION_SECONDS,
+    AssetsAccessIndex,
+    AssetsAccessLog,
+    IndexesAccessIndex,
+    get_last_cleaning,
+    record_cleaning,
+)
+
+
+def test_access_index_add_accesses(tmp_path: Path) -> None:
+    access_index = AssetsAccessIndex(tmp_path)
+    access_index.add_accesses([(("ds", "default", "train", row_idx), 1.0) for row_idx in range(3)])
+    access_index.add_accesses([(("ds", "default", "train", 0), 2.0), (("other", "default", "train", 0), 3.0)])
+    # the most recent access is kept
+    access_index.add_accesses([(("ds", "default", "train", 0), 0.0)])
+    assert sorted(access_index.get_rows_to_measure(max_rows_number=10)) == [
+        ("ds", "default", "train", 0),
+        ("ds", "default", "train", 1),
+        ("ds", "default", "train", 2),
+        ("other", "default", "train", 0),
+    ]
+    # only the measured rows are returned
+    assert access_index.get_least_recently_accessed_rows(max_rows_number=10) == []
+    access_index.set_num_bytes(
+        [
+            (("ds", "default", "train", 0), 10),
+            (("ds", "default", "train", 1), 20),
+            (("other", "default", "train", 0), 30),
+        ],
+        measured_at=time.time(),
+    )
+    assert access_index.get_rows_to_measure(max_rows_number=10) == [("ds", "default", "train", 2)]
+    assert access_index.get_num_bytes() == 60
+    assert access_index.get_least_recently_accessed_rows(max_rows_number=10) == [
+        (("ds", "default", "train", 1), 20),
+        (("ds", "default", "train", 0), 10),
+        (("other", "default", "train", 0), 30),
+    ]
+    # the index is persisted
+    assert AssetsAccessIndex(tmp_path).get_least_recently_accessed_rows(max_rows_number=1) == [
+        (("ds", "default", "train", 1), 20)
+    ]
+
+
+def test_access_index_measures_the_accessed_rows_again(tmp_path: Path) -> None:
+    access_index = AssetsAccessIndex(tmp_path)
+    row_key = ("ds", "default", "train", 0)
+    access_index.add_accesses([(row_key, 1.0)])
+    access_index.set_num_bytes([(row_key, 10)], measured_at=2.0)
+    assert access_index.get_rows_to_measure(max_rows_number=10) == []
+    # e.g. an asset has been added to the row
+    access_index.add_accesses([(row_key, 3.0)])
+    assert access_index.get_rows_to_measure(max_rows_number=10) == [row_key]
+    # the previous size is still counted until the row is measured again
+    assert access_index.get_num_bytes() == 10
+    access_index.set_num_bytes([(row_key, 20)], measured_at=4.0)
+    assert access_index.get_rows_to_measure(max_rows_number=10) == []
+    assert access_index.get_num_bytes() == 20
+
+
+def test_access_index_add_rows(tmp_path: Path) -> None:
+    access_index = AssetsAccessIndex(tmp_path)
+    access_index.add_accesses([(("ds", "default", "train", 0), 5.0)])
+    assert access_index.add_rows([(("ds", "default", "train", 0), 1.0), (("ds", "default", "train", 1), 2.0)]) == 1
+    access_index.set_num_bytes(
+        [(("ds", "default", "train", 0), 10), (("ds", "default", "train", 1), 10)], measured_at=10.0
+    )
+    # the last access of the rows already in the index is kept
+    assert access_index.get_least_recently_accessed_rows(max_rows_number=10) == [
+        (("ds", "default", "train", 1), 10),
+        (("ds", "default", "train", 0), 10),
+    ]
+    assert access_index.get_last_scan_time() is None
+    access_index.record_scan(scanned_at=1.0)
+    access_index.record_scan(scanned_at=2.0)
+    assert access_index.get_last_scan_time() == 2.0
+
+
+def test_access_index_delete_rows(tmp_path: Path) -> None:
+    access_index = AssetsAccessIndex(tmp_path)
+    access_index.add_accesses([(("ds", "default", "train", row_idx), 1.0) for row_idx in range(3)])
+    access_index.delete_rows([("ds", "default", "train", 0), ("ds", "default", "train", 2)])
+    assert access_index.get_rows_to_measure(max_rows_number=10) == [("ds", "default", "train", 1)]
+
+
+def test_access_log_is_merged_into_the_access_index(tmp_path: Path) -> None:
+    access_log = AssetsAccessLog(tmp_path, flush_interval_seconds=100)
+    other_access_log = AssetsAccessLog(tmp_path, flush_interval_seconds=0)
+    access_index = AssetsAccessIndex(tmp_path)
+    with patch("libcommon.viewer_utils.access_index.time.time", return_value=1.0):
+        access_log.record_access(dataset="ds", config="default", split="train", row_indices=range(3))
+        other_access_log.record_access(dataset="ds", config="default", split="train", row_indices=[0])
+    with patch("libcommon.viewer_utils.access_index.time.time", return_value=2.0):
+        other_access_log.record_access(dataset="other", config="default", split="train", row_indices=[0])
+    # the accesses are written in batches
+    assert access_index.merge_access_logs() == 2
+    assert sorted(access_index.get_rows_to_measure(max_rows_number=10)) == [
+        ("ds", "default", "train", 0),
+        ("other", "default", "train", 0),
+    ]
+    with patch("libcommon.viewer_utils.access_index.time.time", return_value=3.0):
+        access_log.flush()
+    # the merged logs are deleted
+    assert access_index.merge_access_logs() == 3
+    assert not any(access_index.access_logs_directory.iterdir())
+    access_index.set_num_bytes([(row_key, 10) for row_key in access_index.get_rows_to_measure(10)], measured_at=4.0)
+    assert access_index.get_least_recently_accessed_rows(max_rows_number=10) == [
+        (("ds", "default", "train", 0), 10),
+        (("ds", "default", "train", 1), 10),
+        (("ds", "default", "train", 2), 10),
+        (("other", "default", "train", 0), 10),
+    ]
+
+
+def test_access_log_merges_only_the_complete_files(tmp_path: Path) -> None:
+    access_log = AssetsAccessLog(tmp_path, flush_interval_seconds=0)
+    access_index = AssetsAccessIndex(tmp_path)
+    access_log.record_access(dataset="ds", config="default", split="train", row_indices=[0])
+    # the file of the current period can still be written
+    assert access_index.merge_access_logs() == 0
+    later = time.time() + 2 * ACCESS_LOG_ROTATION_SECONDS
+    with patch("libcommon.viewer_utils.access_index.time.time", return_value=later):
+        assert access_index.merge_access_logs() == 1
+    assert access_index.get_rows_to_measure(max_rows_number=10) == [("ds", "default", "train", 0)]
+
+
+def test_access_log_ignores_the_invalid_lines(tmp_path: Path) -> None:
+    access_index = AssetsAccessIndex(tmp_path)
+    access_index.access_logs_directory.mkdir()
+    (access_index.access_logs_directory / "0-host-1.jsonl").write_bytes(
+        b'["ds","default","train",0,1.0]\n["ds","default","train",1,1.0]\n["ds","def'
+    )
+    assert access_index.merge_access_logs() == 2
+
+
+def test_cleaning(tmp_path: Path) -> None:
+    assert get_last_cleaning(tmp_path) is None
+    record_cleaning(tmp_path, num_bytes=100, reclaimed_bytes=10, deleted_rows_number=1)
+    record_cleaning(tmp_path, num_bytes=90, reclaimed_bytes=0, deleted_rows_number=0)
+    last_cleaning = get_last_cleaning(tmp_path)
+    assert last_cleaning is not None
+    assert last_cleaning["num_bytes"] == 90
+    assert last_cleaning["reclaimed_bytes"] == 0
+    assert last_cleaning["deleted_rows_number"] == 0
+
+
+def test_indexes_access_index(tmp_path: Path) -> None:
+    indexes_directory = tmp_path / "downloads"
+    access_index = IndexesAccessIndex(indexes_directory, flush_interval_seconds=100)
+    with patch("libcommon.viewer_utils.access_index.time.time", return_value=1.0):
+        access_index.record_access(
+            indexes_directory / "ds-0123/config/split/index.duckdb",
+            f"{indexes_directory}/other-4567/config/split/index.duckdb",
+        )
+    # the accesses are written in batches
+    other_access_index = IndexesAccessIndex(indexes_directory, flush_interval_seconds=0)
+    assert other_access_index.get_last_accesses() == {}
+    access_index.flush()
+    with patch("libcommon.viewer_utils.access_index.time.time", return_value=2.0):
+        other_access_index.record_access(indexes_directory / "ds-0123/config/split/index.duckdb")
+    assert access_index.get_last_accesses() == {
+        "ds-0123/config/split/index.duckdb": 2.0,
+        "other-4567/config/split/index.duckdb": 1.0,
+    }
+    access_index.delete_files(["ds-0123/config/split/index.duckdb"])
+    assert access_index.get_last_accesses() == {"other-4567/config/split/index.duckdb": 1.0}
@@ -2,7 +2,9 @@
 # Copyright 2022 The HuggingFace Authors.
 
 import datetime
+from pathlib import Path
 from typing import Any, Mapping
+from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
 import numpy as np
@@ -11,6 +13,7 @@ from datasets import Audio, Dataset, Features, Image, Value
 
 from libcommon.storage import StrPath
 from libcommon.viewer_utils.features import (
+    get_asset_columns,
     get_cell_value,
     get_supported_unsupported_columns,
 )
@@ -339,3 +342,43 @@ def test_get_supported_unsupported_columns() -> None:
     supported_columns, unsupported_columns = get_supported_unsupported_columns(features, unsupported_features)
     assert supported_columns == ["image1", "image2", "image3", "string"]
     assert unsupported_columns == ["audio1", "audio2", "audio3", "binary"]
+
+
+def test_get_cell_value_with_revision(datasets: Mapping[str, Dataset], cached_assets_directory: StrPath) -> None:
+    dataset = datasets["image"]
+    kwargs = dict(
+        dataset="dataset",
+        config="config",
+        split="split",
+        row_idx=7,
+        cell=dataset[0]["col"],
+        featureName="col",
+        fieldType=dataset.features["col"],
+        assets_base_url="http://localhost/assets",
+        assets_directory=cached_assets_directory,
+        overwrite=False,
+        revision="0123456789abcdef",
+    )
+    value = get_cell_value(**kwargs)
+    assert value == {
+        "src": "http://localhost/assets/dataset/--/config/split/7/col/image-0123456.jpg",
+        "height": 480,
+        "width": 640,
+    }
+    assert (Path(cached_assets_directory) / "dataset/--/config/split/7/col/image-0123456.jpg").is_file()
+    # the asset already exists for this revision: it is not written again
+    with patch("libcommon.viewer_utils.asset.atomic_asset_path") as mock_atomic_asset_path:
+        assert get_cell_value(**kwargs) == value
+    mock_atomic_asset_path.assert_not_called()
+
+
+def test_get_asset_columns() -> None:
+    features = Features(
+        {
+            "audio": Audio(),
+            "images": [Image()],
+            "nested": {"image": Image(), "label": Value("int64")},
+            "string": Value("string"),
+        }
+    )
+    assert get_asset_columns(features) == ["audio", "images", "nested"]
@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import io
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from libcommon.viewer_utils.parquet_metadata import (
+    ROW_GROUP_INDEX_DTYPE,
+    create_row_group_index,
+    create_row_group_index_file,
+    load_row_group_index,
+)
+
+
+def get_parquet_file_metadata(num_rows: int, row_group_size: int) -> pq.FileMetaData:
+    buffer = io.BytesIO()
+    pq.write_table(pa.table({"a": list(range(num_rows))}), buffer, row_group_size=row_group_size)
+    return pq.ParquetFile(buffer).metadata
+
+
+def test_create_row_group_index() -> None:
+    parquet_files_metadata = [
+        get_parquet_file_metadata(num_rows=10, row_group_size=4),
+        get_parquet_file_metadata(num_rows=3, row_group_size=4),
+    ]
+    row_group_index = create_row_group_index(parquet_files_metadata)
+    assert row_group_index.dtype == ROW_GROUP_INDEX_DTYPE
+    assert row_group_index["file_id"].tolist() == [0, 0, 0, 1]
+    assert row_group_index["row_group_id"].tolist() == [0, 1, 2, 0]
+    assert row_group_index["first_row"].tolist() == [0, 4, 8, 10]
+    assert row_group_index["num_rows"].tolist() == [4, 4, 2, 3]
+    for row_group in row_group_index:
+        file_metadata = parquet_files_metadata[row_group["file_id"]]
+        column_chunk = file_metadata.row_group(row_group["row_group_id"]).column(0)
+        assert row_group["offset"] > 0
+        assert row_group["num_bytes"] == column_chunk.total_compressed_size
+
+
+def test_create_and_load_row_group_index_file(tmp_path: Path) -> None:
+    parquet_files_metadata = [get_parquet_file_metadata(num_rows=10, row_group_size=4)]
+    subpath = create_row_group_index_file(
+        dataset="ds",
+        config="default",
+        split="train",
+        parquet_files_metadata=parquet_files_metadata,
+        parquet_metadata_directory=tmp_path,
+    )
+    assert subpath == "ds/--/default/train/row_group_index.npy"
+    row_group_index = load_row_group_index(tmp_path / subpath)
+    assert (row_group_index == create_row_group_index(parquet_files_metadata)).all()
+
+
+def test_create_row_group_index_file_replaces_the_file(tmp_path: Path) -> None:
+    old_parquet_files_metadata = [get_parquet_file_metadata(num_rows=10, row_group_size=4)]
+    new_parquet_files_metadata = [get_parquet_file_metadata(num_rows=3, row_group_size=1)]
+    subpath = create_row_group_index_file(
+        dataset="ds",
+        config="default",
+        split="train",
+        parquet_files_metadata=old_parquet_files_metadata,
+        parquet_metadata_directory=tmp_path,
+    )
+    old_row_group_index = load_row_group_index(tmp_path / subpath)
+    create_row_group_index_file(
+        dataset="ds",
+        config="default",
+        split="train",
+        parquet_files_metadata=new_parquet_files_metadata,
+        parquet_metadata_directory=tmp_path,
+    )
+    # the memory-mapped index is not modified by the new file
+    assert (old_row_group_index == create_row_group_index(old_parquet_files_metadata)).all()
+    assert (load_row_group_index(tmp_path / subpath) == create_row_group_index(new_parquet_files_metadata)).all()
+    assert sorted(path.name for path in (tmp_path / subpath).parent.iterdir()) == ["row_group_index.npy"]
+
+
+def test_load_row_group_index_wrong_dtype(tmp_path: Path) -> None:
+    path = tmp_path / "row_group_index.npy"
+    np.save(path, np.arange(3))
+    with pytest.raises(ValueError):
+        load_row_group_index(path)
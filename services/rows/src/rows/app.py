@@ -4,12 +4,12 @@
 import uvicorn
 from libapi.config import UvicornConfig
 from libapi.jwt_token import get_jwt_public_keys
-from libapi.routes.healthcheck import healthcheck_endpoint
 from libapi.routes.metrics import create_metrics_endpoint
 from libcommon.log import init_logging
 from libcommon.processing_graph import ProcessingGraph
 from libcommon.resources import CacheMongoResource, QueueMongoResource, Resource
 from libcommon.storage import exists, init_cached_assets_dir, init_parquet_metadata_dir
+from libcommon.viewer_utils.access_index import AssetsAccessLog
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
@@ -18,7 +18,11 @@ from starlette.routing import Route
 from starlette_prometheus import PrometheusMiddleware
 
 from rows.config import AppConfig
-from rows.routes.rows import create_rows_endpoint
+from rows.routes.asset import create_asset_endpoint
+from rows.routes.healthcheck import create_healthcheck_endpoint
+from rows.routes.rows import create_indexer, create_rows_endpoint
+from rows.split_requests import SplitRequestsCounter
+from rows.warm_up import WarmUp
 
 
 def create_app() -> Starlette:
@@ -32,6 +36,10 @@ def create_app_with_config(app_config: AppConfig) -> Starlette:
     cached_assets_directory = init_cached_assets_dir(directory=app_config.cached_assets.storage_directory)
     if not exists(cached_assets_directory):
         raise RuntimeError("The assets storage directory could not be accessed. Exiting.")
+    cached_assets_access_log = AssetsAccessLog(
+        assets_directory=cached_assets_directory,
+        flush_interval_seconds=app_config.cached_assets.access_index_flush_interval_seconds,
+    )
     parquet_metadata_directory = init_parquet_metadata_dir(directory=app_config.parquet_metadata.storage_directory)
     if not exists(parquet_metadata_directory):
         raise RuntimeError("The parquet metadata storage directory could not be accessed. Exiting.")
@@ -60,17 +68,43 @@ def create_app_with_config(app_config: AppConfig) -> Starlette:
     if not queue_resource.is_available():
         raise RuntimeError("The connection to the queue database could not be established. Exiting.")
 
+    indexer = create_indexer(
+        processing_graph=processing_graph,
+        parquet_metadata_directory=parquet_metadata_directory,
+        hf_token=app_config.common.hf_token,
+        row_group_cache_max_bytes=app_config.rows_index.row_group_cache_max_bytes,
+        shared_row_group_cache_directory=app_config.rows_index.shared_row_group_cache_directory,
+        shared_row_group_cache_max_bytes=app_config.rows_index.shared_row_group_cache_max_bytes,
+        rows_index_cache_max_count=app_config.rows_index.cache_max_count,
+        rows_index_cache_max_bytes=app_config.rows_index.cache_max_bytes,
+        rows_index_cache_ttl_seconds=app_config.rows_index.cache_ttl_seconds,
+    )
+    warm_up = WarmUp(
+        indexer=indexer,
+        num_splits=app_config.warm_up.num_splits,
+        timeout_seconds=app_config.warm_up.timeout_seconds,
+    )
+    split_requests_counter = (
+        SplitRequestsCounter(flush_interval_seconds=app_config.warm_up.split_requests_flush_interval_seconds)
+        if app_config.warm_up.num_splits > 0
+        else None
+    )
+
     routes = [
-        Route("/healthcheck", endpoint=healthcheck_endpoint),
-        Route("/metrics", endpoint=create_metrics_endpoint()),
+        Route("/healthcheck", endpoint=create_healthcheck_endpoint(warm_up=warm_up)),
+        Route("/metrics", endpoint=create_metrics_endpoint(cached_assets_directory=cached_assets_directory)),
         # ^ called by Prometheus
         Route(
             "/rows",
             endpoint=create_rows_endpoint(
                 processing_graph=processing_graph,
+                indexer=indexer,
                 cached_assets_base_url=app_config.cached_assets.base_url,
                 cached_assets_directory=cached_assets_directory,
-                parquet_metadata_directory=parquet_metadata_directory,
+                cached_assets_access_log=cached_assets_access_log,
+                cached_assets_max_workers=app_config.cached_assets.max_workers,
+                lazy_assets_url=app_config.lazy_assets.base_url if app_config.lazy_assets.enabled else None,
+                split_requests_counter=split_requests_counter,
                 hf_endpoint=app_config.common.hf_endpoint,
                 hf_token=app_config.common.hf_token,
                 hf_jwt_public_keys=hf_jwt_public_keys,
@@ -82,9 +116,31 @@ def create_app_with_config(app_config: AppConfig) -> Starlette:
                 cache_max_days=app_config.cache.max_days,
             ),
         ),
+        Route(
+            "/rows/asset",
+            endpoint=create_asset_endpoint(
+                indexer=indexer,
+                cached_assets_base_url=app_config.cached_assets.base_url,
+                cached_assets_directory=cached_assets_directory,
+                cached_assets_access_log=cached_assets_access_log,
+                hf_jwt_public_keys=hf_jwt_public_keys,
+                hf_jwt_algorithm=app_config.api.hf_jwt_algorithm,
+                external_auth_url=app_config.api.external_auth_url,
+                hf_timeout_seconds=app_config.api.hf_timeout_seconds,
+                max_age_long=app_config.api.max_age_long,
+                max_age_short=app_config.api.max_age_short,
+            ),
+        ),
     ]
 
-    return Starlette(routes=routes, middleware=middleware, on_shutdown=[resource.release for resource in resources])
+    return Starlette(
+        routes=routes,
+        middleware=middleware,
+        on_startup=[warm_up.start],
+        on_shutdown=[resource.release for resource in resources]
+        + [cached_assets_access_log.flush]
+        + ([split_requests_counter.flush] if split_requests_counter else []),
+    )
 
 
 def start() -> None:
@@ -3,6 +3,7 @@
 
 from dataclasses import dataclass, field
 
+from environs import Env
 from libapi.config import ApiConfig
 from libcommon.config import (
     CacheConfig,
@@ -12,8 +13,52 @@ from libcommon.config import (
     ParquetMetadataConfig,
     ProcessingGraphConfig,
     QueueConfig,
+    RowsIndexConfig,
 )
 
+LAZY_ASSETS_ENABLED = False
+LAZY_ASSETS_BASE_URL = "rows/asset"
+
+
+@dataclass(frozen=True)
+class LazyAssetsConfig:
+    enabled: bool = LAZY_ASSETS_ENABLED
+    base_url: str = LAZY_ASSETS_BASE_URL
+
+    @classmethod
+    def from_env(cls) -> "LazyAssetsConfig":
+        env = Env(expand_vars=True)
+        with env.prefixed("ROWS_LAZY_ASSETS_"):
+            return cls(
+                enabled=env.bool(name="ENABLED", default=LAZY_ASSETS_ENABLED),
+                base_url=env.str(name="BASE_URL", default=LAZY_ASSETS_BASE_URL),
+            )
+
+
+WARM_UP_NUM_SPLITS = 20
+WARM_UP_TIMEOUT_SECONDS = 120
+WARM_UP_SPLIT_REQUESTS_FLUSH_INTERVAL_SECONDS = 10
+
+
+@dataclass(frozen=True)
+class WarmUpConfig:
+    num_splits: int = WARM_UP_NUM_SPLITS
+    timeout_seconds: int = WARM_UP_TIMEOUT_SECONDS
+    split_requests_flush_interval_seconds: float = WARM_UP_SPLIT_REQUESTS_FLUSH_INTERVAL_SECONDS
+
+    @classmethod
+    def from_env(cls) -> "WarmUpConfig":
+        env = Env(expand_vars=True)
+        with env.prefixed("ROWS_WARM_UP_"):
+            return cls(
+                num_splits=env.int(name="NUM_SPLITS", default=WARM_UP_NUM_SPLITS),
+                timeout_seconds=env.int(name="TIMEOUT_SECONDS", default=WARM_UP_TIMEOUT_SECONDS),
+                split_requests_flush_interval_seconds=env.float(
+                    name="SPLIT_REQUESTS_FLUSH_INTERVAL_SECONDS",
+                    default=WARM_UP_SPLIT_REQUESTS_FLUSH_INTERVAL_SECONDS,
+                ),
+            )
+
 
 @dataclass(frozen=True)
 class AppConfig:
@@ -21,10 +66,13 @@ class AppConfig:
     cached_assets: CachedAssetsConfig = field(default_factory=CachedAssetsConfig)
     cache: CacheConfig = field(default_factory=CacheConfig)
     common: CommonConfig = field(default_factory=CommonConfig)
+    lazy_assets: LazyAssetsConfig = field(default_factory=LazyAssetsConfig)
     log: LogConfig = field(default_factory=LogConfig)
     queue: QueueConfig = field(default_factory=QueueConfig)
     processing_graph: ProcessingGraphConfig = field(default_factory=ProcessingGraphConfig)
     parquet_metadata: ParquetMetadataConfig = field(default_factory=ParquetMetadataConfig)
+    rows_index: RowsIndexConfig = field(default_factory=RowsIndexConfig)
+    warm_up: WarmUpConfig = field(default_factory=WarmUpConfig)
 
     @classmethod
     def from_env(cls) -> "AppConfig":
@@ -33,9 +81,12 @@ class AppConfig:
             common=common_config,
             cached_assets=CachedAssetsConfig.from_env(),
             cache=CacheConfig.from_env(),
+            lazy_assets=LazyAssetsConfig.from_env(),
             log=LogConfig.from_env(),
             processing_graph=ProcessingGraphConfig.from_env(),
             queue=QueueConfig.from_env(),
             api=ApiConfig.from_env(hf_endpoint=common_config.hf_endpoint),
             parquet_metadata=ParquetMetadataConfig.from_env(),
+            rows_index=RowsIndexConfig.from_env(),
+            warm_up=WarmUpConfig.from_env(),
         )
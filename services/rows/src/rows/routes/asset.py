@@ -0,0 +1,195 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import logging
+from pathlib import Path
+from typing import List, Optional, Union
+
+from datasets import Audio, Image
+from libapi.authentication import auth_check
+from libapi.exceptions import (
+    ApiError,
+    InvalidParameterError,
+    MissingRequiredParameterError,
+    ResponseNotFoundError,
+    UnexpectedApiError,
+)
+from libapi.utils import Endpoint, are_valid_parameters, get_json_api_error_response
+from libcommon.parquet_utils import Indexer
+from libcommon.prometheus import StepProfiler
+from libcommon.simple_cache import CachedArtifactError
+from libcommon.storage import StrPath
+from libcommon.viewer_utils.access_index import AssetsAccessLog
+from libcommon.viewer_utils.asset import DATASET_SEPARATOR
+from libcommon.viewer_utils.features import append_revision_suffix, get_cell_value
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+logger = logging.getLogger(__name__)
+
+
+IMAGE_EXTENSIONS = [".jpg", ".png"]
+AUDIO_FORMATS = ["mp3", "wav"]
+
+
+def find_asset_file(
+    dir_path: Path, feature: Union[Image, Audio], revision: Optional[str], format: Optional[str]
+) -> Optional[Path]:
+    # see the file names in libcommon.viewer_utils.features.image() and audio()
+    if isinstance(feature, Image):
+        filenames = [f"{append_revision_suffix('image', revision)}{ext}" for ext in IMAGE_EXTENSIONS]
+    else:
+        filenames = [f"{append_revision_suffix('audio', revision)}.{format}"]
+    for filename in filenames:
+        file_path = dir_path / filename
+        if file_path.is_file():
+            return file_path
+    return None
+
+
+def create_asset_endpoint(
+    indexer: Indexer,
+    cached_assets_base_url: str,
+    cached_assets_directory: StrPath,
+    cached_assets_access_log: AssetsAccessLog,
+    hf_jwt_public_keys: Optional[List[str]] = None,
+    hf_jwt_algorithm: Optional[str] = None,
+    external_auth_url: Optional[str] = None,
+    hf_timeout_seconds: Optional[float] = None,
+    max_age_long: int = 0,
+    max_age_short: int = 0,
+) -> Endpoint:
+    """
+    Create the endpoint that serves the assets of the rows returned by /rows when the lazy assets are enabled.
+
+    The asset (an image, or an audio file in mp3 or wav format) is created on the first request: the cell is read
+    from the parquet files and written to the cached assets directory, with a file name that contains the revision
+    of the dataset, so that the next requests directly serve the file.
+    """
+
+    async def asset_endpoint(request: Request) -> Response:
+        revision: Optional[str] = None
+        with StepProfiler(method="asset_endpoint", step="all"):
+            try:
+                with StepProfiler(method="asset_endpoint", step="validate parameters"):
+                    dataset = request.query_params.get("dataset")
+                    config = request.query_params.get("config")
+                    split = request.query_params.get("split")
+                    column = request.query_params.get("column")
+                    if (
+                        not dataset
+                        or not config
+                        or not split
+                        or not column
+                        or not are_valid_parameters([dataset, config, split, column])
+                    ):
+                        raise MissingRequiredParameterError(
+                            "Parameter 'dataset', 'config', 'split', 'row_idx' and 'column' are required"
+                        )
+                    try:
+                        row_idx = int(request.query_params.get("row_idx", ""))
+                    except ValueError as err:
+                        raise InvalidParameterError("Parameter 'row_idx' must be an integer") from err
+                    if row_idx < 0:
+                        raise InvalidParameterError("Parameter 'row_idx' must be positive")
+                    requested_revision = request.query_params.get("revision")
+                    format = request.query_params.get("format")
+                    logging.info(
+                        f"/rows/asset, dataset={dataset}, config={config}, split={split}, row_idx={row_idx},"
+                        f" column={column}, revision={requested_revision}, format={format}"
+                    )
+                with StepProfiler(method="asset_endpoint", step="check authentication"):
+                    # if auth_check fails, it will raise an exception that will be caught below
+                    auth_check(
+                        dataset=dataset,
+                        external_auth_url=external_auth_url,
+                        request=request,
+                        hf_jwt_public_keys=hf_jwt_public_keys,
+                        hf_jwt_algorithm=hf_jwt_algorithm,
+                        hf_timeout_seconds=hf_timeout_seconds,
+                    )
+                with StepProfiler(method="asset_endpoint", step="get row groups index"):
+                    try:
+                        # loading the index reads from the database and the disk: don't block the event loop
+                        rows_index = await run_in_threadpool(
+                            indexer.get_rows_index,
+                            dataset=dataset,
+                            config=config,
+                            split=split,
+                        )
+                    except CachedArtifactError as err:
+                        raise ResponseNotFoundError("Not found.") from err
+                    revision = rows_index.revision
+                    if requested_revision != revision:
+                        raise ResponseNotFoundError(
+                            "The asset does not exist for the current revision of the dataset."
+                        )
+                with StepProfiler(method="asset_endpoint", step="validate the column"):
+                    feature = rows_index.parquet_index.features.get(column)
+                    if (
+                        not isinstance(feature, (Image, Audio))
+                        or column in rows_index.parquet_index.unsupported_columns
+                    ):
+                        raise InvalidParameterError(f"Column '{column}' is not a supported Image or Audio column")
+                    if isinstance(feature, Audio) and format not in AUDIO_FORMATS:
+                        raise InvalidParameterError(f"Parameter 'format' must be one of {', '.join(AUDIO_FORMATS)}")
+                row_dir_path = (
+                    Path(cached_assets_directory).resolve()
+                    / dataset
+                    / DATASET_SEPARATOR
+                    / config
+                    / split
+                    / str(row_idx)
+                )
+                file_path = find_asset_file(
+                    dir_path=row_dir_path / column, feature=feature, revision=revision, format=format
+                )
+                if file_path is None:
+                    with StepProfiler(method="asset_endpoint", step="query the cell"):
+                        pa_table = await rows_index.query_async(offset=row_idx, length=1, columns=[column])
+                        if pa_table.num_rows == 0:
+                            raise ResponseNotFoundError("Row not found.")
+                        cell = pa_table.column(column)[0].as_py()
+                        if cell is None:
+                            raise ResponseNotFoundError("The cell is empty.")
+                    with StepProfiler(method="asset_endpoint", step="create the asset"):
+                        # encoding the asset is CPU-bound and writes to the disk: don't block the event loop
+                        await run_in_threadpool(
+                            get_cell_value,
+                            dataset=dataset,
+                            config=config,
+                            split=split,
+                            row_idx=row_idx,
+                            cell=cell,
+                            featureName=column,
+                            fieldType=feature,
+                            assets_base_url=cached_assets_base_url,
+                            assets_directory=cached_assets_directory,
+                            overwrite=False,
+                            revision=revision,
+                        )
+                    file_path = find_asset_file(
+                        dir_path=row_dir_path / column, feature=feature, revision=revision, format=format
+                    )
+                    if file_path is None:
+                        raise UnexpectedApiError("The asset could not be created.")
+                with StepProfiler(method="asset_endpoint", step="record the access to the row in asset dir"):
+                    await run_in_threadpool(
+                        cached_assets_access_log.record_access,
+                        dataset=dataset,
+                        config=config,
+                        split=split,
+                        row_indices=[row_idx],
+                    )
+                with StepProfiler(method="asset_endpoint", step="generate the OK response"):
+                    headers = {"Cache-Control": f"max-age={max_age_long}" if max_age_long > 0 else "no-store"}
+                    if revision is not None:
+                        headers["X-Revision"] = revision
+                    return FileResponse(file_path, headers=headers)
+            except Exception as e:
+                error = e if isinstance(e, ApiError) else UnexpectedApiError("Unexpected error.", e)
+                with StepProfiler(method="asset_endpoint", step="generate API error response"):
+                    return get_json_api_error_response(error=error, max_age=max_age_short, revision=revision)
+
+    return asset_endpoint
@@ -0,0 +1,21 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import logging
+
+from libapi.routes.healthcheck import healthcheck_endpoint
+from libapi.utils import Endpoint
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+from rows.warm_up import WarmUp
+
+
+def create_healthcheck_endpoint(warm_up: WarmUp) -> Endpoint:
+    async def rows_healthcheck_endpoint(request: Request) -> Response:
+        if not warm_up.is_ready():
+            logging.info("/healthcheck: the caches are being warmed up")
+            return PlainTextResponse("warming up", status_code=503, headers={"Cache-Control": "no-store"})
+        return await healthcheck_endpoint(request)
+
+    return rows_healthcheck_endpoint
@@ -2,7 +2,6 @@
 # Copyright 2022 The HuggingFace Authors.
 
 import logging
-import random
 from typing import List, Literal, Optional, Union
 
 import pyarrow as pa
@@ -18,7 +17,6 @@ from libapi.exceptions import (
 from libapi.utils import (
     Endpoint,
     are_valid_parameters,
-    clean_cached_assets,
     get_json_api_error_response,
     get_json_ok_response,
     to_rows_list,
@@ -30,11 +28,15 @@ from libcommon.prometheus import StepProfiler
 from libcommon.simple_cache import CachedArtifactError
 from libcommon.storage import StrPath
 from libcommon.utils import PaginatedResponse
-from libcommon.viewer_utils.asset import update_last_modified_date_of_rows_in_assets_dir
+from libcommon.viewer_utils.access_index import AssetsAccessLog
 from libcommon.viewer_utils.features import to_features_list
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 from starlette.responses import Response
 
+from rows.split_requests import SplitRequestsCounter
+
 logger = logging.getLogger(__name__)
 
 
@@ -58,6 +60,9 @@ def create_response(
     features: Features,
     unsupported_columns: List[str],
     num_rows_total: int,
+    revision: Optional[str] = None,
+    assets_max_workers: int = 1,
+    lazy_assets_url: Optional[str] = None,
 ) -> PaginatedResponse:
     if set(pa_table.column_names).intersection(set(unsupported_columns)):
         raise RuntimeError(
@@ -75,19 +80,53 @@ def create_response(
             offset,
             features,
             unsupported_columns,
+            revision=revision,
+            assets_max_workers=assets_max_workers,
+            lazy_assets_url=lazy_assets_url,
         ),
         num_rows_total=num_rows_total,
         num_rows_per_page=MAX_ROWS,
     )
 
 
+def create_indexer(
+    processing_graph: ProcessingGraph,
+    parquet_metadata_directory: StrPath,
+    hf_token: Optional[str] = None,
+    row_group_cache_max_bytes: int = 0,
+    shared_row_group_cache_directory: Optional[StrPath] = None,
+    shared_row_group_cache_max_bytes: int = 0,
+    rows_index_cache_max_count: int = 8,
+    rows_index_cache_max_bytes: int = 100_000_000,
+    rows_index_cache_ttl_seconds: int = 3_600,
+) -> Indexer:
+    return Indexer(
+        processing_graph=processing_graph,
+        hf_token=hf_token,
+        parquet_metadata_directory=parquet_metadata_directory,
+        httpfs=HTTPFileSystem(headers={"authorization": f"Bearer {hf_token}"}),
+        unsupported_features=UNSUPPORTED_FEATURES,
+        all_columns_supported_datasets_allow_list=ALL_COLUMNS_SUPPORTED_DATASETS_ALLOW_LIST,
+        row_group_cache_max_bytes=row_group_cache_max_bytes,
+        shared_row_group_cache_directory=shared_row_group_cache_directory,
+        shared_row_group_cache_max_bytes=shared_row_group_cache_max_bytes,
+        rows_index_cache_max_count=rows_index_cache_max_count,
+        rows_index_cache_max_bytes=rows_index_cache_max_bytes,
+        rows_index_cache_ttl_seconds=rows_index_cache_ttl_seconds,
+    )
+
+
 def create_rows_endpoint(
     processing_graph: ProcessingGraph,
+    indexer: Indexer,
     cached_assets_base_url: str,
     cached_assets_directory: StrPath,
-    parquet_metadata_directory: StrPath,
+    cached_assets_access_log: AssetsAccessLog,
     cache_max_days: int,
     hf_endpoint: str,
+    cached_assets_max_workers: int = 1,
+    lazy_assets_url: Optional[str] = None,
+    split_requests_counter: Optional[SplitRequestsCounter] = None,
     hf_token: Optional[str] = None,
     hf_jwt_public_keys: Optional[List[str]] = None,
     hf_jwt_algorithm: Optional[str] = None,
@@ -95,22 +134,8 @@ def create_rows_endpoint(
     hf_timeout_seconds: Optional[float] = None,
     max_age_long: int = 0,
     max_age_short: int = 0,
-    clean_cache_proba: float = 0.0,
-    keep_first_rows_number: int = -1,
-    keep_most_recent_rows_number: int = -1,
-    max_cleaned_rows_number: int = -1,
 ) -> Endpoint:
-    indexer = Indexer(
-        processing_graph=processing_graph,
-        hf_token=hf_token,
-        parquet_metadata_directory=parquet_metadata_directory,
-        httpfs=HTTPFileSystem(headers={"authorization": f"Bearer {hf_token}"}),
-        unsupported_features=UNSUPPORTED_FEATURES,
-        all_columns_supported_datasets_allow_list=ALL_COLUMNS_SUPPORTED_DATASETS_ALLOW_LIST,
-    )
-
     async def rows_endpoint(request: Request) -> Response:
-        await indexer.httpfs.set_session()
         revision: Optional[str] = None
         with StepProfiler(method="rows_endpoint", step="all"):
             try:
@@ -128,8 +153,10 @@ def create_rows_endpoint(
                         raise InvalidParameterError("Length must be positive")
                     if length > MAX_ROWS:
                         raise InvalidParameterError(f"Length must be less than or equal to {MAX_ROWS}")
+                    columns = [column for column in request.query_params.getlist("columns") if column] or None
                     logging.info(
-                        f"/rows, dataset={dataset}, config={config}, split={split}, offset={offset}, length={length}"
+                        f"/rows, dataset={dataset}, config={config}, split={split}, offset={offset}, length={length},"
+                        f" columns={columns}"
                     )
                 with StepProfiler(method="rows_endpoint", step="check authentication"):
                     # if auth_check fails, it will raise an exception that will be caught below
@@ -143,7 +170,9 @@ def create_rows_endpoint(
                     )
                 try:
                     with StepProfiler(method="rows_endpoint", step="get row groups index"):
-                        rows_index = indexer.get_rows_index(
+                        # loading the index reads from the database and the disk: don't block the event loop
+                        rows_index = await run_in_threadpool(
+                            indexer.get_rows_index,
                             dataset=dataset,
                             config=config,
                             split=split,
@@ -165,30 +194,23 @@ def create_rows_endpoint(
                             hf_token=hf_token,
                             cache_max_days=cache_max_days,
                         )
+                with StepProfiler(method="rows_endpoint", step="select the columns"):
+                    features = rows_index.parquet_index.features
+                    unsupported_columns = rows_index.parquet_index.unsupported_columns
+                    if columns is not None:
+                        unknown_columns = [column for column in columns if column not in features]
+                        if unknown_columns:
+                            raise InvalidParameterError(f"Unknown columns: {', '.join(unknown_columns)}")
+                        features = Features(
+                            {column: feature for column, feature in features.items() if column in columns}
+                        )
+                        unsupported_columns = [column for column in unsupported_columns if column in columns]
                 with StepProfiler(method="rows_endpoint", step="query the rows"):
-                    pa_table = rows_index.query(offset=offset, length=length)
-                with StepProfiler(method="rows_endpoint", step="clean cache"):
-                    # no need to do it every time
-                    if random.random() < clean_cache_proba:  # nosec
-                        if (
-                            keep_first_rows_number < 0
-                            and keep_most_recent_rows_number < 0
-                            and max_cleaned_rows_number < 0
-                        ):
-                            logger.debug(
-                                "Params keep_first_rows_number, keep_most_recent_rows_number and"
-                                " max_cleaned_rows_number are not set. Skipping cached assets cleaning."
-                            )
-                        else:
-                            clean_cached_assets(
-                                dataset=dataset,
-                                cached_assets_directory=cached_assets_directory,
-                                keep_first_rows_number=keep_first_rows_number,
-                                keep_most_recent_rows_number=keep_most_recent_rows_number,
-                                max_cleaned_rows_number=max_cleaned_rows_number,
-                            )
+                    pa_table = await rows_index.query_async(offset=offset, length=length, columns=columns)
                 with StepProfiler(method="rows_endpoint", step="transform to a list"):
-                    response = create_response(
+                    # creating the assets writes to the disk: don't block the event loop
+                    response = await run_in_threadpool(
+                        create_response,
                         dataset=dataset,
                         config=config,
                         split=split,
@@ -196,21 +218,32 @@ def create_rows_endpoint(
                         cached_assets_directory=cached_assets_directory,
                         pa_table=pa_table,
                         offset=offset,
-                        features=rows_index.parquet_index.features,
-                        unsupported_columns=rows_index.parquet_index.unsupported_columns,
+                        features=features,
+                        unsupported_columns=unsupported_columns,
                         num_rows_total=rows_index.parquet_index.num_rows_total,
+                        revision=revision,
+                        assets_max_workers=cached_assets_max_workers,
+                        lazy_assets_url=lazy_assets_url,
                     )
-                with StepProfiler(method="rows_endpoint", step="update last modified time of rows in asset dir"):
-                    update_last_modified_date_of_rows_in_assets_dir(
-                        dataset=dataset,
-                        config=config,
-                        split=split,
-                        offset=offset,
-                        length=length,
-                        assets_directory=cached_assets_directory,
-                    )
+                if lazy_assets_url is None:
+                    # with lazy assets, the asset route updates the rows that are actually viewed
+                    with StepProfiler(method="rows_endpoint", step="record the access to the rows in asset dir"):
+                        # the accesses are written to the access log in batches, but a write can happen here
+                        await run_in_threadpool(
+                            cached_assets_access_log.record_access,
+                            dataset=dataset,
+                            config=config,
+                            split=split,
+                            row_indices=range(offset, offset + pa_table.num_rows),
+                        )
                 with StepProfiler(method="rows_endpoint", step="generate the OK response"):
-                    return get_json_ok_response(content=response, max_age=max_age_long, revision=revision)
+                    ok_response = get_json_ok_response(content=response, max_age=max_age_long, revision=revision)
+                    if split_requests_counter is not None:
+                        # the most requested splits are warmed up on startup, see rows.warm_up
+                        ok_response.background = BackgroundTask(
+                            split_requests_counter.record_request, dataset=dataset, config=config, split=split
+                        )
+                    return ok_response
             except Exception as e:
                 error = e if isinstance(e, ApiError) else UnexpectedApiError("Unexpected error.", e)
                 with StepProfiler(method="rows_endpoint", step="generate API error response"):
@@ -0,0 +1,61 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Tuple
+
+from libcommon.simple_cache import SplitFullName, increase_splits_requests
+from libcommon.utils import get_datetime
+
+
+class SplitRequestsCounter:
+    """Count the requests to every split, to find the most requested splits to warm up (see `rows.warm_up`).
+
+    The requests are counted in memory and written to the cache database in one bulk write, at most every
+    `flush_interval_seconds` seconds, instead of one upsert per request.
+
+    Args:
+        flush_interval_seconds (`float`): the minimal time between two writes to the database. 0 means that the
+          requests are written immediately.
+    """
+
+    def __init__(self, flush_interval_seconds: float):
+        self.flush_interval_seconds = flush_interval_seconds
+        self._pending: Dict[SplitFullName, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record_request(self, dataset: str, config: str, split: str) -> None:
+        """Count a request to a split. The counts are written if the flush interval has elapsed."""
+        now = get_datetime()
+        split_full_name = SplitFullName(dataset=dataset, config=config, split=split)
+        with self._lock:
+            num_requests, _ = self._pending.get(split_full_name, (0, now))
+            self._pending[split_full_name] = (num_requests + 1, now)
+            should_flush = time.monotonic() - self._last_flush >= self.flush_interval_seconds
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending counts to the database."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            increase_splits_requests(pending)
+        except Exception as err:
+            logging.warning(f"failed to record the requests to {len(pending)} splits, they will be retried: {err}")
+            with self._lock:
+                for split_full_name, (num_requests, last_requested_at) in pending.items():
+                    pending_num_requests, pending_last_requested_at = self._pending.get(
+                        split_full_name, (0, last_requested_at)
+                    )
+                    self._pending[split_full_name] = (
+                        num_requests + pending_num_requests,
+                        max(last_requested_at, pending_last_requested_at),
+                    )
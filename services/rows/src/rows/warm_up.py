@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from libcommon.parquet_utils import Indexer
+from libcommon.prometheus import StepProfiler
+from libcommon.simple_cache import SplitFullName, get_most_requested_splits
+from starlette.concurrency import run_in_threadpool
+
+from rows.routes.rows import MAX_ROWS
+
+
+class WarmUp:
+    """Warm the caches of the /rows endpoint with the most requested splits, in the background.
+
+    For every split, the rows index is built (which loads the parquet metadata and the row group index) and the first
+    page of rows is read (which fills the row group cache). The splits are read the same way as in the endpoint, in
+    the event loop of the app.
+
+    Args:
+        indexer (Indexer): The indexer used by the /rows endpoint.
+        num_splits (int): The number of most requested splits to warm up. 0 disables the warm-up.
+        timeout_seconds (int): The service is considered ready after this delay, even if the warm-up is not finished.
+    """
+
+    def __init__(self, indexer: Indexer, num_splits: int, timeout_seconds: int):
+        self.indexer = indexer
+        self.num_splits = num_splits
+        self.timeout_seconds = timeout_seconds
+        self.started_at: Optional[float] = None
+        self.done = False
+        self.task: Optional["asyncio.Task[None]"] = None
+
+    async def start(self) -> None:
+        # called on startup: only the list of splits is fetched before the app starts serving requests
+        self.started_at = time.monotonic()
+        try:
+            splits = (
+                await run_in_threadpool(get_most_requested_splits, limit=self.num_splits) if self.num_splits else []
+            )
+        except Exception as err:
+            logging.warning(f"Could not get the most requested splits: {err}")
+            splits = []
+        if not splits:
+            self.done = True
+            return
+        logging.info(f"Warm up the caches with {len(splits)} splits")
+        self.task = asyncio.create_task(self.run(splits))
+
+    async def run(self, splits: List[SplitFullName]) -> None:
+        try:
+            for dataset, config, split in splits:
+                if config is None or split is None:
+                    continue
+                try:
+                    with StepProfiler(method="warm_up", step="warm up a split"):
+                        rows_index = await run_in_threadpool(
+                            self.indexer.get_rows_index, dataset=dataset, config=config, split=split
+                        )
+                        await rows_index.query_async(offset=0, length=MAX_ROWS)
+                except Exception as err:
+                    logging.warning(f"Could not warm up {dataset=} {config=} {split=}: {err}")
+        finally:
+            self.done = True
+            logging.info("The warm-up is finished")
+
+    def is_ready(self) -> bool:
+        return self.done or self.started_at is None or time.monotonic() - self.started_at > self.timeout_seconds
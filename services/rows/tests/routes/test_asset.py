@@ -0,0 +1,190 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import shutil
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Generator
+from unittest.mock import patch
+
+import pyarrow.parquet as pq
+import pytest
+from datasets import Dataset, Image
+from datasets.table import embed_table_storage
+from fsspec import AbstractFileSystem
+from fsspec.implementations.http import HTTPFileSystem
+from libcommon.parquet_utils import Indexer
+from libcommon.processing_graph import ProcessingGraph
+from libcommon.simple_cache import _clean_cache_database, upsert_response
+from libcommon.storage import StrPath
+from libcommon.viewer_utils.access_index import AssetsAccessLog
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from rows.config import AppConfig
+from rows.routes.asset import create_asset_endpoint
+from rows.routes.rows import create_response
+
+REVISION = "0123456789abcdef"
+LAZY_ASSETS_URL = "http://localhost/rows/asset"
+
+
+@pytest.fixture(autouse=True)
+def clean_mongo_databases(app_config: AppConfig) -> None:
+    _clean_cache_database()
+
+
+@pytest.fixture
+def ds_image(image_path: str) -> Dataset:
+    ds = Dataset.from_dict({"image": [image_path, None], "label": [0, 1]}).cast_column("image", Image())
+    return Dataset(embed_table_storage(ds.data))
+
+
+@pytest.fixture
+def ds_image_fs(ds_image: Dataset, tmpfs: AbstractFileSystem) -> Generator[AbstractFileSystem, None, None]:
+    with tmpfs.open("default/train/0000.parquet", "wb") as f:
+        ds_image.to_parquet(f)
+    yield tmpfs
+
+
+@pytest.fixture
+def dataset_image_with_config_parquet_metadata(
+    ds_image_fs: AbstractFileSystem, parquet_metadata_directory: StrPath
+) -> Generator[None, None, None]:
+    parquet_file_metadata_path = Path(parquet_metadata_directory) / "ds_image" / "--" / "default/train/0000.parquet"
+    parquet_file_metadata_path.parent.mkdir(parents=True, exist_ok=True)
+    with ds_image_fs.open("default/train/0000.parquet") as f:
+        metadata = pq.read_metadata(f)
+    metadata.write_metadata_file(parquet_file_metadata_path)
+    upsert_response(
+        kind="config-parquet-metadata",
+        dataset="ds_image",
+        config="default",
+        content={
+            "parquet_files_metadata": [
+                {
+                    "dataset": "ds_image",
+                    "config": "default",
+                    "split": "train",
+                    "url": "https://fake.huggingface.co/datasets/ds_image/resolve/refs%2Fconvert%2Fparquet/default/train/0000.parquet",  # noqa: E501
+                    "filename": "0000.parquet",
+                    "size": ds_image_fs.info("default/train/0000.parquet")["size"],
+                    "num_rows": metadata.num_rows,
+                    "parquet_metadata_subpath": "ds_image/--/default/train/0000.parquet",
+                }
+            ]
+        },
+        http_status=HTTPStatus.OK,
+        dataset_git_revision=REVISION,
+        progress=1.0,
+    )
+    yield
+    shutil.rmtree(Path(parquet_metadata_directory) / "ds_image")
+
+
+@pytest.fixture
+def client(
+    app_config: AppConfig,
+    processing_graph: ProcessingGraph,
+    parquet_metadata_directory: StrPath,
+    cached_assets_directory: StrPath,
+    ds_image_fs: AbstractFileSystem,
+    dataset_image_with_config_parquet_metadata: None,
+) -> Generator[TestClient, None, None]:
+    indexer = Indexer(
+        processing_graph=processing_graph,
+        hf_token=app_config.common.hf_token,
+        parquet_metadata_directory=parquet_metadata_directory,
+        httpfs=HTTPFileSystem(),
+    )
+
+    async def cat_file(url: str, start: int, end: int) -> bytes:
+        with ds_image_fs.open("default/train/0000.parquet") as f:
+            f.seek(start)
+            return f.read(end - start)  # type: ignore
+
+    access_log = AssetsAccessLog(cached_assets_directory, flush_interval_seconds=0)
+    app = Starlette(
+        routes=[
+            Route(
+                "/rows/asset",
+                endpoint=create_asset_endpoint(
+                    indexer=indexer,
+                    cached_assets_base_url=app_config.cached_assets.base_url,
+                    cached_assets_directory=cached_assets_directory,
+                    cached_assets_access_log=access_log,
+                ),
+            )
+        ]
+    )
+    with patch.object(indexer.httpfs, "_cat_file", cat_file):
+        yield TestClient(app)
+
+
+def test_create_response_with_lazy_image(ds_image: Dataset, app_config: AppConfig) -> None:
+    response = create_response(
+        dataset="ds_image",
+        config="default",
+        split="train",
+        cached_assets_base_url=app_config.cached_assets.base_url,
+        cached_assets_directory="/not/used",
+        pa_table=ds_image.data,
+        offset=0,
+        features=ds_image.features,
+        unsupported_columns=[],
+        num_rows_total=2,
+        revision=REVISION,
+        lazy_assets_url=LAZY_ASSETS_URL,
+    )
+    assert [row_item["row"] for row_item in response["rows"]] == [
+        {
+            "image": {
+                "src": (
+                    f"{LAZY_ASSETS_URL}?dataset=ds_image&config=default&split=train&row_idx=0&column=image"
+                    f"&revision={REVISION}"
+                ),
+                "height": 480,
+                "width": 640,
+            },
+            "label": 0,
+        },
+        {"image": None, "label": 1},
+    ]
+
+
+def test_asset_endpoint(client: TestClient, cached_assets_directory: StrPath) -> None:
+    params: dict[str, Any] = {
+        "dataset": "ds_image",
+        "config": "default",
+        "split": "train",
+        "row_idx": 0,
+        "column": "image",
+        "revision": REVISION,
+    }
+    response = client.get("/rows/asset", params=params)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "image/jpeg"
+    asset_path = Path(cached_assets_directory) / "ds_image/--/default/train/0/image/image-0123456.jpg"
+    assert asset_path.is_file()
+    assert response.content == asset_path.read_bytes()
+    # the asset is not created again
+    with patch("rows.routes.asset.get_cell_value") as mock_get_cell_value:
+        assert client.get("/rows/asset", params=params).status_code == 200
+    mock_get_cell_value.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "params,expected_status_code",
+    [
+        ({"row_idx": 0, "column": "image", "revision": "other_revision"}, 404),
+        ({"row_idx": 1, "column": "image", "revision": REVISION}, 404),
+        ({"row_idx": 10, "column": "image", "revision": REVISION}, 404),
+        ({"row_idx": 0, "column": "label", "revision": REVISION}, 422),
+        ({"row_idx": "a", "column": "image", "revision": REVISION}, 422),
+        ({"row_idx": 0, "revision": REVISION}, 422),
+    ],
+)
+def test_asset_endpoint_errors(client: TestClient, params: dict[str, Any], expected_status_code: int) -> None:
+    query_params: dict[str, Any] = {"dataset": "ds_image", "config": "default", "split": "train", **params}
+    assert client.get("/rows/asset", params=query_params).status_code == expected_status_code
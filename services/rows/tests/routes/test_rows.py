@@ -1,9 +1,9 @@
 # SPDX-License-Identifier: Apache-2.0
 # Copyright 2023 The HuggingFace Authors.
 
+import asyncio
 import os
 import shutil
-import time
 from http import HTTPStatus
 from pathlib import Path
 from typing import Any, Generator
@@ -17,12 +17,17 @@ from fsspec import AbstractFileSystem
 from fsspec.implementations.http import HTTPFileSystem
 from libcommon.parquet_utils import Indexer, ParquetIndexWithMetadata, RowsIndex
 from libcommon.processing_graph import ProcessingGraph
-from libcommon.simple_cache import _clean_cache_database, upsert_response
+from libcommon.simple_cache import (
+    _clean_cache_database,
+    increase_split_requests,
+    upsert_response,
+)
 from libcommon.storage import StrPath
-from libcommon.viewer_utils.asset import update_last_modified_date_of_rows_in_assets_dir
+from libcommon.viewer_utils.parquet_metadata import create_row_group_index_file
 
 from rows.config import AppConfig
 from rows.routes.rows import create_response
+from rows.warm_up import WarmUp
 
 
 @pytest.fixture(autouse=True)
@@ -320,6 +325,201 @@ def test_rows_index_query_with_parquet_metadata(
         rows_index_with_parquet_metadata.query(offset=-1, length=2)
 
 
+@pytest.fixture
+def dataset_sharded_with_row_group_index(
+    parquet_metadata_directory: StrPath,
+    dataset_sharded_with_config_parquet_metadata: dict[str, Any],
+) -> dict[str, Any]:
+    parquet_files_metadata = sorted(
+        dataset_sharded_with_config_parquet_metadata["parquet_files_metadata"], key=lambda item: item["filename"]
+    )
+    row_group_index_subpath = create_row_group_index_file(
+        dataset="ds_sharded",
+        config="default",
+        split="train",
+        parquet_files_metadata=[
+            pq.read_metadata(Path(parquet_metadata_directory) / item["parquet_metadata_subpath"])
+            for item in parquet_files_metadata
+        ],
+        parquet_metadata_directory=parquet_metadata_directory,
+    )
+    config_parquet_metadata_content = {
+        **dataset_sharded_with_config_parquet_metadata,
+        "row_group_index_subpaths": {"train": row_group_index_subpath},
+    }
+    upsert_response(
+        kind="config-parquet-metadata",
+        dataset="ds_sharded",
+        config="default",
+        content=config_parquet_metadata_content,
+        http_status=HTTPStatus.OK,
+        progress=1.0,
+    )
+    return config_parquet_metadata_content
+
+
+def test_rows_index_query_with_row_group_index(
+    indexer: Indexer,
+    ds_sharded: Dataset,
+    ds_sharded_fs: AbstractFileSystem,
+    dataset_sharded_with_row_group_index: dict[str, Any],
+) -> None:
+    with ds_sharded_fs.open("default/train/0003.parquet") as f:
+        with patch("libcommon.parquet_utils.HTTPFile", return_value=f):
+            rows_index = indexer.get_rows_index("ds_sharded", "default", "train")
+            assert rows_index.parquet_index.row_group_index is not None
+            assert len(rows_index.parquet_index.row_group_index) == 4
+            assert rows_index.query(offset=1, length=3).to_pydict() == ds_sharded[1:4]
+            # only the metadata of the parquet files that contain the requested rows have been loaded
+            assert sorted(rows_index.parquet_index.parquet_files_metadata) == [0, 1]
+            assert rows_index.query(offset=1, length=-1).to_pydict() == ds_sharded[:0]
+            assert rows_index.query(offset=1, length=0).to_pydict() == ds_sharded[:0]
+            assert rows_index.query(offset=999999, length=1).to_pydict() == ds_sharded[:0]
+            assert rows_index.query(offset=1, length=99999999).to_pydict() == ds_sharded[1:]
+            with pytest.raises(IndexError):
+                rows_index.query(offset=-1, length=2)
+
+
+@pytest.mark.parametrize("with_row_group_index", [False, True])
+def test_rows_index_query_async(
+    request: pytest.FixtureRequest,
+    indexer: Indexer,
+    ds_sharded: Dataset,
+    ds_sharded_fs: AbstractFileSystem,
+    dataset_sharded_with_config_parquet_metadata: dict[str, Any],
+    with_row_group_index: bool,
+) -> None:
+    if with_row_group_index:
+        request.getfixturevalue("dataset_sharded_with_row_group_index")
+    fetched_ranges: list[tuple[str, int, int]] = []
+
+    async def cat_file(url: str, start: int, end: int) -> bytes:
+        fetched_ranges.append((url, start, end))
+        # all the shards have the same content
+        with ds_sharded_fs.open("default/train/0003.parquet") as f:
+            f.seek(start)
+            return f.read(end - start)  # type: ignore
+
+    rows_index = indexer.get_rows_index("ds_sharded", "default", "train")
+    assert (rows_index.parquet_index.row_group_index is not None) == with_row_group_index
+    with patch.object(indexer.httpfs, "_cat_file", cat_file):
+        assert asyncio.run(rows_index.query_async(offset=1, length=3)).to_pydict() == ds_sharded[1:4]
+        # one range request per row group
+        assert len(fetched_ranges) == 2
+        assert len({url for url, _, _ in fetched_ranges}) == 2
+        assert asyncio.run(rows_index.query_async(offset=1, length=0)).to_pydict() == ds_sharded[:0]
+        assert asyncio.run(rows_index.query_async(offset=999999, length=1)).to_pydict() == ds_sharded[:0]
+        assert asyncio.run(rows_index.query_async(offset=1, length=99999999)).to_pydict() == ds_sharded[1:]
+        with pytest.raises(IndexError):
+            asyncio.run(rows_index.query_async(offset=-1, length=2))
+        # no column chunk to fetch when no column is selected
+        fetched_ranges.clear()
+        assert asyncio.run(rows_index.query_async(offset=1, length=3, columns=[])).num_rows == 3
+        assert not fetched_ranges
+        assert asyncio.run(rows_index.query_async(offset=1, length=3, columns=["text"])).to_pydict() == ds_sharded[1:4]
+
+
+def test_warm_up(
+    indexer: Indexer,
+    ds_sharded_fs: AbstractFileSystem,
+    dataset_sharded_with_config_parquet_metadata: dict[str, Any],
+) -> None:
+    async def cat_file(url: str, start: int, end: int) -> bytes:
+        with ds_sharded_fs.open("default/train/0003.parquet") as f:
+            f.seek(start)
+            return f.read(end - start)  # type: ignore
+
+    increase_split_requests(dataset="ds_sharded", config="default", split="train")
+    increase_split_requests(dataset="missing", config="default", split="train")
+    increase_split_requests(dataset="missing", config="default", split="train")
+    warm_up = WarmUp(indexer=indexer, num_splits=10, timeout_seconds=100)
+
+    async def start_and_wait() -> None:
+        await warm_up.start()
+        assert not warm_up.is_ready()
+        assert warm_up.task is not None
+        await warm_up.task
+
+    with patch.object(indexer.httpfs, "_cat_file", cat_file):
+        asyncio.run(start_and_wait())
+    assert warm_up.is_ready()
+    # the missing split is ignored
+    assert indexer.rows_index_cache is not None
+    assert len(indexer.rows_index_cache) == 1
+
+
+def test_warm_up_without_requests(indexer: Indexer) -> None:
+    warm_up = WarmUp(indexer=indexer, num_splits=10, timeout_seconds=100)
+    asyncio.run(warm_up.start())
+    assert warm_up.is_ready()
+    assert warm_up.task is None
+
+
+def test_indexer_get_rows_index_cache(
+    indexer: Indexer,
+    ds_sharded_fs: AbstractFileSystem,
+    dataset_sharded_with_config_parquet_metadata: dict[str, Any],
+) -> None:
+    assert indexer.rows_index_cache is not None
+    rows_index = indexer.get_rows_index("ds_sharded", "default", "train")
+    assert indexer.get_rows_index("ds_sharded", "default", "train") is rows_index
+    # the parquet metadata have been computed for another revision of the dataset: the index is built again
+    upsert_response(
+        kind="config-parquet-metadata",
+        dataset="ds_sharded",
+        config="default",
+        content=dataset_sharded_with_config_parquet_metadata,
+        http_status=HTTPStatus.OK,
+        progress=1.0,
+        dataset_git_revision="new_revision",
+    )
+    new_rows_index = indexer.get_rows_index("ds_sharded", "default", "train")
+    assert new_rows_index is not rows_index
+    assert new_rows_index.revision == "new_revision"
+    assert indexer.get_rows_index("ds_sharded", "default", "train") is new_rows_index
+    assert len(indexer.rows_index_cache) == 1
+
+
+def test_rows_index_query_with_row_group_cache(
+    app_config: AppConfig,
+    processing_graph: ProcessingGraph,
+    parquet_metadata_directory: StrPath,
+    ds_sharded: Dataset,
+    ds_sharded_fs: AbstractFileSystem,
+    dataset_sharded_with_config_parquet_metadata: dict[str, Any],
+) -> None:
+    indexer = Indexer(
+        processing_graph=processing_graph,
+        hf_token=app_config.common.hf_token,
+        parquet_metadata_directory=parquet_metadata_directory,
+        httpfs=HTTPFileSystem(),
+        row_group_cache_max_bytes=1_000_000,
+    )
+    assert indexer.row_group_cache is not None
+    with ds_sharded_fs.open("default/train/0003.parquet") as f:
+        with patch("libcommon.parquet_utils.HTTPFile", return_value=f):
+            rows_index = indexer.get_rows_index("ds_sharded", "default", "train")
+            assert rows_index.query(offset=1, length=3).to_pydict() == ds_sharded[1:4]
+    assert len(indexer.row_group_cache) == 2
+    # the row groups are now read from the cache, even for a different page
+    with patch("pyarrow.parquet.ParquetFile.read_row_group", side_effect=RuntimeError("no network")):
+        assert rows_index.query(offset=0, length=4).to_pydict() == ds_sharded[0:4]
+    # the parquet files have been converted again, at the same urls: the cached row groups are not used
+    upsert_response(
+        kind="config-parquet-metadata",
+        dataset="ds_sharded",
+        config="default",
+        content=dataset_sharded_with_config_parquet_metadata,
+        http_status=HTTPStatus.OK,
+        progress=1.0,
+        dataset_git_revision="new_revision",
+    )
+    new_rows_index = indexer.get_rows_index("ds_sharded", "default", "train")
+    with patch("pyarrow.parquet.ParquetFile.read_row_group", side_effect=RuntimeError("no network")):
+        with pytest.raises(RuntimeError):
+            new_rows_index.query(offset=0, length=4)
+
+
 def test_create_response(ds: Dataset, app_config: AppConfig, cached_assets_directory: StrPath) -> None:
     response = create_response(
         dataset="ds",
@@ -373,25 +573,3 @@ def test_create_response_with_image(
     ]
     cached_image_path = Path(cached_assets_directory) / "ds_image/--/default/train/0/image/image.jpg"
     assert cached_image_path.is_file()
-
-
-def test_update_last_modified_date_of_rows_in_assets_dir(tmp_path: Path) -> None:
-    cached_assets_directory = tmp_path / "cached-assets"
-    split_dir = cached_assets_directory / "ds/--/default/train"
-    split_dir.mkdir(parents=True)
-    n_rows = 8
-    for i in range(n_rows):
-        (split_dir / str(i)).mkdir()
-        time.sleep(0.01)
-    update_last_modified_date_of_rows_in_assets_dir(
-        dataset="ds",
-        config="default",
-        split="train",
-        offset=2,
-        length=3,
-        assets_directory=cached_assets_directory,
-    )
-    most_recent_rows_dirs = sorted(list(split_dir.glob("*")), key=os.path.getmtime, reverse=True)
-    most_recent_rows = [int(row_dir.name) for row_dir in most_recent_rows_dirs]
-    assert sorted(most_recent_rows[:3]) == [2, 3, 4]
-    assert most_recent_rows[3:] == [7, 6, 5, 1, 0]
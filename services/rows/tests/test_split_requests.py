@@ -0,0 +1,47 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+from unittest.mock import patch
+
+from libcommon.simple_cache import (
+    SplitFullName,
+    SplitRequestsDocument,
+    get_most_requested_splits,
+)
+
+from rows.split_requests import SplitRequestsCounter
+
+
+def test_split_requests_counter() -> None:
+    counter = SplitRequestsCounter(flush_interval_seconds=3_600)
+    for _ in range(3):
+        counter.record_request(dataset="dataset", config="config", split="test")
+    counter.record_request(dataset="dataset", config="config", split="train")
+    # the requests are only counted in memory until the flush
+    assert get_most_requested_splits(limit=10) == []
+    counter.flush()
+    assert get_most_requested_splits(limit=10) == [
+        SplitFullName(dataset="dataset", config="config", split="test"),
+        SplitFullName(dataset="dataset", config="config", split="train"),
+    ]
+    assert SplitRequestsDocument.objects(split="test").get().num_requests == 3
+    counter.record_request(dataset="dataset", config="config", split="test")
+    counter.flush()
+    assert SplitRequestsDocument.objects(split="test").get().num_requests == 4
+
+
+def test_split_requests_counter_flush_interval() -> None:
+    counter = SplitRequestsCounter(flush_interval_seconds=0)
+    counter.record_request(dataset="dataset", config="config", split="test")
+    assert get_most_requested_splits(limit=10) == [SplitFullName(dataset="dataset", config="config", split="test")]
+
+
+def test_split_requests_counter_flush_error() -> None:
+    counter = SplitRequestsCounter(flush_interval_seconds=3_600)
+    counter.record_request(dataset="dataset", config="config", split="test")
+    with patch("rows.split_requests.increase_splits_requests", side_effect=RuntimeError("unavailable")):
+        counter.flush()
+    counter.record_request(dataset="dataset", config="config", split="test")
+    # the counts of the failed flush are kept, and written with the next one
+    counter.flush()
+    assert SplitRequestsDocument.objects(split="test").get().num_requests == 2
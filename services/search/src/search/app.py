@@ -14,6 +14,7 @@ from libcommon.storage import (
     init_cached_assets_dir,
     init_duckdb_index_cache_dir,
 )
+from libcommon.viewer_utils.access_index import IndexesAccessIndex
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
@@ -22,7 +23,10 @@ from starlette.routing import Route
 from starlette_prometheus import PrometheusMiddleware
 
 from search.config import AppConfig
-from search.routes.search import create_search_endpoint
+from search.download_coordinator import DownloadCoordinator
+from search.duckdb_connection_pool import DuckDBConnectionPool
+from search.matching_ids_cache import MatchingIdsCache
+from search.routes.search import DOWNLOADS_FOLDER, create_search_endpoint
 
 
 def create_app() -> Starlette:
@@ -40,6 +44,10 @@ def create_app_with_config(app_config: AppConfig) -> Starlette:
     duckdb_index_cache_directory = init_duckdb_index_cache_dir(directory=app_config.duckdb_index.cache_directory)
     if not exists(duckdb_index_cache_directory):
         raise RuntimeError("The duckdb_index cache directory could not be accessed. Exiting.")
+    duckdb_indexes_access_index = IndexesAccessIndex(
+        indexes_directory=f"{duckdb_index_cache_directory}/{DOWNLOADS_FOLDER}",
+        flush_interval_seconds=app_config.duckdb_index.access_index_flush_interval_seconds,
+    )
 
     processing_graph = ProcessingGraph(app_config.processing_graph.specification)
     hf_jwt_public_keys = get_jwt_public_keys(
@@ -65,6 +73,16 @@ def create_app_with_config(app_config: AppConfig) -> Starlette:
     if not queue_resource.is_available():
         raise RuntimeError("The connection to the queue database could not be established. Exiting.")
 
+    duckdb_connection_pool = DuckDBConnectionPool(
+        max_connections=app_config.duckdb_index.connection_pool_max_connections,
+        max_memory_bytes=app_config.duckdb_index.connection_pool_max_memory_bytes,
+    )
+    matching_ids_cache = MatchingIdsCache(
+        max_count=app_config.duckdb_index.matching_ids_cache_max_count,
+        max_bytes=app_config.duckdb_index.matching_ids_cache_max_bytes,
+    )
+    download_coordinator = DownloadCoordinator(wait_seconds=app_config.duckdb_index.download_wait_seconds)
+
     routes = [
         Route("/healthcheck", endpoint=healthcheck_endpoint),
         Route("/metrics", endpoint=create_metrics_endpoint()),
@@ -73,6 +91,10 @@ def create_app_with_config(app_config: AppConfig) -> Starlette:
             "/search",
             endpoint=create_search_endpoint(
                 duckdb_index_file_directory=duckdb_index_cache_directory,
+                duckdb_indexes_access_index=duckdb_indexes_access_index,
+                duckdb_connection_pool=duckdb_connection_pool,
+                matching_ids_cache=matching_ids_cache,
+                download_coordinator=download_coordinator,
                 cached_assets_base_url=app_config.cached_assets.base_url,
                 cached_assets_directory=cached_assets_directory,
                 cache_max_days=app_config.cache.max_days,
@@ -90,7 +112,16 @@ def create_app_with_config(app_config: AppConfig) -> Starlette:
         ),
     ]
 
-    return Starlette(routes=routes, middleware=middleware, on_shutdown=[resource.release for resource in resources])
+    return Starlette(
+        routes=routes,
+        middleware=middleware,
+        on_shutdown=[resource.release for resource in resources]
+        + [
+            duckdb_indexes_access_index.flush,
+            duckdb_connection_pool.clear,
+            download_coordinator.shutdown,
+        ],
+    )
 
 
 def start() -> None:
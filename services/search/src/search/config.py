@@ -17,12 +17,24 @@ from libcommon.config import (
 
 DUCKDB_INDEX_CACHE_DIRECTORY = None
 DUCKDB_INDEX_TARGET_REVISION = "refs/convert/parquet"
+DUCKDB_INDEX_CONNECTION_POOL_MAX_CONNECTIONS = 16
+DUCKDB_INDEX_CONNECTION_POOL_MAX_MEMORY_BYTES = 1_000_000_000
+DUCKDB_INDEX_MATCHING_IDS_CACHE_MAX_COUNT = 1_000
+DUCKDB_INDEX_MATCHING_IDS_CACHE_MAX_BYTES = 100_000_000
+DUCKDB_INDEX_DOWNLOAD_WAIT_SECONDS = 30.0
+DUCKDB_INDEX_ACCESS_INDEX_FLUSH_INTERVAL_SECONDS = 10.0
 
 
 @dataclass(frozen=True)
 class DuckDbIndexConfig:
     cache_directory: Optional[str] = DUCKDB_INDEX_CACHE_DIRECTORY
     target_revision: str = DUCKDB_INDEX_TARGET_REVISION
+    connection_pool_max_connections: int = DUCKDB_INDEX_CONNECTION_POOL_MAX_CONNECTIONS
+    connection_pool_max_memory_bytes: int = DUCKDB_INDEX_CONNECTION_POOL_MAX_MEMORY_BYTES
+    matching_ids_cache_max_count: int = DUCKDB_INDEX_MATCHING_IDS_CACHE_MAX_COUNT
+    matching_ids_cache_max_bytes: int = DUCKDB_INDEX_MATCHING_IDS_CACHE_MAX_BYTES
+    download_wait_seconds: float = DUCKDB_INDEX_DOWNLOAD_WAIT_SECONDS
+    access_index_flush_interval_seconds: float = DUCKDB_INDEX_ACCESS_INDEX_FLUSH_INTERVAL_SECONDS
 
     @classmethod
     def from_env(cls) -> "DuckDbIndexConfig":
@@ -31,6 +43,25 @@ class DuckDbIndexConfig:
             return cls(
                 cache_directory=env.str(name="CACHE_DIRECTORY", default=DUCKDB_INDEX_CACHE_DIRECTORY),
                 target_revision=env.str(name="TARGET_REVISION", default=DUCKDB_INDEX_TARGET_REVISION),
+                connection_pool_max_connections=env.int(
+                    name="CONNECTION_POOL_MAX_CONNECTIONS", default=DUCKDB_INDEX_CONNECTION_POOL_MAX_CONNECTIONS
+                ),
+                connection_pool_max_memory_bytes=env.int(
+                    name="CONNECTION_POOL_MAX_MEMORY_BYTES", default=DUCKDB_INDEX_CONNECTION_POOL_MAX_MEMORY_BYTES
+                ),
+                matching_ids_cache_max_count=env.int(
+                    name="MATCHING_IDS_CACHE_MAX_COUNT", default=DUCKDB_INDEX_MATCHING_IDS_CACHE_MAX_COUNT
+                ),
+                matching_ids_cache_max_bytes=env.int(
+                    name="MATCHING_IDS_CACHE_MAX_BYTES", default=DUCKDB_INDEX_MATCHING_IDS_CACHE_MAX_BYTES
+                ),
+                download_wait_seconds=env.float(
+                    name="DOWNLOAD_WAIT_SECONDS", default=DUCKDB_INDEX_DOWNLOAD_WAIT_SECONDS
+                ),
+                access_index_flush_interval_seconds=env.float(
+                    name="ACCESS_INDEX_FLUSH_INTERVAL_SECONDS",
+                    default=DUCKDB_INDEX_ACCESS_INDEX_FLUSH_INTERVAL_SECONDS,
+                ),
             )
 
 
@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from libapi.exceptions import ResponseNotReadyError
+
+DOWNLOAD_MAX_WORKERS = 4
+
+
+class DownloadCoordinator:
+    """Run the downloads of the index files in background threads, at most once at a time per file.
+
+    The requests on a file that is being downloaded wait for the same download instead of starting a new one. The
+    download continues in the background if they stop waiting. The deduplication across processes relies on the
+    file lock taken by the download function (see `download_index_file`).
+
+    Args:
+        wait_seconds (float): The maximum time a request waits for the download, before getting a "not ready" error.
+        max_workers (int): The maximum number of concurrent downloads.
+    """
+
+    def __init__(self, wait_seconds: float, max_workers: int = DOWNLOAD_MAX_WORKERS):
+        self.wait_seconds = wait_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="download")
+        self._futures: Dict[str, "Future[None]"] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, func: Callable[..., None], **kwargs: Any) -> "Future[None]":
+        """Start the download of the file, unless it is already in progress, and return its future."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None or future.done():
+                # ^ a done future may not have been forgotten yet by its callback
+                logging.info(f"start the download of {key}")
+                future = self._executor.submit(func, **kwargs)
+                self._futures[key] = future
+                # forget the download once done, so that a failed download is retried by the next request
+                future.add_done_callback(lambda done_future: self._forget(key, done_future))
+            else:
+                logging.debug(f"the download of {key} is already in progress")
+            return future
+
+    def _forget(self, key: str, future: "Future[None]") -> None:
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    async def download(self, key: str, func: Callable[..., None], **kwargs: Any) -> None:
+        """Download the file without blocking the event loop.
+
+        Raises:
+            - [`libapi.exceptions.ResponseNotReadyError`]
+              if the download is not finished after `wait_seconds`.
+            - the exception raised by `func`, if the download failed.
+        """
+        future = self.submit(key, func, **kwargs)
+        try:
+            # shield: a request that stops waiting must not cancel the download shared with the other requests
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.wait_seconds)
+        except asyncio.TimeoutError as err:
+            raise ResponseNotReadyError("The index of the split is being downloaded. Please retry later.") from err
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
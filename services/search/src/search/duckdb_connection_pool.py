@@ -0,0 +1,193 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import contextlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generator, Optional, Tuple
+
+import duckdb
+from libcommon.prometheus import (
+    DUCKDB_CONNECTION_POOL_BYTES,
+    DUCKDB_CONNECTION_POOL_EVICTIONS_TOTAL,
+    DUCKDB_CONNECTION_POOL_HITS_TOTAL,
+    DUCKDB_CONNECTION_POOL_MISSES_TOTAL,
+)
+
+DELETED_FILES_CHECK_INTERVAL_SECONDS = 60.0
+
+DATABASE_SIZE_UNITS = {"bytes": 1, "KB": 1_000, "MB": 1_000_000, "GB": 1_000_000_000, "TB": 1_000_000_000_000}
+
+
+def parse_database_size(size: str) -> int:
+    # DuckDB reports the memory usage as a human-readable string, e.g. "0 bytes", "262KB" or "1.2GB"
+    match = re.fullmatch(r"\s*([\d.]+)\s*([A-Za-z]+)\s*", size)
+    if match is None or match.group(2) not in DATABASE_SIZE_UNITS:
+        return 0
+    return int(float(match.group(1)) * DATABASE_SIZE_UNITS[match.group(2)])
+
+
+def get_memory_usage(connection: duckdb.DuckDBPyConnection) -> int:
+    rows = connection.execute("SELECT memory_usage FROM pragma_database_size()").fetchall()
+    return sum(parse_database_size(memory_usage) for (memory_usage,) in rows)
+
+
+def get_file_id(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+
+@dataclass
+class DuckDBConnectionPoolEntry:
+    connection: duckdb.DuckDBPyConnection
+    file_id: Optional[Tuple[int, int]] = None
+    num_bytes: int = 0
+    num_users: int = 0
+    evicted: bool = False
+
+
+class DuckDBConnectionPool:
+    """A thread-safe LRU pool of read-only DuckDB connections, keyed by the location of the index file.
+
+    Opening a connection loads the catalog of the database and the full-text search extension: the connections are
+    kept open and reused by the next requests on the same index. A connection is shared by the threads of the process,
+    each query runs on its own cursor. The connections to the index files that have been deleted, or replaced, since
+    they were opened are closed, so that the disk space of the deleted files is released: the requested file is
+    checked on every request, and the other files at most every deleted_files_check_interval_seconds. The files are
+    checked outside of the lock.
+
+    Args:
+        max_connections (int): The maximum number of open connections (i.e. of open index files).
+        max_memory_bytes (int): The maximum memory used by the connections, as reported by DuckDB after each query.
+          The least recently used connections are closed first. Every connection is limited to an equal share of
+          it, so that the connections cannot use more memory than max_memory_bytes together.
+        deleted_files_check_interval_seconds (float): The minimal time between two checks of all the open files.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_memory_bytes: int,
+        deleted_files_check_interval_seconds: float = DELETED_FILES_CHECK_INTERVAL_SECONDS,
+    ):
+        self.max_connections = max_connections
+        self.max_memory_bytes = max_memory_bytes
+        self.deleted_files_check_interval_seconds = deleted_files_check_interval_seconds
+        self._last_deleted_files_check = time.monotonic()
+        self.connection_max_memory_bytes = max(max_memory_bytes // max(max_connections, 1), 1)
+        self.num_bytes = 0
+        self._entries: "OrderedDict[str, DuckDBConnectionPoolEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _connect(self, index_file_location: str) -> duckdb.DuckDBPyConnection:
+        return duckdb.connect(
+            index_file_location, read_only=True, config={"memory_limit": f"{self.connection_max_memory_bytes}B"}
+        )
+
+    @contextlib.contextmanager
+    def cursor(self, index_file_location: str) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+        """Yield a cursor on the index file, opening the connection if needed."""
+        self._remove_deleted_files()
+        # a connection to a previous version of the file must not be used
+        file_id = get_file_id(index_file_location)
+        with self._lock:
+            entry = self._entries.get(index_file_location)
+            if entry is not None and entry.file_id != file_id:
+                self._remove(index_file_location, reason="deleted")
+                DUCKDB_CONNECTION_POOL_BYTES.set(self.num_bytes)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(index_file_location)
+                entry.num_users += 1
+                DUCKDB_CONNECTION_POOL_HITS_TOTAL.inc()
+        if entry is None:
+            DUCKDB_CONNECTION_POOL_MISSES_TOTAL.inc()
+            # opening the connection is slow: don't hold the lock
+            connection = self._connect(index_file_location)
+            with self._lock:
+                entry = self._entries.get(index_file_location)
+                if entry is None:
+                    entry = DuckDBConnectionPoolEntry(connection=connection, file_id=file_id)
+                    self._entries[index_file_location] = entry
+                else:
+                    # another thread has opened the same index in the meantime
+                    connection.close()
+                entry.num_users += 1
+        cursor = entry.connection.cursor()
+        try:
+            yield cursor
+        finally:
+            try:
+                num_bytes = get_memory_usage(cursor)
+            except duckdb.Error:
+                logging.debug(f"failed to get the memory usage of {index_file_location}")
+                num_bytes = entry.num_bytes
+            cursor.close()
+            with self._lock:
+                entry.num_users -= 1
+                if entry.evicted:
+                    self._close_if_unused(entry)
+                else:
+                    self.num_bytes += num_bytes - entry.num_bytes
+                    entry.num_bytes = num_bytes
+                    self._evict(keep=index_file_location)
+
+    def clear(self) -> None:
+        with self._lock:
+            for index_file_location in list(self._entries):
+                self._remove(index_file_location, reason="clear")
+            DUCKDB_CONNECTION_POOL_BYTES.set(self.num_bytes)
+
+    def _remove_deleted_files(self) -> None:
+        # an open file that is deleted (e.g. by the cache maintenance job) keeps using disk space until its connection
+        # is closed
+        with self._lock:
+            if time.monotonic() - self._last_deleted_files_check < self.deleted_files_check_interval_seconds:
+                return
+            self._last_deleted_files_check = time.monotonic()
+            entries = list(self._entries.items())
+        deleted_entries = [
+            (index_file_location, entry)
+            for index_file_location, entry in entries
+            if get_file_id(index_file_location) != entry.file_id
+        ]
+        if not deleted_entries:
+            return
+        with self._lock:
+            for index_file_location, entry in deleted_entries:
+                # the connection might have been replaced in the meantime
+                if self._entries.get(index_file_location) is entry:
+                    self._remove(index_file_location, reason="deleted")
+            DUCKDB_CONNECTION_POOL_BYTES.set(self.num_bytes)
+
+    def _close_if_unused(self, entry: DuckDBConnectionPoolEntry) -> None:
+        # closing the connection invalidates its cursors: wait for the queries in progress
+        if entry.num_users == 0:
+            entry.connection.close()
+
+    def _remove(self, index_file_location: str, reason: str) -> None:
+        entry = self._entries.pop(index_file_location)
+        self.num_bytes -= entry.num_bytes
+        entry.evicted = True
+        self._close_if_unused(entry)
+        DUCKDB_CONNECTION_POOL_EVICTIONS_TOTAL.labels(reason=reason).inc()
+
+    def _evict(self, keep: str) -> None:
+        # evict the least recently used connections, but never the one that has just been used
+        while len(self._entries) > self.max_connections or self.num_bytes > self.max_memory_bytes:
+            index_file_location = next(iter(self._entries))
+            if index_file_location == keep:
+                break
+            self._remove(index_file_location, reason="size")
+        DUCKDB_CONNECTION_POOL_BYTES.set(self.num_bytes)
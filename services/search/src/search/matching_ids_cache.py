@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from libcommon.prometheus import (
+    MATCHING_IDS_CACHE_BYTES,
+    MATCHING_IDS_CACHE_EVICTIONS_TOTAL,
+    MATCHING_IDS_CACHE_HITS_TOTAL,
+    MATCHING_IDS_CACHE_MISSES_TOTAL,
+)
+
+MatchingIds = npt.NDArray[np.signedinteger[Any]]
+MatchingIdsCacheKey = Tuple[str, str, str, Optional[str], str]
+# ^ (dataset, config, split, revision, normalized query)
+
+
+def normalize_query(query: str) -> str:
+    # the full-text search index ignores the case and the extra whitespace: such queries share the same results
+    return " ".join(query.split()).lower()
+
+
+def get_matching_ids_cache_key(
+    dataset: str, config: str, split: str, revision: Optional[str], query: str
+) -> MatchingIdsCacheKey:
+    return (dataset, config, split, revision, normalize_query(query))
+
+
+def to_compact_ids(ids: npt.ArrayLike) -> MatchingIds:
+    # the ids are row indexes: most of the splits fit in int32, which halves the memory used by the cache
+    array = np.asarray(ids, dtype=np.int64)
+    if len(array) == 0 or array.max() <= np.iinfo(np.int32).max:
+        return array.astype(np.int32)
+    return array
+
+
+class MatchingIdsCache:
+    """A thread-safe LRU cache of the ids of the rows that match a full-text search query.
+
+    Scoring the rows runs over the whole index: with the sorted list of matching ids, the next pages of the same
+    search, and the same query sent by other users, are read from the index directly. The entries are keyed by the
+    revision of the dataset, so that a new index never serves stale results.
+
+    Args:
+        max_count (int): The maximum number of entries.
+        max_bytes (int): The maximum memory used by the arrays of ids. The least recently used entries are evicted
+          first, and an array larger than the limit is not cached.
+    """
+
+    def __init__(self, max_count: int, max_bytes: int):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+        self._entries: "OrderedDict[MatchingIdsCacheKey, MatchingIds]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: MatchingIdsCacheKey) -> Optional[MatchingIds]:
+        with self._lock:
+            ids = self._entries.get(key)
+            if ids is None:
+                MATCHING_IDS_CACHE_MISSES_TOTAL.inc()
+                return None
+            self._entries.move_to_end(key)
+            MATCHING_IDS_CACHE_HITS_TOTAL.inc()
+            return ids
+
+    def put(self, key: MatchingIdsCacheKey, ids: npt.ArrayLike) -> MatchingIds:
+        """Cache the matching ids, stored as a compact array, and return the array."""
+        compact_ids = to_compact_ids(ids)
+        # the arrays are shared by the threads: prevent in-place modifications
+        compact_ids.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, reason="replaced")
+            if compact_ids.nbytes <= self.max_bytes:
+                self._entries[key] = compact_ids
+                self.num_bytes += compact_ids.nbytes
+                self._evict()
+            MATCHING_IDS_CACHE_BYTES.set(self.num_bytes)
+        return compact_ids
+
+    def _remove(self, key: MatchingIdsCacheKey, reason: str) -> None:
+        ids = self._entries.pop(key)
+        self.num_bytes -= ids.nbytes
+        MATCHING_IDS_CACHE_EVICTIONS_TOTAL.labels(reason=reason).inc()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_count or self.num_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)), reason="size")
@@ -1,19 +1,23 @@
 # SPDX-License-Identifier: Apache-2.0
 # Copyright 2023 The HuggingFace Authors.
 
+import asyncio
 import json
 import logging
 import os
-import random
 import re
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import sha1
 from http import HTTPStatus
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Callable, List, Mapping, Optional, Tuple, TypeVar
 
 import duckdb
+import numpy as np
+import numpy.typing as npt
 import pyarrow as pa
 from datasets import Audio, Features, Image, Value
+from filelock import FileLock
 from huggingface_hub import hf_hub_download
 from libapi.authentication import auth_check
 from libapi.exceptions import (
@@ -25,7 +29,6 @@ from libapi.exceptions import (
 from libapi.utils import (
     Endpoint,
     are_valid_parameters,
-    clean_cached_assets,
     get_json_api_error_response,
     get_json_error_response,
     get_json_ok_response,
@@ -41,31 +44,44 @@ from libcommon.simple_cache import (
 )
 from libcommon.storage import StrPath, init_dir
 from libcommon.utils import PaginatedResponse
+from libcommon.viewer_utils.access_index import IndexesAccessIndex
 from libcommon.viewer_utils.features import (
     get_supported_unsupported_columns,
     to_features_list,
 )
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 from starlette.responses import Response
 
+from search.download_coordinator import DownloadCoordinator
+from search.duckdb_connection_pool import DuckDBConnectionPool
+from search.matching_ids_cache import (
+    MatchingIds,
+    MatchingIdsCache,
+    MatchingIdsCacheKey,
+    get_matching_ids_cache_key,
+)
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 ROW_IDX_COLUMN = "__hf_index_id"
 MAX_ROWS = 100
 UNSUPPORTED_FEATURES = [Value("binary"), Audio(), Image()]
 
-FTS_COMMAND_COUNT = (
-    "SELECT COUNT(*) FROM (SELECT __hf_index_id, fts_main_data.match_bm25(__hf_index_id, ?) AS score FROM"
-    " data) A WHERE score IS NOT NULL;"
+FTS_MATCHING_IDS_COMMAND = (
+    "SELECT __hf_index_id FROM (SELECT __hf_index_id, fts_main_data.match_bm25(__hf_index_id, ?) AS score FROM"
+    " data) A WHERE score IS NOT NULL ORDER BY __hf_index_id;"
 )
 
-FTS_COMMAND = (
-    "SELECT * EXCLUDE (score) FROM (SELECT *, fts_main_data.match_bm25(__hf_index_id, ?) AS score FROM "
-    "data) A WHERE score IS NOT NULL ORDER BY __hf_index_id OFFSET {offset} LIMIT {length};"
-)
+ROWS_BY_IDS_COMMAND = "SELECT * FROM data WHERE __hf_index_id IN ({ids}) ORDER BY __hf_index_id;"
+EMPTY_ROWS_COMMAND = "SELECT * FROM data LIMIT 0;"
 REPO_TYPE = "dataset"
 HUB_DOWNLOAD_CACHE_FOLDER = "cache"
+SHARDS_MAX_WORKERS = 8
+DOWNLOADS_FOLDER = "downloads"
 
 
 def get_download_folder(
@@ -74,7 +90,7 @@ def get_download_folder(
     payload = (dataset, config, split, revision)
     hash_suffix = sha1(json.dumps(payload, sort_keys=True).encode(), usedforsecurity=False).hexdigest()[:8]
     subdirectory = "".join([c if re.match(r"[\w-]", c) else "-" for c in f"{dataset}-{hash_suffix}"])
-    return f"{root_directory}/downloads/{subdirectory}"
+    return f"{root_directory}/{DOWNLOADS_FOLDER}/{subdirectory}"
 
 
 def download_index_file(
@@ -85,37 +101,103 @@ def download_index_file(
     repo_file_location: str,
     hf_token: Optional[str] = None,
 ) -> None:
-    logging.info(f"init_dir {index_folder}")
-    init_dir(index_folder)
-
-    # see https://pypi.org/project/hf-transfer/ for more details about how to enable hf_transfer
-    os.environ["HF_HUB_ENABLE_HF_TRANSFER"] = "1"
-    hf_hub_download(
-        repo_type=REPO_TYPE,
-        revision=target_revision,
-        repo_id=dataset,
-        filename=repo_file_location,
-        local_dir=index_folder,
-        local_dir_use_symlinks=False,
-        token=hf_token,
-        cache_dir=cache_folder,
-    )
+    index_file_location = Path(index_folder) / repo_file_location
+    logging.info(f"init_dir {index_file_location.parent}")
+    init_dir(index_file_location.parent)
+
+    # the lock prevents the other processes from downloading the same file at the same time
+    with FileLock(f"{index_file_location}.lock"):
+        if index_file_location.is_file():
+            logging.info(f"{index_file_location} has been downloaded by another process")
+            return
+        # see https://pypi.org/project/hf-transfer/ for more details about how to enable hf_transfer
+        os.environ["HF_HUB_ENABLE_HF_TRANSFER"] = "1"
+        # the file is streamed to the cache folder, and the download is resumed from the partial file if it has been
+        # interrupted
+        cached_file_location = hf_hub_download(
+            repo_type=REPO_TYPE,
+            revision=target_revision,
+            repo_id=dataset,
+            filename=repo_file_location,
+            token=hf_token,
+            cache_dir=cache_folder,
+            resume_download=True,
+        )
+        # the complete file is moved to the index folder: a partially written index is never opened. The cache entry
+        # is removed, since it would point to the moved file.
+        os.replace(os.path.realpath(cached_file_location), index_file_location)
+        os.remove(cached_file_location)
+
+
+def get_matching_ids(con: duckdb.DuckDBPyConnection, query: str) -> npt.NDArray[np.int64]:
+    # the rows are scored once: the count and the pages are computed from the list of matching ids
+    result = con.execute(query=FTS_MATCHING_IDS_COMMAND, parameters=[query]).fetchnumpy()
+    return np.asarray(result[ROW_IDX_COLUMN], dtype=np.int64)
+
+
+def get_rows_by_ids(con: duckdb.DuckDBPyConnection, ids: MatchingIds) -> pa.Table:
+    if len(ids) == 0:
+        return con.execute(query=EMPTY_ROWS_COMMAND).arrow()
+    # the ids are integers read from the index, not user input
+    return con.execute(query=ROWS_BY_IDS_COMMAND.format(ids=", ".join(str(int(id)) for id in ids))).arrow()
+
 
+def map_shards(func: Callable[[str], T], index_file_locations: List[str]) -> List[T]:
+    if len(index_file_locations) == 1:
+        return [func(index_file_locations[0])]
+    # DuckDB releases the GIL: the shards are queried in parallel
+    with ThreadPoolExecutor(max_workers=min(len(index_file_locations), SHARDS_MAX_WORKERS)) as executor:
+        return list(executor.map(func, index_file_locations))
 
-def full_text_search(index_file_location: str, query: str, offset: int, length: int) -> Tuple[int, pa.Table]:
-    con = duckdb.connect(index_file_location, read_only=True)
-    count_result = con.execute(query=FTS_COMMAND_COUNT, parameters=[query]).fetchall()
-    num_rows_total = count_result[0][0]  # it will always return a non empty list with one element in a tuple
+
+def full_text_search(
+    connection_pool: DuckDBConnectionPool,
+    index_file_locations: List[str],
+    query: str,
+    offset: int,
+    length: int,
+    matching_ids_cache: Optional[MatchingIdsCache] = None,
+    matching_ids_cache_key: Optional[MatchingIdsCacheKey] = None,
+) -> Tuple[int, pa.Table]:
+    """Search the rows of the split, whose index can be sharded in several files.
+
+    The shards contain consecutive ranges of rows, numbered in the whole split: the matching ids of the shards, and
+    the rows of the page, are concatenated in the order of the shards.
+    """
+
+    def get_shard_matching_ids(index_file_location: str) -> npt.NDArray[np.int64]:
+        with connection_pool.cursor(index_file_location) as con:
+            return get_matching_ids(con, query)
+
+    def get_shard_rows(index_file_location: str) -> pa.Table:
+        with connection_pool.cursor(index_file_location) as con:
+            return get_rows_by_ids(con, page_ids)
+
+    matching_ids: Optional[MatchingIds] = None
+    if matching_ids_cache is not None and matching_ids_cache_key is not None:
+        with StepProfiler(method="full_text_search", step="get the matching ids from the cache"):
+            matching_ids = matching_ids_cache.get(matching_ids_cache_key)
+    if matching_ids is None:
+        with StepProfiler(method="full_text_search", step="score the rows"):
+            matching_ids = np.concatenate(map_shards(get_shard_matching_ids, index_file_locations))
+        if matching_ids_cache is not None and matching_ids_cache_key is not None:
+            matching_ids = matching_ids_cache.put(matching_ids_cache_key, matching_ids)
+    num_rows_total = len(matching_ids)
     logging.debug(f"got {num_rows_total=} results for {query=}")
-    query_result = con.execute(
-        query=FTS_COMMAND.format(offset=offset, length=length),
-        parameters=[query],
-    )
-    pa_table = query_result.arrow()
-    con.close()
+    page_ids = matching_ids[offset : offset + length]
+    with StepProfiler(method="full_text_search", step="get the rows by ids"):
+        if len(page_ids) == 0:
+            pa_table = get_shard_rows(index_file_locations[0])
+        else:
+            pa_table = pa.concat_tables(map_shards(get_shard_rows, index_file_locations))
     return (num_rows_total, pa_table)
 
 
+def get_index_filenames(content: Mapping[str, Any]) -> List[str]:
+    # the index of a big split is sharded. The responses computed before the sharding only have "filename"
+    return [shard["filename"] for shard in content.get("shards", [])] or [content["filename"]]
+
+
 def get_cache_entry_from_steps(
     processing_steps: List[ProcessingStep],
     dataset: str,
@@ -194,6 +276,10 @@ def create_response(
 def create_search_endpoint(
     processing_graph: ProcessingGraph,
     duckdb_index_file_directory: StrPath,
+    duckdb_indexes_access_index: IndexesAccessIndex,
+    duckdb_connection_pool: DuckDBConnectionPool,
+    matching_ids_cache: MatchingIdsCache,
+    download_coordinator: DownloadCoordinator,
     cached_assets_base_url: str,
     cached_assets_directory: StrPath,
     target_revision: str,
@@ -206,10 +292,6 @@ def create_search_endpoint(
     hf_timeout_seconds: Optional[float] = None,
     max_age_long: int = 0,
     max_age_short: int = 0,
-    clean_cache_proba: float = 0.0,
-    keep_first_rows_number: int = -1,
-    keep_most_recent_rows_number: int = -1,
-    max_cleaned_rows_number: int = -1,
 ) -> Endpoint:
     async def search_endpoint(request: Request) -> Response:
         revision: Optional[str] = None
@@ -284,48 +366,54 @@ def create_search_endpoint(
                             revision=revision,
                         )
 
-                with StepProfiler(method="search_endpoint", step="download index file if missing"):
-                    file_name = content["filename"]
+                with StepProfiler(method="search_endpoint", step="download index files if missing"):
                     index_folder = get_download_folder(duckdb_index_file_directory, dataset, config, split, revision)
-                    repo_file_location = f"{config}/{split}/{file_name}"
-                    index_file_location = f"{index_folder}/{repo_file_location}"
-                    index_path = Path(index_file_location)
-                    if not index_path.is_file():
-                        with StepProfiler(method="search_endpoint", step="download index file"):
-                            download_index_file(
-                                cache_folder=f"{duckdb_index_file_directory}/{HUB_DOWNLOAD_CACHE_FOLDER}",
-                                index_folder=index_folder,
-                                target_revision=target_revision,
-                                dataset=dataset,
-                                repo_file_location=repo_file_location,
-                                hf_token=hf_token,
+                    repo_file_locations = [
+                        f"{config}/{split}/{file_name}" for file_name in get_index_filenames(content)
+                    ]
+                    index_file_locations = [
+                        f"{index_folder}/{repo_file_location}" for repo_file_location in repo_file_locations
+                    ]
+                    missing_repo_file_locations = [
+                        repo_file_location
+                        for repo_file_location, index_file_location in zip(repo_file_locations, index_file_locations)
+                        if not Path(index_file_location).is_file()
+                    ]
+                    if missing_repo_file_locations:
+                        with StepProfiler(method="search_endpoint", step="download index files"):
+                            # the concurrent requests on the same file share the same download
+                            await asyncio.gather(
+                                *[
+                                    download_coordinator.download(
+                                        f"{index_folder}/{repo_file_location}",
+                                        download_index_file,
+                                        cache_folder=f"{duckdb_index_file_directory}/{HUB_DOWNLOAD_CACHE_FOLDER}",
+                                        index_folder=index_folder,
+                                        target_revision=target_revision,
+                                        dataset=dataset,
+                                        repo_file_location=repo_file_location,
+                                        hf_token=hf_token,
+                                    )
+                                    for repo_file_location in missing_repo_file_locations
+                                ]
                             )
 
                 with StepProfiler(method="search_endpoint", step="perform FTS command"):
-                    logging.debug(f"connect to index file {index_file_location}")
-                    (num_rows_total, pa_table) = full_text_search(index_file_location, query, offset, length)
-                    index_path.touch()
-
-                with StepProfiler(method="search_endpoint", step="clean cache"):
-                    # no need to do it every time
-                    if random.random() < clean_cache_proba:  # nosec
-                        if (
-                            keep_first_rows_number < 0
-                            and keep_most_recent_rows_number < 0
-                            and max_cleaned_rows_number < 0
-                        ):
-                            logger.debug(
-                                "Params keep_first_rows_number, keep_most_recent_rows_number and"
-                                " max_cleaned_rows_number are not set. Skipping cached assets cleaning."
-                            )
-                        else:
-                            clean_cached_assets(
-                                dataset=dataset,
-                                cached_assets_directory=cached_assets_directory,
-                                keep_first_rows_number=keep_first_rows_number,
-                                keep_most_recent_rows_number=keep_most_recent_rows_number,
-                                max_cleaned_rows_number=max_cleaned_rows_number,
-                            )
+                    logging.debug(f"connect to index files {index_file_locations}")
+                    # DuckDB releases the GIL: run the queries in a thread to not block the event loop
+                    (num_rows_total, pa_table) = await run_in_threadpool(
+                        full_text_search,
+                        duckdb_connection_pool,
+                        index_file_locations,
+                        query,
+                        offset,
+                        length,
+                        matching_ids_cache,
+                        get_matching_ids_cache_key(dataset, config, split, revision, query),
+                    )
+                    # the cache maintenance job deletes the least recently used indexes. The accesses are written
+                    # to the index in batches, but a write can happen here
+                    await run_in_threadpool(duckdb_indexes_access_index.record_access, *index_file_locations)
 
                 with StepProfiler(method="search_endpoint", step="create response"):
                     response = create_response(
@@ -2,7 +2,9 @@
 # Copyright 2023 The HuggingFace Authors.
 
 import os
-from typing import Any
+from pathlib import Path
+from typing import Any, List, Tuple
+from unittest.mock import patch
 
 import duckdb
 import pandas as pd
@@ -10,7 +12,14 @@ import pyarrow as pa
 import pytest
 from libcommon.storage import StrPath
 
-from search.routes.search import full_text_search, get_download_folder
+from search.duckdb_connection_pool import DuckDBConnectionPool
+from search.matching_ids_cache import MatchingIdsCache, get_matching_ids_cache_key
+from search.routes.search import (
+    download_index_file,
+    full_text_search,
+    get_download_folder,
+    get_index_filenames,
+)
 
 
 def test_get_download_folder(duckdb_index_cache_directory: StrPath) -> None:
@@ -20,6 +29,37 @@ def test_get_download_folder(duckdb_index_cache_directory: StrPath) -> None:
     assert str(duckdb_index_cache_directory) in index_folder
 
 
+def test_download_index_file(tmp_path: Path) -> None:
+    cache_folder = tmp_path / "cache"
+    index_folder = tmp_path / "downloads"
+    repo_file_location = "config/split/index.duckdb"
+
+    def fake_hf_hub_download(cache_dir: str, **kwargs: Any) -> str:
+        # the hub cache stores the file as a blob, and links to it from the snapshot of the revision
+        blob = Path(cache_dir) / "blobs" / "0123"
+        blob.parent.mkdir(parents=True)
+        blob.write_bytes(b"index")
+        snapshot_file = Path(cache_dir) / "snapshots" / "revision" / kwargs["filename"]
+        snapshot_file.parent.mkdir(parents=True)
+        snapshot_file.symlink_to(blob)
+        return str(snapshot_file)
+
+    with patch("search.routes.search.hf_hub_download", side_effect=fake_hf_hub_download) as mock_hf_hub_download:
+        for _ in range(2):
+            download_index_file(
+                cache_folder=str(cache_folder),
+                index_folder=str(index_folder),
+                target_revision="refs/convert/parquet",
+                dataset="dataset",
+                repo_file_location=repo_file_location,
+            )
+    # the second call finds the downloaded file
+    mock_hf_hub_download.assert_called_once()
+    assert (index_folder / repo_file_location).read_bytes() == b"index"
+    assert not (cache_folder / "blobs" / "0123").exists()
+    assert not (cache_folder / "snapshots" / "revision" / repo_file_location).is_symlink()
+
+
 @pytest.mark.parametrize(
     "query,offset,length,expected_result, expected_num_rows_total",
     [
@@ -86,7 +126,9 @@ def test_full_text_search(
     con.close()
 
     # assert search results
-    (num_rows_total, pa_table) = full_text_search(index_file_location, query, offset, length)
+    connection_pool = DuckDBConnectionPool(max_connections=1, max_memory_bytes=100_000_000)
+    (num_rows_total, pa_table) = full_text_search(connection_pool, [index_file_location], query, offset, length)
+    connection_pool.clear()
     assert num_rows_total is not None
     assert pa_table is not None
     assert num_rows_total == expected_num_rows_total
@@ -102,3 +144,63 @@ def test_full_text_search(
     con.close()
 
     os.remove(index_file_location)
+
+
+@pytest.mark.parametrize(
+    "content,expected",
+    [
+        ({"filename": "index.duckdb"}, ["index.duckdb"]),
+        ({"filename": "index.duckdb", "shards": [{"filename": "index.duckdb"}]}, ["index.duckdb"]),
+        (
+            {
+                "filename": "index-00000-of-00002.duckdb",
+                "shards": [{"filename": "index-00000-of-00002.duckdb"}, {"filename": "index-00001-of-00002.duckdb"}],
+            },
+            ["index-00000-of-00002.duckdb", "index-00001-of-00002.duckdb"],
+        ),
+    ],
+)
+def test_get_index_filenames(content: Any, expected: List[str]) -> None:
+    assert get_index_filenames(content) == expected
+
+
+def create_index_file(index_file_location: str, start: int, stop: int) -> None:
+    con = duckdb.connect(index_file_location)
+    con.execute("LOAD 'fts';")
+    con.sql(
+        "CREATE TABLE data AS SELECT range AS __hf_index_id, CASE WHEN range % 3 = 0 THEN 'Lord Vader' ELSE 'Rebel'"
+        f" END AS text FROM range({start}, {stop})"
+    )
+    con.sql("PRAGMA create_fts_index('data', '__hf_index_id', '*', overwrite=1);")
+    con.close()
+
+
+@pytest.mark.parametrize("shards_bounds", [[0, 10], [0, 4, 10], [0, 2, 7, 10]])
+def test_full_text_search_with_matching_ids_cache(tmp_path: Path, shards_bounds: List[int]) -> None:
+    # the rows of a big split are indexed in several shards
+    index_file_locations = []
+    for shard_idx, (start, stop) in enumerate(zip(shards_bounds, shards_bounds[1:])):
+        index_file_location = str(tmp_path / f"index-{shard_idx}.duckdb")
+        create_index_file(index_file_location, start, stop)
+        index_file_locations.append(index_file_location)
+    connection_pool = DuckDBConnectionPool(max_connections=10, max_memory_bytes=1_000_000_000)
+    matching_ids_cache = MatchingIdsCache(max_count=10, max_bytes=1_000)
+
+    def search(query: str, offset: int) -> Tuple[int, pa.Table]:
+        key = get_matching_ids_cache_key("dataset", "config", "split", "revision", query)
+        return full_text_search(connection_pool, index_file_locations, query, offset, 2, matching_ids_cache, key)
+
+    (num_rows_total, pa_table) = search("vader", 0)
+    assert num_rows_total == 4
+    assert pa_table.to_pydict() == {"__hf_index_id": [0, 3], "text": ["Lord Vader", "Lord Vader"]}
+    # the next page of the same normalized query is read from the cached list of matching ids
+    with patch("search.routes.search.get_matching_ids") as mock_get_matching_ids:
+        (num_rows_total, pa_table) = search(" VADER ", 2)
+        mock_get_matching_ids.assert_not_called()
+    assert num_rows_total == 4
+    assert pa_table.to_pydict() == {"__hf_index_id": [6, 9], "text": ["Lord Vader", "Lord Vader"]}
+    (num_rows_total, pa_table) = search("vader", 4)
+    assert num_rows_total == 4
+    assert pa_table.num_rows == 0
+    assert pa_table.column_names == ["__hf_index_id", "text"]
+    connection_pool.clear()
@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import asyncio
+import threading
+from typing import List
+
+import pytest
+from libapi.exceptions import ResponseNotReadyError
+
+from search.download_coordinator import DownloadCoordinator
+
+
+def test_download_coordinator_deduplicates_concurrent_downloads() -> None:
+    coordinator = DownloadCoordinator(wait_seconds=5)
+    started = threading.Event()
+    release = threading.Event()
+    calls: List[str] = []
+
+    def download(name: str) -> None:
+        calls.append(name)
+        started.set()
+        release.wait(timeout=5)
+
+    async def run() -> None:
+        first = asyncio.create_task(coordinator.download("index.duckdb", download, name="first"))
+        second = asyncio.create_task(coordinator.download("index.duckdb", download, name="second"))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(run())
+    assert calls == ["first"]
+    coordinator.shutdown()
+
+
+def test_download_coordinator_not_ready_then_retry_after_failure() -> None:
+    coordinator = DownloadCoordinator(wait_seconds=0.01)
+    release = threading.Event()
+
+    def slow_download() -> None:
+        release.wait(timeout=5)
+        raise RuntimeError("network error")
+
+    with pytest.raises(ResponseNotReadyError):
+        asyncio.run(coordinator.download("index.duckdb", slow_download))
+    # the download continues in the background
+    future = coordinator.submit("index.duckdb", slow_download)
+    release.set()
+    with pytest.raises(RuntimeError):
+        future.result(timeout=5)
+
+    # the failed download is forgotten: the next request starts a new one
+    calls: List[int] = []
+    coordinator.wait_seconds = 5
+    asyncio.run(coordinator.download("index.duckdb", lambda: calls.append(1)))
+    assert calls == [1]
+    coordinator.shutdown()
@@ -0,0 +1,123 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import duckdb
+import pytest
+
+from search.duckdb_connection_pool import (
+    DuckDBConnectionPool,
+    get_file_id,
+    parse_database_size,
+)
+
+
+def create_index_file(path: Path) -> str:
+    con = duckdb.connect(str(path))
+    con.execute("CREATE TABLE data AS SELECT range AS __hf_index_id, 'text ' || range AS text FROM range(10)")
+    con.close()
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "size,expected_num_bytes",
+    [("0 bytes", 0), ("262KB", 262_000), ("1.5GB", 1_500_000_000), ("unknown", 0)],
+)
+def test_parse_database_size(size: str, expected_num_bytes: int) -> None:
+    assert parse_database_size(size) == expected_num_bytes
+
+
+def test_duckdb_connection_pool_reuses_connections(tmp_path: Path) -> None:
+    index_file_location = create_index_file(tmp_path / "index.duckdb")
+    pool = DuckDBConnectionPool(max_connections=2, max_memory_bytes=100_000_000)
+    with pool.cursor(index_file_location) as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM data").fetchall() == [(10,)]
+    connection = pool._entries[index_file_location].connection
+    with pool.cursor(index_file_location) as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM data").fetchall() == [(10,)]
+    assert len(pool) == 1
+    assert pool._entries[index_file_location].connection is connection
+    with pool.cursor(index_file_location) as cursor:
+        # the connections are read-only
+        with pytest.raises(duckdb.Error):
+            cursor.execute("DROP TABLE data")
+    pool.clear()
+    assert len(pool) == 0
+
+
+def test_duckdb_connection_pool_shares_the_memory_limit(tmp_path: Path) -> None:
+    index_file_location = create_index_file(tmp_path / "index.duckdb")
+    pool = DuckDBConnectionPool(max_connections=4, max_memory_bytes=400_000_000)
+    with pool.cursor(index_file_location) as cursor:
+        ((memory_limit,),) = cursor.execute("SELECT current_setting('memory_limit')").fetchall()
+    # ~100MB, with the rounding of the human-readable size
+    assert 95_000_000 <= parse_database_size(memory_limit) <= 105_000_000
+
+
+def test_duckdb_connection_pool_evicts_least_recently_used(tmp_path: Path) -> None:
+    locations = [create_index_file(tmp_path / f"index_{i}.duckdb") for i in range(3)]
+    pool = DuckDBConnectionPool(max_connections=2, max_memory_bytes=100_000_000)
+    for location in [locations[0], locations[1], locations[0], locations[2]]:
+        with pool.cursor(location) as cursor:
+            cursor.execute("SELECT COUNT(*) FROM data").fetchall()
+    assert list(pool._entries) == [locations[0], locations[2]]
+
+
+def test_duckdb_connection_pool_waits_for_the_queries_in_progress(tmp_path: Path) -> None:
+    locations = [create_index_file(tmp_path / f"index_{i}.duckdb") for i in range(2)]
+    pool = DuckDBConnectionPool(max_connections=1, max_memory_bytes=100_000_000)
+    with pool.cursor(locations[0]) as cursor:
+        with pool.cursor(locations[1]) as other_cursor:
+            other_cursor.execute("SELECT COUNT(*) FROM data").fetchall()
+        # the connection to the first index has been evicted, but the cursor can still be used
+        assert list(pool._entries) == [locations[1]]
+        assert cursor.execute("SELECT COUNT(*) FROM data").fetchall() == [(10,)]
+
+
+def test_duckdb_connection_pool_closes_the_connections_to_deleted_files(tmp_path: Path) -> None:
+    locations = [create_index_file(tmp_path / f"index_{i}.duckdb") for i in range(2)]
+    pool = DuckDBConnectionPool(
+        max_connections=2, max_memory_bytes=100_000_000, deleted_files_check_interval_seconds=0
+    )
+    for location in locations:
+        with pool.cursor(location) as cursor:
+            cursor.execute("SELECT COUNT(*) FROM data").fetchall()
+    connection = pool._entries[locations[1]].connection
+    # e.g. deleted by the cache maintenance job, and downloaded again
+    os.remove(locations[0])
+    os.replace(create_index_file(tmp_path / "new_index_1.duckdb"), locations[1])
+    with pool.cursor(locations[1]) as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM data").fetchall() == [(10,)]
+    assert list(pool._entries) == [locations[1]]
+    assert pool._entries[locations[1]].connection is not connection
+
+
+def test_duckdb_connection_pool_checks_the_other_files_periodically(tmp_path: Path) -> None:
+    locations = [create_index_file(tmp_path / f"index_{i}.duckdb") for i in range(3)]
+    pool = DuckDBConnectionPool(
+        max_connections=3, max_memory_bytes=100_000_000, deleted_files_check_interval_seconds=3_600
+    )
+    for location in locations[:2]:
+        with pool.cursor(location) as cursor:
+            cursor.execute("SELECT COUNT(*) FROM data").fetchall()
+    os.remove(locations[0])
+    os.replace(create_index_file(tmp_path / "new_index_1.duckdb"), locations[1])
+    with patch("search.duckdb_connection_pool.get_file_id", wraps=get_file_id) as mock_get_file_id:
+        with pool.cursor(locations[2]) as cursor:
+            cursor.execute("SELECT COUNT(*) FROM data").fetchall()
+    # only the requested file is checked before the interval
+    mock_get_file_id.assert_called_once_with(locations[2])
+    assert list(pool._entries) == locations
+    # the requested file is always checked: the connection to the previous version is not used
+    connection = pool._entries[locations[1]].connection
+    with pool.cursor(locations[1]) as cursor:
+        assert cursor.execute("SELECT COUNT(*) FROM data").fetchall() == [(10,)]
+    assert pool._entries[locations[1]].connection is not connection
+    # after the interval, all the files are checked
+    pool.deleted_files_check_interval_seconds = 0
+    with pool.cursor(locations[2]) as cursor:
+        cursor.execute("SELECT COUNT(*) FROM data").fetchall()
+    assert list(pool._entries) == [locations[1], locations[2]]
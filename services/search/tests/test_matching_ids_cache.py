@@ -0,0 +1,60 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2023 The HuggingFace Authors.
+
+import numpy as np
+import pytest
+
+from search.matching_ids_cache import (
+    MatchingIdsCache,
+    get_matching_ids_cache_key,
+    normalize_query,
+    to_compact_ids,
+)
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [("vader", "vader"), ("  Lord   VADER\t", "lord vader"), ("dark side", "dark side")],
+)
+def test_normalize_query(query: str, expected: str) -> None:
+    assert normalize_query(query) == expected
+
+
+def test_to_compact_ids() -> None:
+    assert to_compact_ids([]).dtype == np.int32
+    assert to_compact_ids([0, 2**31 - 1]).dtype == np.int32
+    assert to_compact_ids([0, 2**31]).dtype == np.int64
+    assert to_compact_ids([0, 2**31]).tolist() == [0, 2**31]
+
+
+def test_matching_ids_cache_evicts_least_recently_used() -> None:
+    cache = MatchingIdsCache(max_count=2, max_bytes=1_000)
+    key_0 = get_matching_ids_cache_key("dataset", "config", "split", "revision", "a")
+    key_1 = get_matching_ids_cache_key("dataset", "config", "split", "revision", "b")
+    key_2 = get_matching_ids_cache_key("dataset", "config", "split", "other_revision", "a")
+    assert cache.get(key_0) is None
+    cache.put(key_0, np.array([0, 1], dtype=np.int64))
+    cache.put(key_1, np.array([], dtype=np.int64))
+    assert cache.get(key_0) is not None
+    # ^ key_1 is now the least recently used
+    cache.put(key_2, np.array([2], dtype=np.int64))
+    assert len(cache) == 2
+    assert cache.get(key_1) is None
+    assert cache.get(key_2) is not None
+
+
+def test_matching_ids_cache_max_bytes() -> None:
+    cache = MatchingIdsCache(max_count=10, max_bytes=100)
+    key_0 = get_matching_ids_cache_key("dataset", "config", "split", "revision", "a")
+    key_1 = get_matching_ids_cache_key("dataset", "config", "split", "revision", "b")
+    cache.put(key_0, np.arange(20))
+    cache.put(key_1, np.arange(10))
+    # ^ 80 + 40 bytes (int32): the least recently used entry is evicted
+    assert cache.get(key_0) is None
+    assert cache.get(key_1) is not None
+    assert cache.num_bytes == 40
+    # an array larger than the limit is returned, but not cached
+    ids = cache.put(key_0, np.arange(100))
+    assert ids.tolist() == list(range(100))
+    assert cache.get(key_0) is None
+    assert cache.num_bytes == 40
@@ -15,6 +15,8 @@ from libcommon.config import (
     QueueConfig,
 )
 
+WORKER_BATCH_DIFFICULTY_MAX = 20
+WORKER_BATCH_MAX_JOBS = 1
 WORKER_CONTENT_MAX_BYTES = 10_000_000
 WORKER_DIFFICULTY_MAX = None
 WORKER_DIFFICULTY_MIN = None
@@ -28,6 +30,7 @@ WORKER_MAX_MEMORY_PCT = 80
 WORKER_MAX_MISSING_HEARTBEATS = 5
 WORKER_SLEEP_SECONDS = 15
 WORKER_STATE_FILE_PATH = None
+WORKER_WATCH_NEW_JOBS = False
 
 
 def get_empty_str_list() -> List[str]:
@@ -36,6 +39,8 @@ def get_empty_str_list() -> List[str]:
 
 @dataclass(frozen=True)
 class WorkerConfig:
+    batch_difficulty_max: int = WORKER_BATCH_DIFFICULTY_MAX
+    batch_max_jobs: int = WORKER_BATCH_MAX_JOBS
     content_max_bytes: int = WORKER_CONTENT_MAX_BYTES
     difficulty_max: Optional[int] = WORKER_DIFFICULTY_MAX
     difficulty_min: Optional[int] = WORKER_DIFFICULTY_MIN
@@ -52,12 +57,15 @@ class WorkerConfig:
     sleep_seconds: float = WORKER_SLEEP_SECONDS
     state_file_path: Optional[str] = WORKER_STATE_FILE_PATH
     storage_paths: List[str] = field(default_factory=get_empty_str_list)
+    watch_new_jobs: bool = WORKER_WATCH_NEW_JOBS
 
     @classmethod
     def from_env(cls) -> "WorkerConfig":
         env = Env(expand_vars=True)
         with env.prefixed("WORKER_"):
             return cls(
+                batch_difficulty_max=env.int(name="BATCH_DIFFICULTY_MAX", default=WORKER_BATCH_DIFFICULTY_MAX),
+                batch_max_jobs=env.int(name="BATCH_MAX_JOBS", default=WORKER_BATCH_MAX_JOBS),
                 content_max_bytes=env.int(name="CONTENT_MAX_BYTES", default=WORKER_CONTENT_MAX_BYTES),
                 difficulty_max=env.int(name="DIFFICULTY_MAX", default=WORKER_DIFFICULTY_MAX),
                 difficulty_min=env.int(name="DIFFICULTY_MIN", default=WORKER_DIFFICULTY_MIN),
@@ -84,6 +92,7 @@ class WorkerConfig:
                     name="STATE_FILE_PATH", default=WORKER_STATE_FILE_PATH
                 ),  # this environment variable is not expected to be set explicitly, it's set by the worker executor
                 storage_paths=env.list(name="STORAGE_PATHS", default=get_empty_str_list()),
+                watch_new_jobs=env.bool(name="WATCH_NEW_JOBS", default=WORKER_WATCH_NEW_JOBS),
             )
 
 
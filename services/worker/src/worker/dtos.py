@@ -127,6 +127,27 @@ class ConfigParquetMetadataResponse(TypedDict):
     parquet_files_metadata: List[ParquetFileMetadataItem]
     features: Optional[Dict[str, Any]]
     partial: bool
+    row_group_index_subpaths: Dict[str, str]
+
+
+class DuckdbIndexedParquetFile(TypedDict):
+    url: str
+    size: int
+    etag: Optional[str]
+
+
+class DuckdbIndexShard(TypedDict):
+    url: str
+    filename: str
+    size: int
+    num_rows: int
+    # the manifest of the shard: an unchanged shard is not rebuilt by the next run
+    parquet_files: List[DuckdbIndexedParquetFile]
+
+
+class SplitDuckdbIndex(SplitHubFile):
+    # the index of a big split is sharded: url, filename and size describe the first shard
+    shards: List[DuckdbIndexShard]
 
 
 class ConfigParquetResponse(TypedDict):
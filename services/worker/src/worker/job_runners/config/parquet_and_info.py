@@ -55,6 +55,7 @@ from huggingface_hub.hf_api import CommitInfo, DatasetInfo, HfApi, RepoFile
 from huggingface_hub.hf_file_system import HfFileSystem
 from huggingface_hub.utils._errors import HfHubHTTPError, RepositoryNotFoundError
 from libcommon.constants import (
+    PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_MAX_ROW_GROUP_BYTE_SIZE,
     PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_ROW_GROUP_SIZE_FOR_AUDIO_DATASETS,
     PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_ROW_GROUP_SIZE_FOR_BINARY_DATASETS,
     PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_ROW_GROUP_SIZE_FOR_IMAGE_DATASETS,
@@ -529,7 +530,8 @@ def _is_too_big_from_external_data_files(
 def get_writer_batch_size_from_info(ds_config_info: datasets.info.DatasetInfo) -> Optional[int]:
     """
     Get the writer_batch_size that defines the maximum row group size in the parquet files.
-    The default in `datasets` is 1,000 but we lower it to 100 for image datasets.
+    The default in `datasets` is 1,000 but we lower it to 100 for image datasets, and for
+    datasets with big rows, if the size of the splits is known (e.g. from the dataset card).
     This allows to optimize random access to parquet file, since accessing 1 row requires
     to read its entire row group.
     Args:
@@ -547,7 +549,38 @@ def get_writer_batch_size_from_info(ds_config_info: datasets.info.DatasetInfo) -
     elif "'binary'" in str(ds_config_info.features):
         return PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_ROW_GROUP_SIZE_FOR_BINARY_DATASETS
     else:
+        return get_writer_batch_size_from_splits_info(ds_config_info)
+
+
+def get_writer_batch_size_from_splits_info(ds_config_info: datasets.info.DatasetInfo) -> Optional[int]:
+    """
+    Get the writer_batch_size that keeps the row groups of the parquet files smaller than
+    PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_MAX_ROW_GROUP_BYTE_SIZE, estimated from the mean size
+    of the rows in the splits info.
+    /rows reads entire row groups to return pages of 100 rows, so big row groups make it download
+    a lot more bytes than it returns.
+    Args:
+        ds_config_info (`datasets.info.DatasetInfo`):
+            Dataset info from `datasets`.
+    Returns:
+        writer_batch_size (`Optional[int]`):
+            Writer batch size to pass to a dataset builder.
+            If `None` (unknown splits sizes, or small rows), then it will use the `datasets` default.
+    """
+    writer_batch_sizes = [
+        get_writer_batch_size_from_row_group_size(
+            num_rows=datasets.config.DEFAULT_MAX_BATCH_SIZE,
+            row_group_byte_size=split_info.num_bytes
+            * datasets.config.DEFAULT_MAX_BATCH_SIZE
+            // split_info.num_examples,
+            max_row_group_byte_size=PROCESSING_STEP_CONFIG_PARQUET_AND_INFO_MAX_ROW_GROUP_BYTE_SIZE,
+        )
+        for split_info in (ds_config_info.splits or {}).values()
+        if split_info.num_examples and split_info.num_bytes
+    ]
+    if not writer_batch_sizes or min(writer_batch_sizes) >= datasets.config.DEFAULT_MAX_BATCH_SIZE:
         return None
+    return min(writer_batch_sizes)
 
 
 def get_writer_batch_size_from_row_group_size(
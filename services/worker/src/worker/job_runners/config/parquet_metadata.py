@@ -3,8 +3,10 @@
 
 import functools
 import logging
-from typing import List, Optional
+import os
+from typing import Dict, List, Optional
 
+import pyarrow.parquet as pq
 from fsspec.implementations.http import HTTPFileSystem
 from libcommon.constants import PROCESSING_STEP_CONFIG_PARQUET_METADATA_VERSION
 from libcommon.exceptions import (
@@ -16,7 +18,10 @@ from libcommon.processing_graph import ProcessingStep
 from libcommon.simple_cache import get_previous_step_or_raise
 from libcommon.storage import StrPath
 from libcommon.utils import JobInfo, SplitHubFile
-from libcommon.viewer_utils.parquet_metadata import create_parquet_metadata_file
+from libcommon.viewer_utils.parquet_metadata import (
+    create_parquet_metadata_file,
+    create_row_group_index_file,
+)
 from tqdm.contrib.concurrent import thread_map
 
 from worker.config import AppConfig
@@ -56,11 +61,52 @@ def create_parquet_metadata_file_from_remote_parquet(
     )
 
 
+def create_row_group_index_files(
+    dataset: str,
+    config: str,
+    parquet_files_metadata: List[ParquetFileMetadataItem],
+    parquet_metadata_directory: StrPath,
+) -> Dict[str, str]:
+    """
+    Store, for every split, a compact binary index of its row groups (file id, row group id, first row, byte range)
+    next to the parquet metadata files, so that /rows can find the row groups of a page with a binary search.
+
+    The parquet files are sorted by filename, as in libcommon.parquet_utils.ParquetIndexWithMetadata.
+    The metadata are read from the local files that have just been written, no remote access is needed.
+
+    Returns:
+        `Dict[str, str]`: the subpath of the row group index file, for every split.
+    """
+    items_by_split: Dict[str, List[ParquetFileMetadataItem]] = {}
+    for item in parquet_files_metadata:
+        if item["split"] is None:
+            # no row group index can be built for a file that does not belong to a split
+            logging.warning(
+                f"the parquet file {item['filename']} of {dataset} {config} has no split: it is not indexed for /rows"
+            )
+            continue
+        items_by_split.setdefault(item["split"], []).append(item)
+    row_group_index_subpaths: Dict[str, str] = {}
+    for split, items in items_by_split.items():
+        row_group_index_subpaths[split] = create_row_group_index_file(
+            dataset=dataset,
+            config=config,
+            split=split,
+            parquet_files_metadata=[
+                pq.read_metadata(os.path.join(parquet_metadata_directory, item["parquet_metadata_subpath"]))
+                for item in sorted(items, key=lambda item: item["filename"])
+            ],
+            parquet_metadata_directory=parquet_metadata_directory,
+        )
+    return row_group_index_subpaths
+
+
 def compute_parquet_metadata_response(
     dataset: str, config: str, hf_token: Optional[str], parquet_metadata_directory: StrPath
 ) -> ConfigParquetMetadataResponse:
     """
-    Store the config's parquet metadata on the disk and return the list of local metadata files.
+    Store the config's parquet metadata, and a row group index per split, on the disk and return the list of local
+    metadata files.
     Args:
         dataset (`str`):
             A namespace (user or an organization) and a repo name separated
@@ -119,8 +165,17 @@ def compute_parquet_metadata_response(
         unit="pq",
         disable=True,
     )
+    row_group_index_subpaths = create_row_group_index_files(
+        dataset=dataset,
+        config=config,
+        parquet_files_metadata=parquet_files_metadata,
+        parquet_metadata_directory=parquet_metadata_directory,
+    )
     return ConfigParquetMetadataResponse(
-        parquet_files_metadata=parquet_files_metadata, features=features, partial=partial
+        parquet_files_metadata=parquet_files_metadata,
+        features=features,
+        partial=partial,
+        row_group_index_subpaths=row_group_index_subpaths,
     )
 
 
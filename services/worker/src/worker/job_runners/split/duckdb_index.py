@@ -2,6 +2,8 @@
 # Copyright 2023 The HuggingFace Authors.
 
 import logging
+import re
+from http import HTTPStatus
 from pathlib import Path
 from typing import List, Optional, Set
 
@@ -9,10 +11,16 @@ import duckdb
 from huggingface_hub._commit_api import (
     CommitOperation,
     CommitOperationAdd,
+    CommitOperationCopy,
     CommitOperationDelete,
 )
+from huggingface_hub.file_download import get_hf_file_metadata
 from huggingface_hub.hf_api import HfApi
-from huggingface_hub.utils._errors import HfHubHTTPError, RepositoryNotFoundError
+from huggingface_hub.utils._errors import (
+    HfHubHTTPError,
+    RepositoryNotFoundError,
+    RevisionNotFoundError,
+)
 from libcommon.constants import PROCESSING_STEP_SPLIT_DUCKDB_INDEX_VERSION
 from libcommon.exceptions import (
     CacheDirectoryNotInitializedError,
@@ -23,16 +31,24 @@ from libcommon.exceptions import (
     NoIndexableColumnsError,
     ParquetResponseEmptyError,
     PreviousStepFormatError,
-    SplitWithTooBigParquetError,
 )
 from libcommon.processing_graph import ProcessingStep
 from libcommon.queue import lock
-from libcommon.simple_cache import get_previous_step_or_raise
+from libcommon.simple_cache import (
+    CacheEntryDoesNotExistError,
+    get_previous_step_or_raise,
+    get_response,
+)
 from libcommon.storage import StrPath
 from libcommon.utils import JobInfo, SplitHubFile
 
 from worker.config import AppConfig, DuckDbIndexConfig
-from worker.dtos import CompleteJobResult
+from worker.dtos import (
+    CompleteJobResult,
+    DuckdbIndexedParquetFile,
+    DuckdbIndexShard,
+    SplitDuckdbIndex,
+)
 from worker.job_runners.split.split_job_runner import SplitJobRunnerWithCache
 from worker.utils import (
     HF_HUB_HTTP_ERROR_RETRY_SLEEPS,
@@ -47,14 +63,131 @@ DATASET_TYPE = "dataset"
 STRING_FEATURE_DTYPE = "string"
 VALUE_FEATURE_TYPE = "Value"
 DUCKDB_DEFAULT_INDEX_FILENAME = "index.duckdb"
-CREATE_SEQUENCE_COMMAND = "CREATE OR REPLACE SEQUENCE serial START 0 MINVALUE 0;"
+DUCKDB_INDEX_SHARD_FILENAME = "index-{shard_idx:05d}-of-{num_shards:05d}.duckdb"
+DUCKDB_INDEX_FILENAME_PATTERN = re.compile(r"index(-\d{5}-of-\d{5})?\.duckdb")
+CREATE_SEQUENCE_COMMAND = "CREATE OR REPLACE SEQUENCE serial START {start} MINVALUE 0;"
 CREATE_INDEX_COMMAND = "PRAGMA create_fts_index('data', '__hf_index_id', {columns}, overwrite=1);"
 CREATE_TABLE_COMMAND = "CREATE OR REPLACE TABLE data AS SELECT nextval('serial') AS __hf_index_id, {columns} FROM"
+COUNT_ROWS_COMMAND = "SELECT COUNT(*) FROM data;"
 INSTALL_EXTENSION_COMMAND = "INSTALL '{extension}';"
 LOAD_EXTENSION_COMMAND = "LOAD '{extension}';"
 SET_EXTENSIONS_DIRECTORY_COMMAND = "SET extension_directory='{directory}';"
 
 
+def get_shards(parquet_files: List[SplitHubFile], max_parquet_size_bytes: int) -> List[List[SplitHubFile]]:
+    """Group the consecutive parquet files into shards of at most `max_parquet_size_bytes` (or of one file)."""
+    shards: List[List[SplitHubFile]] = []
+    shard_size = 0
+    for parquet_file in parquet_files:
+        if not shards or shard_size + parquet_file["size"] > max_parquet_size_bytes:
+            shards.append([])
+            shard_size = 0
+        shards[-1].append(parquet_file)
+        shard_size += parquet_file["size"]
+    return shards
+
+
+def get_index_filename(shard_idx: int, num_shards: int) -> str:
+    # the splits that fit in one shard keep the historical file name
+    if num_shards == 1:
+        return DUCKDB_DEFAULT_INDEX_FILENAME
+    return DUCKDB_INDEX_SHARD_FILENAME.format(shard_idx=shard_idx, num_shards=num_shards)
+
+
+def get_indexed_parquet_file(parquet_file: SplitHubFile, hf_token: Optional[str]) -> DuckdbIndexedParquetFile:
+    try:
+        # the ETag of a parquet file stored with LFS is the hash of its content
+        etag = get_hf_file_metadata(url=parquet_file["url"], token=hf_token).etag
+    except (HfHubHTTPError, OSError):
+        logging.debug(f"could not get the ETag of {parquet_file['url']}")
+        etag = None
+    return DuckdbIndexedParquetFile(url=parquet_file["url"], size=parquet_file["size"], etag=etag)
+
+
+def get_reusable_shards(
+    previous_shards: Optional[List[DuckdbIndexShard]],
+    shards_manifests: List[List[DuckdbIndexedParquetFile]],
+    repo_files: Set[str],
+    config: str,
+    split: str,
+) -> List[DuckdbIndexShard]:
+    """Get the first shards of the previous index that can be kept as is.
+
+    A shard is kept if it indexes the same parquet files (same URL, size and ETag) as the new shard at the same
+    position, as do all the shards before it, so that its rows have the same `__hf_index_id`. Since the parquet files
+    are grouped in order, appending parquet files to the split only rebuilds the last shards.
+
+    DuckDB cannot update a full-text search index: a changed shard is rebuilt entirely.
+    """
+    reusable_shards: List[DuckdbIndexShard] = []
+    for previous_shard, shard_manifest in zip(previous_shards or [], shards_manifests):
+        if (
+            previous_shard.get("parquet_files") != shard_manifest
+            or any(parquet_file["etag"] is None for parquet_file in shard_manifest)
+            or f"{config}/{split}/{previous_shard['filename']}" not in repo_files
+        ):
+            break
+        reusable_shards.append(previous_shard)
+    return reusable_shards
+
+
+def get_previous_shards(dataset: str, config: str, split: str, job_runner_version: int) -> List[DuckdbIndexShard]:
+    """Get the shards of the index computed by the previous run of the same version of the job runner, if any."""
+    try:
+        previous_response = get_response(kind="split-duckdb-index", dataset=dataset, config=config, split=split)
+    except CacheEntryDoesNotExistError:
+        return []
+    if (
+        previous_response["http_status"] != HTTPStatus.OK
+        or previous_response["job_runner_version"] != job_runner_version
+    ):
+        return []
+    shards: List[DuckdbIndexShard] = previous_response["content"].get("shards", [])
+    return shards
+
+
+def create_index_file(
+    db_path: Path,
+    parquet_urls: List[str],
+    column_names: str,
+    first_row_idx: int,
+    extensions_directory: Optional[str],
+) -> int:
+    """Create an index file with the rows of the parquet files, and return the number of rows.
+
+    The rows are numbered from `first_row_idx`, so that `__hf_index_id` is the index of the row in the whole split,
+    whatever the shard.
+    """
+    con = duckdb.connect(str(db_path.resolve()))
+
+    # configure duckdb extensions
+    if extensions_directory is not None:
+        con.execute(SET_EXTENSIONS_DIRECTORY_COMMAND.format(directory=extensions_directory))
+
+    con.execute(INSTALL_EXTENSION_COMMAND.format(extension="httpfs"))
+    con.execute(LOAD_EXTENSION_COMMAND.format(extension="httpfs"))
+    con.execute(INSTALL_EXTENSION_COMMAND.format(extension="fts"))
+    con.execute(LOAD_EXTENSION_COMMAND.format(extension="fts"))
+
+    create_sequence_sql = CREATE_SEQUENCE_COMMAND.format(start=first_row_idx)
+    logging.debug(create_sequence_sql)
+    con.sql(create_sequence_sql)
+
+    create_command_sql = f"{CREATE_TABLE_COMMAND.format(columns=column_names)} read_parquet({parquet_urls});"
+    logging.debug(create_command_sql)
+    con.sql(create_command_sql)
+
+    # TODO: by default, 'porter' stemmer is being used, use a specific one by dataset language in the future
+    # see https://duckdb.org/docs/extensions/full_text_search.html for more details about 'stemmer' parameter
+    create_index_sql = CREATE_INDEX_COMMAND.format(columns=column_names)
+    logging.debug(create_index_sql)
+    con.sql(create_index_sql)
+
+    num_rows = con.sql(COUNT_ROWS_COMMAND).fetchall()[0][0]
+    con.close()
+    return int(num_rows)
+
+
 def compute_index_rows(
     job_id: str,
     dataset: str,
@@ -69,7 +202,8 @@ def compute_index_rows(
     max_parquet_size_bytes: int,
     extensions_directory: Optional[str],
     committer_hf_token: Optional[str],
-) -> SplitHubFile:
+    previous_shards: Optional[List[DuckdbIndexShard]] = None,
+) -> SplitDuckdbIndex:
     logging.info(f"get split-duckdb-index for dataset={dataset} config={config} split={split}")
     check_split_exists(dataset=dataset, config=config, split=split)
 
@@ -88,19 +222,12 @@ def compute_index_rows(
             if parquet_file["config"] == config and parquet_file["split"] == split
         ]
 
-        split_parquets_size = sum(parquet_file["size"] for parquet_file in split_parquet_files)
-
-        if split_parquets_size > max_parquet_size_bytes:
-            raise SplitWithTooBigParquetError(
-                f"The indexing is limited to split parquets under {max_parquet_size_bytes} bytes. "
-                f"Current size of sum of split parquets is {split_parquets_size} bytes."
-            )
-
-        parquet_urls = [parquet_file["url"] for parquet_file in split_parquet_files]
-
-        if not parquet_urls:
+        if not split_parquet_files:
             raise ParquetResponseEmptyError("No parquet files found.")
 
+        # the big splits are indexed in several shards, each one with its own full-text search index
+        shards = get_shards(split_parquet_files, max_parquet_size_bytes=max_parquet_size_bytes)
+
         # get the features
         features = content_parquet_and_info["dataset_info"]["features"]
         column_names = ",".join('"' + column + '"' for column in list(features.keys()))
@@ -122,36 +249,63 @@ def compute_index_rows(
             f"Previous step '{config_parquet_and_info_step}' did not return the expected content.", e
         ) from e
 
-    # index all columns
-    db_path = duckdb_index_file_directory.resolve() / DUCKDB_DEFAULT_INDEX_FILENAME
-    con = duckdb.connect(str(db_path.resolve()))
-
-    # configure duckdb extensions
-    if extensions_directory is not None:
-        con.execute(SET_EXTENSIONS_DIRECTORY_COMMAND.format(directory=extensions_directory))
-
-    con.execute(INSTALL_EXTENSION_COMMAND.format(extension="httpfs"))
-    con.execute(LOAD_EXTENSION_COMMAND.format(extension="httpfs"))
-    con.execute(INSTALL_EXTENSION_COMMAND.format(extension="fts"))
-    con.execute(LOAD_EXTENSION_COMMAND.format(extension="fts"))
-
-    logging.debug(CREATE_SEQUENCE_COMMAND)
-    con.sql(CREATE_SEQUENCE_COMMAND)
-
-    create_command_sql = f"{CREATE_TABLE_COMMAND.format(columns=column_names)} read_parquet({parquet_urls});"
-    logging.debug(create_command_sql)
-    con.sql(create_command_sql)
-
-    # TODO: by default, 'porter' stemmer is being used, use a specific one by dataset language in the future
-    # see https://duckdb.org/docs/extensions/full_text_search.html for more details about 'stemmer' parameter
-    create_index_sql = CREATE_INDEX_COMMAND.format(columns=column_names)
-    logging.debug(create_index_sql)
-    con.sql(create_index_sql)
-    con.close()
-
     hf_api = HfApi(endpoint=hf_endpoint, token=hf_token)
     committer_hf_api = HfApi(endpoint=hf_endpoint, token=committer_hf_token)
-    index_file_location = f"{config}/{split}/{DUCKDB_DEFAULT_INDEX_FILENAME}"
+
+    # the shards whose parquet files have not changed since the previous run are kept as is
+    shards_manifests = [
+        [get_indexed_parquet_file(parquet_file, hf_token=hf_token) for parquet_file in shard_parquet_files]
+        for shard_parquet_files in shards
+    ]
+    try:
+        repo_files_before: Set[str] = {
+            f.rfilename
+            for f in hf_api.dataset_info(repo_id=dataset, revision=target_revision, files_metadata=False).siblings
+        }
+    except (RepositoryNotFoundError, RevisionNotFoundError):
+        # the target revision has not been created yet
+        repo_files_before = set()
+    reused_shards = get_reusable_shards(
+        previous_shards=previous_shards,
+        shards_manifests=shards_manifests,
+        repo_files=repo_files_before,
+        config=config,
+        split=split,
+    )
+    logging.info(f"reuse {len(reused_shards)}/{len(shards)} index shards for {dataset=} {config=} {split=}")
+
+    # index all columns
+    index_file_locations: List[str] = []
+    shards_num_rows: List[int] = []
+    add_operations: List[CommitOperation] = []
+    copy_operations: List[CommitOperation] = []
+    for shard_idx, shard_parquet_files in enumerate(shards):
+        filename = get_index_filename(shard_idx=shard_idx, num_shards=len(shards))
+        index_file_location = f"{config}/{split}/{filename}"
+        if shard_idx < len(reused_shards):
+            previous_index_file_location = f"{config}/{split}/{reused_shards[shard_idx]['filename']}"
+            if previous_index_file_location != index_file_location:
+                # the name of the shard depends on the number of shards
+                copy_operations.append(
+                    CommitOperationCopy(
+                        src_path_in_repo=previous_index_file_location, path_in_repo=index_file_location
+                    )
+                )
+            shards_num_rows.append(reused_shards[shard_idx]["num_rows"])
+        else:
+            db_path = duckdb_index_file_directory.resolve() / filename
+            logging.info(f"create index shard {shard_idx + 1}/{len(shards)} for {dataset=} {config=} {split=}")
+            shards_num_rows.append(
+                create_index_file(
+                    db_path=db_path,
+                    parquet_urls=[parquet_file["url"] for parquet_file in shard_parquet_files],
+                    column_names=column_names,
+                    first_row_idx=sum(shards_num_rows),
+                    extensions_directory=extensions_directory,
+                )
+            )
+            add_operations.append(CommitOperationAdd(path_in_repo=index_file_location, path_or_fileobj=db_path))
+        index_file_locations.append(index_file_location)
 
     try:
         with lock.git_branch(
@@ -168,41 +322,48 @@ def compute_index_rows(
             logging.debug(f"get dataset info for {dataset=} with {target_revision=}")
             target_dataset_info = hf_api.dataset_info(repo_id=dataset, revision=target_revision, files_metadata=False)
             all_repo_files: Set[str] = {f.rfilename for f in target_dataset_info.siblings}
-            delete_operations: List[CommitOperation] = []
-            if index_file_location in all_repo_files:
-                delete_operations.append(CommitOperationDelete(path_in_repo=index_file_location))
+            # the other index files of the split are deleted: the number of shards may have changed
+            delete_operations: List[CommitOperation] = [
+                CommitOperationDelete(path_in_repo=repo_file)
+                for repo_file in sorted(all_repo_files)
+                if str(Path(repo_file).parent) == f"{config}/{split}"
+                and DUCKDB_INDEX_FILENAME_PATTERN.fullmatch(Path(repo_file).name)
+                and repo_file not in index_file_locations
+            ]
             logging.debug(f"delete operations for {dataset=} {delete_operations=}")
 
             # send the files to the target revision
-            add_operations: List[CommitOperation] = [
-                CommitOperationAdd(path_in_repo=index_file_location, path_or_fileobj=db_path.resolve())
-            ]
             logging.debug(f"add operations for {dataset=} {add_operations=}")
+            logging.debug(f"copy operations for {dataset=} {copy_operations=}")
+            operations = copy_operations + delete_operations + add_operations
 
-            retry_create_commit = retry(on=[HfHubHTTPError], sleeps=HF_HUB_HTTP_ERROR_RETRY_SLEEPS)(
-                committer_hf_api.create_commit
-            )
-            try:
-                retry_create_commit(
-                    repo_id=dataset,
-                    repo_type=DATASET_TYPE,
-                    revision=target_revision,
-                    operations=delete_operations + add_operations,
-                    commit_message=commit_message,
-                    parent_commit=target_dataset_info.sha,
+            if operations:
+                retry_create_commit = retry(on=[HfHubHTTPError], sleeps=HF_HUB_HTTP_ERROR_RETRY_SLEEPS)(
+                    committer_hf_api.create_commit
                 )
-            except RuntimeError as e:
-                if e.__cause__ and isinstance(e.__cause__, HfHubHTTPError):
-                    raise CreateCommitError(
-                        message=(
-                            f"Commit {commit_message} could not be created on the Hub (after"
-                            f" {len(HF_HUB_HTTP_ERROR_RETRY_SLEEPS)} attempts)."
-                        ),
-                        cause=e.__cause__,
-                    ) from e.__cause__
-                raise e
-
-            logging.debug(f"create commit {commit_message} for {dataset=} {add_operations=}")
+                try:
+                    retry_create_commit(
+                        repo_id=dataset,
+                        repo_type=DATASET_TYPE,
+                        revision=target_revision,
+                        operations=operations,
+                        commit_message=commit_message,
+                        parent_commit=target_dataset_info.sha,
+                    )
+                except RuntimeError as e:
+                    if e.__cause__ and isinstance(e.__cause__, HfHubHTTPError):
+                        raise CreateCommitError(
+                            message=(
+                                f"Commit {commit_message} could not be created on the Hub (after"
+                                f" {len(HF_HUB_HTTP_ERROR_RETRY_SLEEPS)} attempts)."
+                            ),
+                            cause=e.__cause__,
+                        ) from e.__cause__
+                    raise e
+
+                logging.debug(f"create commit {commit_message} for {dataset=} {operations=}")
+            else:
+                logging.debug(f"the index files of {dataset=} {config=} {split=} are up to date, no commit")
 
             # call the API again to get the index file
             target_dataset_info = hf_api.dataset_info(repo_id=dataset, revision=target_revision, files_metadata=True)
@@ -212,31 +373,44 @@ def compute_index_rows(
     except RepositoryNotFoundError as err:
         raise DatasetNotFoundError("The dataset does not exist on the Hub.") from err
 
-    repo_files = [
-        repo_file for repo_file in target_dataset_info.siblings if repo_file.rfilename == index_file_location
-    ]
+    index_shards: List[DuckdbIndexShard] = []
+    for index_file_location, num_rows, shard_manifest in zip(index_file_locations, shards_num_rows, shards_manifests):
+        repo_files = [
+            repo_file for repo_file in target_dataset_info.siblings if repo_file.rfilename == index_file_location
+        ]
 
-    if not repo_files or len(repo_files) != 1:
-        logging.warning(f"Found {len(repo_files)} index files, should be only 1")
-        raise DuckDBIndexFileNotFoundError("No index file was found")
+        if not repo_files or len(repo_files) != 1:
+            logging.warning(f"Found {len(repo_files)} index files for {index_file_location}, should be only 1")
+            raise DuckDBIndexFileNotFoundError("No index file was found")
 
-    repo_file = repo_files[0]
-    if repo_file.size is None:
-        raise ValueError(f"Cannot get size of {repo_file.rfilename}")
+        repo_file = repo_files[0]
+        if repo_file.size is None:
+            raise ValueError(f"Cannot get size of {repo_file.rfilename}")
+
+        index_shards.append(
+            DuckdbIndexShard(
+                url=hf_hub_url(
+                    repo_id=dataset,
+                    filename=repo_file.rfilename,
+                    hf_endpoint=hf_endpoint,
+                    revision=target_revision,
+                    url_template=url_template,
+                ),
+                filename=Path(repo_file.rfilename).name,
+                size=repo_file.size,
+                num_rows=num_rows,
+                parquet_files=shard_manifest,
+            )
+        )
 
-    return SplitHubFile(
+    return SplitDuckdbIndex(
         dataset=dataset,
         config=config,
         split=split,
-        url=hf_hub_url(
-            repo_id=dataset,
-            filename=repo_file.rfilename,
-            hf_endpoint=hf_endpoint,
-            revision=target_revision,
-            url_template=url_template,
-        ),
-        filename=Path(repo_file.rfilename).name,
-        size=repo_file.size,
+        url=index_shards[0]["url"],
+        filename=index_shards[0]["filename"],
+        size=index_shards[0]["size"],
+        shards=index_shards,
     )
 
 
@@ -284,5 +458,11 @@ class SplitDuckDbIndexJobRunner(SplitJobRunnerWithCache):
                 hf_endpoint=self.app_config.common.hf_endpoint,
                 target_revision=self.duckdb_index_config.target_revision,
                 max_parquet_size_bytes=self.duckdb_index_config.max_parquet_size_bytes,
+                previous_shards=get_previous_shards(
+                    dataset=self.dataset,
+                    config=self.config,
+                    split=self.split,
+                    job_runner_version=self.get_job_runner_version(),
+                ),
             )
         )
@@ -17,6 +17,7 @@ from libcommon.exceptions import (
 )
 from libcommon.parquet_utils import Indexer
 from libcommon.processing_graph import ProcessingGraph, ProcessingStep
+from libcommon.rows_utils import map_rows
 from libcommon.storage import StrPath
 from libcommon.utils import JobInfo, Row, RowItem
 from libcommon.viewer_utils.features import get_cell_value, to_features_list
@@ -35,9 +36,10 @@ def transform_rows(
     features: Features,
     assets_base_url: str,
     assets_directory: StrPath,
+    max_workers: int = 1,
 ) -> List[Row]:
-    return [
-        {
+    def transform_row(row_idx: int, row: RowItem) -> Row:
+        return {
             featureName: get_cell_value(
                 dataset=dataset,
                 config=config,
@@ -51,8 +53,8 @@ def transform_rows(
             )
             for (featureName, fieldType) in features.items()
         }
-        for row_idx, row in enumerate(rows)
-    ]
+
+    return map_rows(transform_row, rows, max_workers=max_workers)
 
 
 def compute_first_rows_response(
@@ -67,6 +69,7 @@ def compute_first_rows_response(
     columns_max_number: int,
     assets_directory: StrPath,
     indexer: Indexer,
+    assets_max_workers: int = 1,
 ) -> SplitFirstRowsResponse:
     logging.info(f"get first-rows for dataset={dataset} config={config} split={split}")
 
@@ -125,6 +128,7 @@ def compute_first_rows_response(
             features=features,
             assets_base_url=assets_base_url,
             assets_directory=assets_directory,
+            max_workers=assets_max_workers,
         )
     except Exception as err:
         raise RowsPostProcessingError(
@@ -202,6 +206,7 @@ class SplitFirstRowsFromParquetJobRunner(SplitJobRunner):
                 split=self.split,
                 assets_base_url=self.assets_base_url,
                 assets_directory=self.assets_directory,
+                assets_max_workers=self.app_config.assets.max_workers,
                 min_cell_bytes=self.first_rows_config.min_cell_bytes,
                 rows_max_bytes=self.first_rows_config.max_bytes,
                 rows_max_number=self.first_rows_config.max_number,
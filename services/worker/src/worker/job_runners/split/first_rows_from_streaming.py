@@ -25,6 +25,7 @@ from libcommon.exceptions import (
     TooManyColumnsError,
 )
 from libcommon.processing_graph import ProcessingStep
+from libcommon.rows_utils import map_rows
 from libcommon.storage import StrPath
 from libcommon.utils import JobInfo, Row
 from libcommon.viewer_utils.features import get_cell_value, to_features_list
@@ -48,9 +49,10 @@ def transform_rows(
     features: Features,
     assets_base_url: str,
     assets_directory: StrPath,
+    max_workers: int = 1,
 ) -> List[Row]:
-    return [
-        {
+    def transform_row(row_idx: int, row: Row) -> Row:
+        return {
             featureName: get_cell_value(
                 dataset=dataset,
                 config=config,
@@ -64,8 +66,8 @@ def transform_rows(
             )
             for (featureName, fieldType) in features.items()
         }
-        for row_idx, row in enumerate(rows)
-    ]
+
+    return map_rows(transform_row, rows, max_workers=max_workers)
 
 
 def compute_first_rows_response(
@@ -81,6 +83,7 @@ def compute_first_rows_response(
     columns_max_number: int,
     assets_directory: StrPath,
     max_size_fallback: Optional[int] = None,
+    assets_max_workers: int = 1,
 ) -> SplitFirstRowsResponse:
     """
     Get the response of /first-rows for one specific split of a dataset from huggingface.co.
@@ -115,6 +118,8 @@ def compute_first_rows_response(
             The maximum number of columns supported.
         assets_directory (`str` or `pathlib.Path`):
             The directory where the assets are stored.
+        assets_max_workers (`int`):
+            The number of threads used to create the assets (images and audio files) of the rows.
     Returns:
         [`SplitFirstRowsResponse`]: The list of first rows of the split.
     Raises the following errors:
@@ -227,6 +232,7 @@ def compute_first_rows_response(
             features=features,
             assets_base_url=assets_base_url,
             assets_directory=assets_directory,
+            max_workers=assets_max_workers,
         )
     except Exception as err:
         raise RowsPostProcessingError(
@@ -296,6 +302,7 @@ class SplitFirstRowsFromStreamingJobRunner(SplitJobRunnerWithDatasetsCache):
                 split=self.split,
                 assets_base_url=self.assets_base_url,
                 assets_directory=self.assets_directory,
+                assets_max_workers=self.app_config.assets.max_workers,
                 hf_token=self.app_config.common.hf_token,
                 min_cell_bytes=self.first_rows_config.min_cell_bytes,
                 rows_max_bytes=self.first_rows_config.max_bytes,
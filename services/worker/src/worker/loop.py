@@ -15,6 +15,7 @@ from libcommon.queue import (
     AlreadyStartedJobError,
     EmptyQueueError,
     LockTimeoutError,
+    NewJobsWatcher,
     NoWaitingJobError,
     Queue,
 )
@@ -61,6 +62,16 @@ class Loop:
     def __post_init__(self) -> None:
         self.queue = Queue()
         self.storage_paths = set(self.app_config.worker.storage_paths).union(self.library_cache_paths)
+        self.new_jobs_watcher = (
+            NewJobsWatcher(
+                difficulty_min=self.app_config.worker.difficulty_min,
+                difficulty_max=self.app_config.worker.difficulty_max,
+                job_types_blocked=self.app_config.worker.job_types_blocked,
+                job_types_only=self.app_config.worker.job_types_only,
+            )
+            if self.app_config.worker.watch_new_jobs
+            else None
+        )
 
     def has_memory(self) -> bool:
         if self.app_config.worker.max_memory_pct <= 0:
@@ -102,22 +113,49 @@ class Loop:
     def has_resources(self) -> bool:
         return self.has_memory() and self.has_cpu() and self.has_storage()
 
-    def sleep(self) -> None:
+    def get_sleep_seconds(self) -> float:
         jitter = 0.75 + random.random() / 2  # nosec
         # ^ between 0.75 and 1.25
-        duration = self.app_config.worker.sleep_seconds * jitter
+        return self.app_config.worker.sleep_seconds * jitter
+
+    def sleep(self) -> None:
+        duration = self.get_sleep_seconds()
         logging.debug(f"sleep during {duration:.2f} seconds")
         time.sleep(duration)
 
+    def wait_for_new_job(self) -> None:
+        """Wait until a job is created, if the new jobs are watched, else sleep.
+
+        The wait is limited to the sleep duration: the queue is still polled in case a notification has been missed.
+        """
+        if self.new_jobs_watcher is None:
+            self.sleep()
+            return
+        duration = self.get_sleep_seconds()
+        logging.debug(f"wait for a new job during {duration:.2f} seconds")
+        try:
+            if self.new_jobs_watcher.wait(timeout_seconds=duration):
+                logging.debug("a new job has been created")
+        except Exception:
+            logging.warning("the new jobs cannot be watched, fall back to polling the queue", exc_info=True)
+            self.new_jobs_watcher = None
+            self.sleep()
+
     def run(self) -> None:
         logging.info("Worker loop started")
         try:
             while True:
-                if self.has_resources() and self.process_next_job():
+                if not self.has_resources():
+                    self.sleep()
+                    continue
+                if self.process_next_job():
+                    if self.new_jobs_watcher is not None:
+                        # the queue is polled again right away: no need to be notified of the jobs created meanwhile
+                        self.new_jobs_watcher.close()
                     # loop immediately to try another job
                     # see https://github.com/huggingface/datasets-server/issues/265
                     continue
-                self.sleep()
+                self.wait_for_new_job()
         except BaseException:
             logging.exception("quit due to an uncaught error while processing the job")
             raise
@@ -126,19 +164,29 @@ class Loop:
         logging.debug("try to process a job")
 
         try:
-            job_info = self.queue.start_job(
+            job_infos = self.queue.start_jobs(
+                max_jobs=self.app_config.worker.batch_max_jobs,
+                batch_difficulty_max=self.app_config.worker.batch_difficulty_max,
                 difficulty_min=self.app_config.worker.difficulty_min,
                 difficulty_max=self.app_config.worker.difficulty_max,
                 job_types_blocked=self.app_config.worker.job_types_blocked,
                 job_types_only=self.app_config.worker.job_types_only,
             )
-            self.set_worker_state(current_job_info=job_info)
-            logging.debug(f"job assigned: {job_info}")
         except (EmptyQueueError, AlreadyStartedJobError, LockTimeoutError, NoWaitingJobError) as e:
             self.set_worker_state(current_job_info=None)
             logging.debug(e)
             return False
 
+        # the easy jobs are selected together, and processed back to back. Each job is started only when the previous
+        # one has been processed, so that no started job is left behind if the worker stops
+        for job_info in job_infos:
+            self.process_job(job_info=job_info)
+        self.set_worker_state(current_job_info=None)
+        return True
+
+    def process_job(self, job_info: JobInfo) -> None:
+        self.set_worker_state(current_job_info=job_info)
+        logging.debug(f"job assigned: {job_info}")
         job_runner = self.job_runner_factory.create_job_runner(job_info)
         job_manager = JobManager(
             job_info=job_info,
@@ -148,8 +196,6 @@ class Loop:
         )
         job_result = job_manager.run_job()
         job_manager.finish(job_result=job_result)
-        self.set_worker_state(current_job_info=None)
-        return True
 
     def set_worker_state(self, current_job_info: Optional[JobInfo]) -> None:
         worker_state: WorkerState = {"current_job_info": current_job_info, "last_updated": get_datetime()}
@@ -620,6 +620,27 @@ def test_get_writer_batch_size_from_info(ds_info: datasets.info.DatasetInfo, has
     assert get_writer_batch_size_from_info(ds_info) == (100 if has_big_chunks else None)
 
 
+@pytest.mark.parametrize(
+    "num_examples,num_bytes,expected",
+    [
+        (None, None, None),
+        (1_000, 1_000_000, None),  # 1kB rows
+        (1_000, 100_000_000, 100),  # 100kB rows
+        (10, 1_000_000_000, 100),
+    ],
+)
+def test_get_writer_batch_size_from_info_with_splits_info(
+    num_examples: Optional[int], num_bytes: Optional[int], expected: Optional[int]
+) -> None:
+    ds_info = datasets.info.DatasetInfo(
+        features=Features({"text": Value("string")}),
+        splits=datasets.SplitDict(
+            {"train": datasets.SplitInfo(name="train", num_examples=num_examples, num_bytes=num_bytes)}
+        ),
+    )
+    assert get_writer_batch_size_from_info(ds_info) == expected
+
+
 @pytest.mark.parametrize(
     "max_operations_per_commit,use_parent_commit,expected_num_commits",
     [(2, False, 1), (1, False, 2), (2, True, 1), (1, True, 2)],
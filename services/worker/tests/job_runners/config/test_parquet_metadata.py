@@ -4,7 +4,7 @@
 import io
 from http import HTTPStatus
 from pathlib import Path
-from typing import Any, Callable, Mapping, Optional
+from typing import Any, Callable, List, Mapping, Optional
 from unittest.mock import patch
 
 import pyarrow as pa
@@ -20,6 +20,7 @@ from libcommon.resources import CacheMongoResource, QueueMongoResource
 from libcommon.simple_cache import CachedArtifactError, upsert_response
 from libcommon.storage import StrPath
 from libcommon.utils import Priority, SplitHubFile
+from libcommon.viewer_utils.parquet_metadata import load_row_group_index
 
 from worker.config import AppConfig
 from worker.dtos import (
@@ -27,7 +28,10 @@ from worker.dtos import (
     ConfigParquetResponse,
     ParquetFileMetadataItem,
 )
-from worker.job_runners.config.parquet_metadata import ConfigParquetMetadataJobRunner
+from worker.job_runners.config.parquet_metadata import (
+    ConfigParquetMetadataJobRunner,
+    create_row_group_index_files,
+)
 
 from ...constants import CI_USER_TOKEN
 from ...fixtures.hub import hf_api
@@ -133,6 +137,7 @@ def get_job_runner(
                 ],
                 partial=False,
                 features=None,
+                row_group_index_subpaths={"train": "ok/--/config_1/train/row_group_index.npy"},
             ),
             False,
         ),
@@ -206,6 +211,7 @@ def get_job_runner(
                 ],
                 partial=False,
                 features=Features({"a": Value("string")}).to_dict(),
+                row_group_index_subpaths={"train": "with_features/--/config_1/train/row_group_index.npy"},
             ),
             False,
         ),
@@ -252,6 +258,12 @@ def test_compute(
                 )
                 == pq.ParquetFile(dummy_parquet_buffer).metadata
             )
+        for row_group_index_subpath in expected_content["row_group_index_subpaths"].values():
+            row_group_index = load_row_group_index(
+                Path(job_runner.parquet_metadata_directory) / row_group_index_subpath
+            )
+            assert row_group_index["first_row"].tolist() == [0, 3]
+            assert row_group_index["file_id"].tolist() == [0, 1]
 
 
 class AuthenticatedHTTPFile(HTTPFile):  # type: ignore
@@ -323,3 +335,29 @@ def test_ParquetIndexWithMetadata_query(
         out = index.query(offset=0, length=2).to_pydict()
     assert out == ds[:2]
     assert AuthenticatedHTTPFile.last_url == url
+
+
+def test_create_row_group_index_files_skips_the_files_without_split(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    buffer = io.BytesIO()
+    pq.write_table(pa.table({"col": list(range(10))}), buffer, row_group_size=5)
+    pq.read_metadata(pa.BufferReader(buffer.getvalue())).write_metadata_file(str(tmp_path / "0000.parquet"))
+    items: List[ParquetFileMetadataItem] = [
+        {
+            "dataset": "ds",
+            "config": "default",
+            "split": split,
+            "url": f"https://url/{filename}",
+            "filename": filename,
+            "size": buffer.tell(),
+            "num_rows": 10,
+            "parquet_metadata_subpath": "0000.parquet",
+        }
+        for split, filename in [("train", "0000.parquet"), (None, "other.parquet")]
+    ]
+    row_group_index_subpaths = create_row_group_index_files(
+        dataset="ds", config="default", parquet_files_metadata=items, parquet_metadata_directory=tmp_path
+    )
+    assert list(row_group_index_subpaths) == ["train"]
+    assert "other.parquet" in caplog.text
@@ -4,20 +4,27 @@
 import os
 from dataclasses import replace
 from http import HTTPStatus
-from typing import Callable, Optional
+from typing import Callable, List, Optional, Set
+from unittest.mock import patch
 
 import duckdb
+import pandas as pd
 import pytest
 import requests
 from libcommon.processing_graph import ProcessingGraph
 from libcommon.resources import CacheMongoResource, QueueMongoResource
 from libcommon.simple_cache import upsert_response
 from libcommon.storage import StrPath
-from libcommon.utils import Priority
+from libcommon.utils import Priority, SplitHubFile
 
 from worker.config import AppConfig
+from worker.dtos import DuckdbIndexedParquetFile, DuckdbIndexShard
 from worker.job_runners.config.parquet_and_info import ConfigParquetAndInfoJobRunner
-from worker.job_runners.split.duckdb_index import SplitDuckDbIndexJobRunner
+from worker.job_runners.split.duckdb_index import (
+    SplitDuckDbIndexJobRunner,
+    get_reusable_shards,
+    get_shards,
+)
 from worker.resources import LibrariesResource
 
 from ...fixtures.hub import HubDatasetTest
@@ -123,12 +130,91 @@ def get_parquet_job_runner(
     return _get_job_runner
 
 
+def get_parquet_file(size: int) -> SplitHubFile:
+    return {"dataset": "dataset", "config": "config", "split": "split", "url": "url", "filename": "f", "size": size}
+
+
+@pytest.mark.parametrize(
+    "sizes,max_parquet_size_bytes,expected_shards_sizes",
+    [
+        ([10], 100, [[10]]),
+        ([10, 20, 30], 100, [[10, 20, 30]]),
+        ([50, 50, 50], 100, [[50, 50], [50]]),
+        ([150, 10, 10], 100, [[150], [10, 10]]),
+    ],
+)
+def test_get_shards(sizes: List[int], max_parquet_size_bytes: int, expected_shards_sizes: List[List[int]]) -> None:
+    shards = get_shards([get_parquet_file(size) for size in sizes], max_parquet_size_bytes=max_parquet_size_bytes)
+    assert [[parquet_file["size"] for parquet_file in shard] for shard in shards] == expected_shards_sizes
+
+
+def get_indexed_parquet_file(url: str, etag: Optional[str] = "etag") -> DuckdbIndexedParquetFile:
+    return {"url": url, "size": 100, "etag": etag}
+
+
+def get_shard(filename: str, urls: List[str]) -> DuckdbIndexShard:
+    return {
+        "url": f"https://hub/{filename}",
+        "filename": filename,
+        "size": 1_000,
+        "num_rows": 10,
+        "parquet_files": [get_indexed_parquet_file(url) for url in urls],
+    }
+
+
+@pytest.mark.parametrize(
+    "new_shards_urls,repo_files,expected_num_reused_shards",
+    [
+        # unchanged
+        ([["0.parquet", "1.parquet"], ["2.parquet"]], None, 2),
+        # a parquet file has been appended to the last shard, or in a new shard
+        ([["0.parquet", "1.parquet"], ["2.parquet", "3.parquet"]], None, 1),
+        ([["0.parquet", "1.parquet"], ["2.parquet"], ["3.parquet"]], None, 2),
+        # the first parquet file has changed: the ids of all the rows have changed
+        ([["0bis.parquet", "1.parquet"], ["2.parquet"]], None, 0),
+        # an index file has been deleted from the repository
+        ([["0.parquet", "1.parquet"], ["2.parquet"]], {"c/s/index-00000-of-00002.duckdb"}, 1),
+    ],
+)
+def test_get_reusable_shards(
+    new_shards_urls: List[List[str]], repo_files: Optional[Set[str]], expected_num_reused_shards: int
+) -> None:
+    previous_shards = [
+        get_shard("index-00000-of-00002.duckdb", ["0.parquet", "1.parquet"]),
+        get_shard("index-00001-of-00002.duckdb", ["2.parquet"]),
+    ]
+    shards_manifests = [[get_indexed_parquet_file(url) for url in urls] for urls in new_shards_urls]
+    reused_shards = get_reusable_shards(
+        previous_shards=previous_shards,
+        shards_manifests=shards_manifests,
+        repo_files=repo_files or {f"c/s/{shard['filename']}" for shard in previous_shards},
+        config="c",
+        split="s",
+    )
+    assert reused_shards == previous_shards[:expected_num_reused_shards]
+
+
+def test_get_reusable_shards_without_etag() -> None:
+    previous_shard = get_shard("index.duckdb", ["0.parquet"])
+    previous_shard["parquet_files"][0]["etag"] = None
+    assert (
+        get_reusable_shards(
+            previous_shards=[previous_shard],
+            shards_manifests=[[get_indexed_parquet_file("0.parquet", etag=None)]],
+            repo_files={"c/s/index.duckdb"},
+            config="c",
+            split="s",
+        )
+        == []
+    )
+
+
 @pytest.mark.parametrize(
-    "hub_dataset_name,max_parquet_size_bytes,expected_error_code",
+    "hub_dataset_name,max_parquet_size_bytes,expected_num_shards,expected_error_code",
     [
-        ("duckdb_index", None, None),
-        ("duckdb_index", 1_000, "SplitWithTooBigParquetError"),  # parquet size is 2812
-        ("public", None, "NoIndexableColumnsError"),  # dataset does not have string columns to index
+        ("duckdb_index", None, 1, None),
+        ("duckdb_index", 1_000, 2, None),  # parquet size is 2812: one shard per parquet file
+        ("public", None, 1, "NoIndexableColumnsError"),  # dataset does not have string columns to index
     ],
 )
 def test_compute(
@@ -139,6 +225,7 @@ def test_compute(
     hub_responses_duckdb_index: HubDatasetTest,
     hub_dataset_name: str,
     max_parquet_size_bytes: Optional[int],
+    expected_num_shards: int,
     expected_error_code: str,
 ) -> None:
     hub_datasets = {"public": hub_responses_public, "duckdb_index": hub_responses_duckdb_index}
@@ -200,35 +287,56 @@ def test_compute(
         response = job_runner.compute()
         assert response
         content = response.content
-        url = content["url"]
-        file_name = content["filename"]
-        assert url is not None
-        assert file_name is not None
+        assert content["url"] is not None
+        assert content["filename"] is not None
+        assert len(content["shards"]) == expected_num_shards
+        assert content["filename"] == content["shards"][0]["filename"]
         job_runner.post_compute()
 
-        # download locally duckdb index file
-        duckdb_file = requests.get(url)
-        with open(file_name, "wb") as f:
-            f.write(duckdb_file.content)
+        # the next run with the same parquet files keeps the index files
+        upsert_response(
+            "split-duckdb-index",
+            dataset=dataset,
+            config=config,
+            split=split,
+            content=content,
+            http_status=HTTPStatus.OK,
+            job_runner_version=SplitDuckDbIndexJobRunner.get_job_runner_version(),
+        )
+        job_runner.pre_compute()
+        with patch("worker.job_runners.split.duckdb_index.create_index_file") as mock_create_index_file:
+            assert job_runner.compute().content == content
+        mock_create_index_file.assert_not_called()
+        job_runner.post_compute()
 
         duckdb.execute("INSTALL 'fts';")
         duckdb.execute("LOAD 'fts';")
-        con = duckdb.connect(file_name)
-
-        # validate number of inserted records
-        record_count = con.sql("SELECT COUNT(*) FROM data;").fetchall()
-        assert record_count is not None
-        assert isinstance(record_count, list)
-        assert record_count[0] == (10,)  # dataset has 5 rows but since parquet file was duplicate it is 10
-
-        # perform a search to validate fts feature
-        query = "Lord Vader"
-        result = con.execute(
-            "SELECT __hf_index_id, text FROM data WHERE fts_main_data.match_bm25(__hf_index_id, ?) IS NOT NULL;",
-            [query],
-        )
-        rows = result.df()
-        assert rows is not None
+        record_count = 0
+        rows_list = []
+        for shard in content["shards"]:
+            # download locally duckdb index file
+            duckdb_file = requests.get(shard["url"])
+            with open(shard["filename"], "wb") as f:
+                f.write(duckdb_file.content)
+            con = duckdb.connect(shard["filename"])
+
+            # validate number of inserted records
+            shard_record_count = con.sql("SELECT COUNT(*) FROM data;").fetchall()[0][0]
+            assert shard_record_count == shard["num_rows"]
+            record_count += shard_record_count
+
+            # perform a search to validate fts feature
+            query = "Lord Vader"
+            result = con.execute(
+                "SELECT __hf_index_id, text FROM data WHERE fts_main_data.match_bm25(__hf_index_id, ?) IS NOT NULL;",
+                [query],
+            )
+            rows_list.append(result.df())
+            con.close()
+            os.remove(shard["filename"])
+
+        assert record_count == 10  # dataset has 5 rows but since parquet file was duplicate it is 10
+        rows = pd.concat(rows_list)
         assert (rows["text"].eq("Vader turns round and round in circles as his ship spins into space.")).any()
         assert (rows["text"].eq("The wingman spots the pirateship coming at him and warns the Dark Lord")).any()
         assert (rows["text"].eq("We count thirty Rebel ships, Lord Vader.")).any()
@@ -238,8 +346,6 @@ def test_compute(
             )
         ).any()
         assert not (rows["text"].eq("There goes another one.")).any()
+        # the rows are numbered across the shards
         assert (rows["__hf_index_id"].isin([0, 2, 3, 4, 5, 7, 8, 9])).all()
-
-        con.close()
-        os.remove(file_name)
     job_runner.post_compute()
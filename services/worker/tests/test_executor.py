@@ -154,7 +154,7 @@ def set_long_running_job_in_queue(
         revision=job_info["params"]["revision"],
         config=job_info["params"]["config"],
         split=job_info["params"]["split"],
-        unicity_id="unicity_id",
+        unicity_id="long_unicity_id",
         namespace="user",
         priority=job_info["priority"],
         status=Status.STARTED,
@@ -185,7 +185,7 @@ def set_zombie_job_in_queue(queue_mongo_resource: QueueMongoResource) -> Iterato
         revision=job_info["params"]["revision"],
         config=job_info["params"]["config"],
         split=job_info["params"]["split"],
-        unicity_id="unicity_id",
+        unicity_id="zombie_unicity_id",
         namespace="user",
         priority=job_info["priority"],
         status=Status.STARTED,
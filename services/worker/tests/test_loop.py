@@ -1,4 +1,5 @@
 from dataclasses import replace
+from unittest.mock import patch
 
 from libcommon.processing_graph import ProcessingGraph, ProcessingStep
 from libcommon.resources import CacheMongoResource, QueueMongoResource
@@ -79,3 +80,66 @@ def test_process_next_job(
     assert not loop.queue.is_job_in_process(
         job_type=job_type, dataset=dataset, revision=revision, config=config, split=split
     )
+
+
+def test_wait_for_new_job_falls_back_to_polling(
+    test_processing_graph: ProcessingGraph,
+    test_processing_step: ProcessingStep,
+    app_config: AppConfig,
+    libraries_resource: LibrariesResource,
+    queue_mongo_resource: QueueMongoResource,
+    worker_state_file_path: str,
+) -> None:
+    app_config = replace(app_config, worker=replace(app_config.worker, sleep_seconds=0.01, watch_new_jobs=True))
+    factory = DummyJobRunnerFactory(
+        processing_step=test_processing_step, processing_graph=test_processing_graph, app_config=app_config
+    )
+    loop = Loop(
+        job_runner_factory=factory,
+        library_cache_paths=libraries_resource.storage_paths,
+        app_config=app_config,
+        state_file_path=worker_state_file_path,
+        processing_graph=test_processing_graph,
+    )
+    assert loop.new_jobs_watcher is not None
+    # the test database (mongomock, or a standalone mongod) does not support change streams
+    with patch.object(loop, "sleep", wraps=loop.sleep) as mock_sleep:
+        loop.wait_for_new_job()
+        assert mock_sleep.call_count == 1
+    assert loop.new_jobs_watcher is None
+
+
+def test_process_next_job_batch(
+    test_processing_graph: ProcessingGraph,
+    test_processing_step: ProcessingStep,
+    app_config: AppConfig,
+    libraries_resource: LibrariesResource,
+    cache_mongo_resource: CacheMongoResource,
+    queue_mongo_resource: QueueMongoResource,
+    worker_state_file_path: str,
+) -> None:
+    job_type = test_processing_step.job_type
+    app_config = replace(
+        app_config,
+        worker=replace(app_config.worker, job_types_only=[job_type], batch_max_jobs=2, batch_difficulty_max=20),
+    )
+    factory = DummyJobRunnerFactory(
+        processing_step=test_processing_step, processing_graph=test_processing_graph, app_config=app_config
+    )
+    loop = Loop(
+        job_runner_factory=factory,
+        library_cache_paths=libraries_resource.storage_paths,
+        app_config=app_config,
+        state_file_path=worker_state_file_path,
+        processing_graph=test_processing_graph,
+    )
+    datasets = ["dataset1", "dataset2", "dataset3"]
+    for dataset in datasets:
+        loop.queue.add_job(job_type=job_type, dataset=dataset, revision="revision", difficulty=20)
+    # the two first jobs are processed together
+    assert loop.process_next_job()
+    assert [
+        loop.queue.is_job_in_process(job_type=job_type, dataset=dataset, revision="revision") for dataset in datasets
+    ] == [False, False, True]
+    assert loop.process_next_job()
+    assert not loop.process_next_job()